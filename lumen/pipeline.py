@@ -1,5 +1,11 @@
 from __future__ import annotations
 
+import contextvars
+import threading
+
+from concurrent import futures
+from contextlib import contextmanager
+from functools import partial
 from typing import (
     Any, Dict, List, Optional, Type, Union,
 )
@@ -7,24 +13,92 @@ from typing import (
 import panel as pn
 import param
 
+from bokeh.server.callbacks import TimeoutCallback
+from panel.io.state import set_curdoc
+
 from .filters import Filter, ParamFilter
 from .sources import Source
 from .state import state
-from .transforms import Filter as FilterTransform, SQLTransform, Transform
+from .transforms import (
+    Filter as FilterTransform, SQLCount, SQLFilter, SQLLimit, SQLOrderBy,
+    SQLTransform, Sort, Transform,
+)
+from .transforms.optimize import format_plan, optimize as optimize_transforms
 from .util import get_dataframe_schema
 
 
+_EXECUTOR = None
+
+_EXECUTOR_LOCK = threading.Lock()
+
+# Tracks whether the current thread is computing a Pipeline run
+_worker = threading.local()
+
+
+def _get_executor():
+    """
+    Returns the thread pool shared by all asynchronous Pipeline runs.
+    """
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = futures.ThreadPoolExecutor(thread_name_prefix='lumen-pipeline')
+    return _EXECUTOR
+
+
+class _Superseded(Exception):
+    """
+    Raised to abort a Pipeline run superseded by a newer run.
+    """
+
+
+def _transform_key(transform):
+    """
+    Returns a key identifying equivalent transforms. Transforms which
+    are interactive, reference variables or are non-deterministic are
+    only equivalent to themselves.
+    """
+    key = None
+    if not (transform.controls or transform.refs):
+        key = transform._stage_key()
+    return ('id', id(transform)) if key is None else key
+
+
 class DataFrame(param.DataFrame):
     """
     DataFrame parameter that resolves data on access.
     """
 
     def __get__(self, obj, objtype):
-        if obj is not None and obj.__dict__.get(self._internal_name) is None:
-            obj._update_data()
+        # On the worker thread the data is never assigned, since that
+        # would trigger watchers outside the document thread
+        if obj is not None and not getattr(_worker, 'active', False):
+            if obj.__dict__.get('_pending_events'):
+                obj.flush()
+            if obj.__dict__.get(self._internal_name) is None:
+                obj._update_data()
         return super().__get__(obj, objtype)
 
 
+class _Finalize(Transform):
+    """
+    Completes a transform which was pushed down into the source query.
+    """
+
+    finalize = param.Callable(doc="""
+        Function completing the transform on the queried data.""")
+
+    transform = param.ClassSelector(class_=Transform, doc="""
+        The transform which was pushed down.""")
+
+    def apply(self, table):
+        return self.finalize(table)
+
+    def _stage_key(self):
+        key = self.transform._stage_key()
+        return None if key is None else (type(self), key)
+
+
 class Pipeline(param.Parameterized):
     """
     A Pipeline represents a data Source along with any number of
@@ -66,19 +140,78 @@ class Pipeline(param.Parameterized):
         doc="The name of the table driving this pipeline."
     )
 
+    pushdown = param.Boolean(default=True, doc="""
+        Whether to compile the leading transforms to SQLTransforms
+        when the source supports them, so they are evaluated by the
+        database instead of on the fetched data.""")
+
+    lazy = param.Boolean(default=False, doc="""
+        Whether to defer querying the data until it is accessed. When
+        enabled changes to the filters, transforms or source clear the
+        data and trigger the stale event instead of updating it.""")
+
+    optimize = param.Boolean(default=True, doc="""
+        Whether to rewrite the transforms into cheaper equivalents
+        before applying them, e.g. by filtering rows and selecting
+        columns as early as possible.""")
+
+    memoize = param.Integer(default=0, bounds=(0, None), doc="""
+        Number of outputs of each transform to cache. An output is
+        reused as long as the data the transform is applied to and the
+        parameters of the transform and all preceding transforms are
+        unchanged, so only the transforms following a change are
+        recomputed. Only the outputs of transforms declared to be
+        deterministic are cached. Disabled by default since the
+        cached outputs are held in memory.""")
+
+    debug = param.Boolean(default=False, doc="""
+        Whether to print the (optimized) plan of transforms whenever
+        the data is updated.""")
+
+    stale = param.Event(doc="""
+        Event triggered when the data of a lazy pipeline is cleared.""")
+
+    asynchronous = param.Boolean(default=False, doc="""
+        Whether updates triggered by events in a server session are
+        computed on a thread pool instead of blocking the session.
+        While a run is in progress the loading parameter is set and
+        the result of any run superseded by a newer run is discarded.
+        The data is updated on the document thread once the run
+        completes.""")
+
+    loading = param.Boolean(default=False, constant=True, doc="""
+        Whether an asynchronous update of the data is in progress.""")
+
+    debounce = param.Integer(default=0, bounds=(0, None), doc="""
+        When running on a server all events triggering an update of
+        the data are collapsed into a single update on the next tick.
+        If a debounce period (in milliseconds) is set the update is
+        instead scheduled once no new events arrived for that period.""")
+
     def __init__(self, *, source, table, **params):
         if 'schema' not in params:
             params['schema'] = source.get_schema(table)
         super().__init__(source=source, table=table, **params)
+        self._stage_cache = {}
+        self._pending_events = []
+        self._scheduled = None
+        self._holds = 0
+        self._run = 0
+        self._future = None
+        self._stage_lock = threading.RLock()
+        self._shared = False
+        self._page_warned = False
         self._init_callbacks()
 
     def _init_callbacks(self):
-        self.param.watch(self._update_data, ['filters', 'sql_transforms', 'transforms', 'table'])
-        self.source.param.watch(self._update_data, self.source._reload_params)
+        self.param.watch(self._schedule_update, ['filters', 'sql_transforms', 'transforms', 'table'])
+        self.source.param.watch(self._schedule_update, self.source._reload_params)
         for filt in self.filters:
-            filt.param.watch(self._update_data, ['value'])
+            filt.param.watch(self._schedule_update, ['value'])
+        self._transform_watchers = []
         for transform in self.transforms+self.sql_transforms:
-            transform.param.watch(self._update_data, list(transform.param))
+            watcher = transform.param.watch(self._schedule_update, list(transform.param))
+            self._transform_watchers.append((transform, watcher))
             for fp in transform._field_params:
                 if isinstance(transform.param[fp], param.Selector):
                     transform.param[fp].objects = list(self.schema)
@@ -87,9 +220,12 @@ class Pipeline(param.Parameterized):
             if var.startswith('$variables.')
         }
         if refs:
-            state.variables.param.watch(self._update_data, list(refs))
+            state.variables.param.watch(self._schedule_update, list(refs))
+        self._parent_watcher = None
         if self.pipeline is not None:
-            self.pipeline.param.watch(self._update_data, 'data')
+            self._parent_watcher = self.pipeline.param.watch(
+                self._schedule_update, ['data', 'stale']
+            )
 
     @property
     def refs(self):
@@ -104,32 +240,199 @@ class Pipeline(param.Parameterized):
                     refs.append(ref)
         return refs
 
-    def _update_data(self, *events: param.Event):
+    def _get_query(self):
         query = {}
-
-        # Compute Filter query
         for filt in self.filters:
             filt_query = filt.query
             if (filt_query is not None and not getattr(filt, 'disabled', None) and
                 (filt.table is None or filt.table == self.table)):
                 query[filt.field] = filt_query
+        return query
 
+    def _schedule_update(self, *events: param.Event):
+        """
+        Queues the events and schedules a single update of the data
+        for all events queued within the same tick (or debounce
+        period). Outside a server session the update is immediate.
+        """
+        self._pending_events += events
+        if self._holds:
+            return
+        doc = pn.state.curdoc
+        if doc is None or doc.session_context is None:
+            self.flush()
+            return
+        if self._scheduled is not None:
+            if not self.debounce:
+                return
+            self._cancel_update()
+        update = partial(self._run_scheduled, doc)
+        if self.debounce:
+            callback = doc.add_timeout_callback(update, self.debounce)
+        else:
+            callback = doc.add_next_tick_callback(update)
+        self._scheduled = (doc, callback)
+
+    def _run_scheduled(self, doc):
+        """
+        Applies the pending updates scheduled on the document, on the
+        thread pool if the pipeline is asynchronous.
+        """
+        if not self.asynchronous or self.lazy:
+            self.flush()
+            return
+        self._pending_events = []
+        self._cancel_update()
+        if self._future is not None:
+            self._future.cancel()
+        self._run += 1
+        run = self._run
+        with param.edit_constant(self):
+            self.loading = True
+        # Run in a copy of the session context so that references,
+        # variables and request headers resolve against the session
+        self._future = future = _get_executor().submit(
+            contextvars.copy_context().run, self._compute_async, doc, run
+        )
+        future.add_done_callback(
+            lambda f: doc.add_next_tick_callback(partial(self._apply_async, run, f))
+        )
+
+    def _compute_async(self, doc, run):
+        _worker.active = True
+        parents = []
+        try:
+            with set_curdoc(doc):
+                return self._compute_data(run, parents), parents
+        finally:
+            _worker.active = False
+
+    def _apply_async(self, run, future):
+        """
+        Applies the result of an asynchronous run on the document
+        thread unless the run was superseded.
+        """
+        if run != self._run or future.cancelled():
+            return
+        self._future = None
+        try:
+            data, parents = future.result()
+        except _Superseded:
+            return
+        except Exception:
+            with param.edit_constant(self):
+                self.loading = False
+            raise
+        scheduled = self._scheduled is not None
+        for parent, parent_data in parents:
+            if parent.__dict__.get(parent.param['data']._internal_name) is None:
+                parent.data = parent_data
+        if not scheduled:
+            # The update triggered by the parent data is already
+            # reflected in the result
+            self._pending_events = []
+            self._cancel_update()
+        self.data = data
+        with param.edit_constant(self):
+            self.loading = False
+
+    def _cancel_update(self):
+        if self._scheduled is None:
+            return
+        doc, callback = self._scheduled
+        self._scheduled = None
+        try:
+            if isinstance(callback, TimeoutCallback):
+                doc.remove_timeout_callback(callback)
+            else:
+                doc.remove_next_tick_callback(callback)
+        except ValueError:
+            # The callback has already been executed
+            pass
+
+    def flush(self):
+        """
+        Synchronously applies all pending updates of the data as a
+        single update, e.g. to ensure the data is current in tests or
+        scripts without waiting for the next tick.
+        """
+        events = self._pending_events
+        if events or self._scheduled is not None:
+            self._update_data(*events)
+
+    @contextmanager
+    def hold(self):
+        """
+        Context manager which collapses all events triggered within
+        the context into a single update of the data on exit.
+        """
+        self._holds += 1
+        try:
+            yield
+        finally:
+            self._holds -= 1
+            if not self._holds:
+                self.flush()
+
+    def _update_data(self, *events: param.Event):
+        # Pending events are handled by this update, which also
+        # supersedes any asynchronous run in progress
+        self._pending_events = []
+        self._cancel_update()
+        self._run += 1
+        if self.loading:
+            with param.edit_constant(self):
+                self.loading = False
+
+        if self.lazy and events:
+            with param.discard_events(self):
+                self.data = None
+            self.stale = True
+            return
+
+        self.data = self._compute_data()
+
+    def _compute_data(self, run=None, parents=None):
+        """
+        Queries the source (or parent pipeline) and applies the
+        filters and transforms, returning the resulting data.
+
+        Arguments
+        ---------
+        run: int | None
+            The id of the asynchronous run computing the data, used to
+            abort the computation once it has been superseded.
+        parents: list | None
+            On the worker thread, collects the data computed for parent
+            pipelines without data, outermost first, so that it can be
+            assigned on the document thread.
+        """
+        # Compute Filter query
+        query = self._get_query()
+
+        transforms = self.transforms
         if self.pipeline is None:
             # Compute SQL transform expression
-            if self.sql_transforms:
-                if not self.source._supports_sql:
-                    raise ValueError(
-                        'Can only use sql transforms source that support them. '
-                        f'Found source typed {self.source.source_type!r} instead.'
-                    )
-                query['sql_transforms'] = self.sql_transforms
+            if self.sql_transforms and not self.source._supports_sql:
+                raise ValueError(
+                    'Can only use sql transforms source that support them. '
+                    f'Found source typed {self.source.source_type!r} instead.'
+                )
+            pushed, finalize, transforms = self._pushdown_transforms()
+            sql_transforms = self.sql_transforms + pushed
+            if sql_transforms:
+                query['sql_transforms'] = sql_transforms
             data = self.source.get(self.table, **query)
+            if finalize is not None:
+                pushed_transform = self.transforms[len(self.transforms)-len(transforms)-1]
+                transforms = [_Finalize(finalize=finalize, transform=pushed_transform)] + transforms
         else:
-            if self.pipeline.data is None:
-                self.pipeline._update_data()
-            data = FilterTransform.apply_to(
-                self.pipeline.data, conditions=list(query.items())
-            )
+            data = self.pipeline.data
+            if data is None and parents is not None:
+                data = self.pipeline._compute_data(parents=parents)
+                parents.append((self.pipeline, data))
+            if query:
+                transforms = [FilterTransform(conditions=list(query.items()))] + transforms
 
         # Apply ParamFilter
         for filt in self.filters:
@@ -141,15 +444,227 @@ class Pipeline(param.Parameterized):
                 data = ds.select(filt.value).data
 
         # Apply transforms
-        for transform in self.transforms:
-            data = transform.apply(data)
+        self._check_run(run)
+        plan = self._plan(transforms, list(getattr(data, 'columns', [])))
+        return self._apply_plan(data, plan, run)
 
-        self.data = data
+    def _apply_plan(self, data, plan, run=None):
+        """
+        Applies the planned transforms to the data, resuming from the
+        last cached output whose input data and preceding transforms
+        are unchanged.
+
+        Each stage is identified by a fingerprint combining the input
+        data with the keys of all transforms up to and including it.
+        Outputs a subsequent transform would modify in place are not
+        cached, since the modification would corrupt the cache.
+        """
+        if not self.memoize:
+            with self._stage_lock:
+                self._stage_cache.clear()
+        fingerprint, fingerprints = (id(data),), []
+        for transform in plan:
+            key = transform._stage_key()
+            if fingerprint is not None and key is not None:
+                fingerprint = (fingerprint, key)
+            else:
+                fingerprint = None
+            fingerprints.append(fingerprint)
+
+        start, root = 0, data
+        with self._stage_lock:
+            for i in reversed(range(len(plan))):
+                cache = self._stage_cache.get(i, {})
+                if fingerprints[i] in cache and cache[fingerprints[i]][0] is root:
+                    data, start = cache[fingerprints[i]][1], i+1
+                    break
+
+        owned = False
+        for i, transform in enumerate(plan[start:], start):
+            self._check_run(run)
+            if owned:
+                result = transform._apply_inplace(data)
+            else:
+                result = transform.apply(data)
+            owned = (owned and result is data) or (result is not data and transform._copies)
+            data = result
+            inplace = (
+                owned and i+1 < len(plan) and
+                type(plan[i+1])._apply_inplace is not Transform._apply_inplace
+            )
+            if fingerprints[i] is None or inplace or not self.memoize:
+                continue
+            with self._stage_lock:
+                cache = self._stage_cache.setdefault(i, {})
+                cache.pop(fingerprints[i], None)
+                cache[fingerprints[i]] = (root, data)
+                while len(cache) > self.memoize:
+                    cache.pop(next(iter(cache)))
+            owned = False
+        return data
+
+    def _check_run(self, run):
+        """
+        Aborts an asynchronous run which has been superseded.
+        """
+        if run is not None and run != self._run:
+            raise _Superseded()
+
+    def _plan(self, transforms, columns):
+        """
+        Returns the transforms to apply to the data, rewritten into
+        cheaper equivalents if optimization is enabled.
+        """
+        plan = list(transforms)
+        if self.optimize:
+            plan = optimize_transforms(plan, columns)
+        if self.debug:
+            print(f'Plan of {self.name} on {self.table!r} table:\n{format_plan(plan)}')
+        return plan
+
+    def _pushdown_transforms(self, transforms=None, ordered=False):
+        """
+        Compiles the longest prefix of the transforms which can be
+        expressed in SQL to SQLTransforms.
+
+        Arguments
+        ---------
+        transforms: list(Transform) | None
+            The transforms to compile, defaults to the transforms of
+            this pipeline.
+        ordered: bool
+            Whether the query orders the rows after the transforms, so
+            transforms which may reorder the rows can be pushed down.
+
+        Returns
+        -------
+        The compiled SQLTransforms, a function (or None) completing the
+        pushed down transforms on the queried data and the remaining
+        transforms to apply to the queried data.
+        """
+        transforms = self.transforms if transforms is None else transforms
+        if (not self.pushdown or not self._supports_pushdown() or
+            any(not isinstance(t, (SQLFilter, SQLLimit, SQLOrderBy))
+                for t in self.sql_transforms)):
+            return [], None, transforms
+        columns = list(self.schema or [])
+        compiled = []
+        for transform in transforms:
+            result = transform._to_sql(columns)
+            if result is None:
+                break
+            compiled.append(result)
+            columns = result[1]
+            if result[2] is not None:
+                break
+        # Transforms which may reorder the rows in SQL are only pushed
+        # down if a subsequent Sort defines the order of the rows
+        sorts = [
+            i for i, t in enumerate(transforms[:len(compiled)])
+            if isinstance(t, Sort)
+        ]
+        start = len(compiled) if ordered else (sorts[-1]+1 if sorts else 0)
+        for i in range(start, len(compiled)):
+            if transforms[i]._sql_unordered:
+                compiled = compiled[:i]
+                break
+        sql_transforms = [t for sql, _, _ in compiled for t in sql]
+        finalize = compiled[-1][2] if compiled else None
+        return sql_transforms, finalize, transforms[len(compiled):]
+
+    def _supports_pushdown(self):
+        """
+        Whether operations may be pushed down into the source query.
+        """
+        return (
+            self.pipeline is None and self.source._supports_sql and
+            getattr(self.source, 'filter_in_sql', True) and
+            not any(isinstance(filt, ParamFilter) for filt in self.filters)
+        )
+
+    def get_page(self, page: int, page_size: int, sort: Optional[List[tuple]] = None):
+        """
+        Returns a single page of the data along with the total number
+        of rows. If the source supports SQL and all filters and
+        transforms of the pipeline (and the pipelines it is chained
+        on) can be pushed down, only the requested page and the row
+        count are queried from the source, otherwise the data is
+        sorted and sliced in memory. Rows are ordered by the sort
+        columns and then by all other columns, so the pages are
+        consistent.
+
+        Arguments
+        ---------
+        page: int
+            The page to return, starting at 1.
+        page_size: int
+            The number of rows per page.
+        sort: list(tuple(str, bool)) | None
+            Columns to sort by along with whether to sort ascending.
+
+        Returns
+        -------
+        The page of data and the total number of rows.
+        """
+        offset = (page-1) * page_size
+        by = [col for col, _ in sort or []]
+        ascending = [asc for _, asc in sort or []]
+
+        # Fold the filters and transforms of the chained pipelines
+        # into the transforms of the root pipeline
+        chain = [self]
+        while chain[0].pipeline is not None:
+            chain.insert(0, chain[0].pipeline)
+        root, transforms = chain[0], list(chain[0].transforms)
+        for pipeline in chain[1:]:
+            query = pipeline._get_query()
+            if query:
+                transforms.append(FilterTransform(conditions=list(query.items())))
+            transforms += pipeline.transforms
+        pushed, finalize, transforms = root._pushdown_transforms(transforms, ordered=True)
+        if (not root._supports_pushdown() or finalize is not None or transforms or
+            any(isinstance(filt, ParamFilter) for p in chain for filt in p.filters)):
+            if root.source._supports_sql and not self._page_warned:
+                self.param.warning(
+                    'The filters and transforms of the pipeline cannot be '
+                    'pushed down into the source query, so pagination falls '
+                    'back to slicing the full table in memory.'
+                )
+                self._page_warned = True
+            data = self.data
+            if by:
+                data = data.sort_values(by, ascending=ascending)
+            return data.iloc[offset:offset+page_size], len(data)
+
+        query = root._get_query()
+        sql_transforms = root.sql_transforms + pushed
+        count = root.source.get(
+            root.table, **dict(query, sql_transforms=sql_transforms+[SQLCount()])
+        )
+        # Break ties on all other columns so that the rows are in the
+        # same order for every page and pages neither overlap nor skip
+        # rows
+        columns = root.source.get(
+            root.table, **dict(query, sql_transforms=sql_transforms+[SQLLimit(limit=0)])
+        ).columns
+        ties = [col for col in columns if col not in by]
+        sql_transforms = sql_transforms + [
+            SQLOrderBy(by=by+ties, ascending=ascending+[True]*len(ties))
+        ]
+        limit = SQLLimit(limit=page_size, offset=offset)
+        data = root.source.get(
+            root.table, **dict(query, sql_transforms=sql_transforms+[limit])
+        )
+        if hasattr(count, 'compute'):
+            count = count.compute()
+        if hasattr(data, 'compute'):
+            data = data.compute()
+        return data, int(count['count'].iloc[0])
 
     @classmethod
     def from_spec(
         cls, spec: Dict[str, Any], source: Optional[Source] = None,
-        source_filters: Optional[List[Filter]] = None
+        source_filters: Optional[List[Filter]] = None, shared: bool = False
     ):
         params = dict(spec)
 
@@ -193,11 +708,147 @@ class Pipeline(param.Parameterized):
         params['transforms'] = [Transform.from_spec(tspec) for tspec in transform_specs]
         sql_transform_specs = spec.pop('sql_transforms', [])
         params['sql_transforms'] = [Transform.from_spec(tspec) for tspec in sql_transform_specs]
-        return cls(**params)
+        return cls.shared(**params) if shared else cls(**params)
 
-    def add_filter(self, filt: Union[Filter, Type[Filter]], field: Optional[str] = None, **kwargs):
+    @classmethod
+    def _canonical_key(cls, params):
+        """
+        Returns a key identifying pipelines declared with equivalent
+        parameters or None if the pipeline cannot be shared. Sources,
+        parent pipelines and filters are stateful and therefore
+        compared by identity, while transforms are compared by value.
         """
-        Add a filter to the pipeline.
+        if params.get('data') is not None:
+            return None
+        key = [cls]
+        for p, value in sorted(params.items()):
+            if p in ('name', 'data', 'schema', 'loading', 'stale'):
+                continue
+            elif p in ('source', 'pipeline'):
+                value = id(value)
+            elif p == 'filters':
+                value = tuple(id(filt) for filt in value)
+            elif p in ('transforms', 'sql_transforms'):
+                value = tuple(_transform_key(t) for t in value)
+            elif p in cls.param and value == cls.param[p].default:
+                continue
+            key.append((p, value))
+        key = tuple(key)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    @classmethod
+    def shared(cls, **params) -> Pipeline:
+        """
+        Returns a pipeline with the supplied parameters, reusing an
+        equivalent pipeline registered in the session if one exists.
+        Pipelines on the same source and table, with the same filters
+        and equivalent transforms and options are equivalent. Adding
+        filters or transforms to a shared pipeline modifies a private
+        copy instead (see `Pipeline.add_filter`).
+
+        Returns
+        -------
+        Pipeline
+        """
+        key = cls._canonical_key(params)
+        if key is None:
+            return cls(**params)
+        return cls._register(key, lambda: cls(**params))
+
+    @classmethod
+    def _register(cls, key, create):
+        """
+        Returns the pipeline registered under the key, creating and
+        registering it if the registry holds no (live) pipeline.
+        """
+        registry = state.shared_pipelines
+        pipeline = registry.get(key)
+        if pipeline is None:
+            pipeline = create()
+            pipeline._shared = True
+            pipeline = registry.setdefault(key, pipeline)
+        return pipeline
+
+    def _chain_key(self, filters=(), transforms=()):
+        return (
+            'chain', id(self), tuple(id(filt) for filt in filters),
+            tuple(_transform_key(t) for t in transforms)
+        )
+
+    def _rebase(self, parent: Pipeline):
+        """
+        Moves the chained pipeline onto a parent chained on its current
+        parent, which applies the leading transforms of this pipeline.
+        The output is unchanged so the data is not recomputed.
+        """
+        moved = self.transforms[:len(parent.transforms)]
+        for transform, watcher in list(self._transform_watchers):
+            if any(transform is t for t in moved):
+                transform.param.unwatch(watcher)
+                self._transform_watchers.remove((transform, watcher))
+        self.pipeline.param.unwatch(self._parent_watcher)
+        with self._stage_lock:
+            self._stage_cache.clear()
+        with param.discard_events(self):
+            self.param.update(
+                pipeline=parent, transforms=self.transforms[len(moved):],
+                schema=get_dataframe_schema(parent.data)['items']['properties']
+            )
+        self._parent_watcher = parent.param.watch(self._schedule_update, ['data', 'stale'])
+
+    def _split_chain(self, keys):
+        """
+        Finds the registered chained pipeline on this pipeline whose
+        transforms share the longest common prefix with the transform
+        keys and moves it onto a registered pipeline applying only the
+        common prefix, which is returned. Returns None if no chained
+        pipeline shares a prefix.
+        """
+        registry = state.shared_pipelines
+        best, common = None, 0
+        for key, chained in list(registry.items()):
+            if key[:3] != ('chain', id(self), ()) or chained.pipeline is not self:
+                continue
+            n = 0
+            for k1, k2 in zip(key[3], keys):
+                if k1 != k2:
+                    break
+                n += 1
+            if n > common and n < len(key[3]):
+                best, common = chained, n
+        if best is None:
+            return None
+        prefix = best.transforms[:common]
+        parent = self._register(
+            self._chain_key(transforms=prefix),
+            lambda: self.chain(transforms=prefix)
+        )
+        best._rebase(parent)
+        registry.setdefault(parent._chain_key(transforms=best.transforms), best)
+        return parent
+
+    def _copy_on_write(self) -> Pipeline:
+        """
+        Returns the pipeline itself or a private copy if it is shared,
+        so modifications do not reach the other consumers.
+        """
+        if not self._shared:
+            return self
+        return self.clone(
+            filters=list(self.filters), transforms=list(self.transforms),
+            sql_transforms=list(self.sql_transforms), data=None
+        )
+
+    def add_filter(
+        self, filt: Union[Filter, Type[Filter]], field: Optional[str] = None, **kwargs
+    ) -> Pipeline:
+        """
+        Add a filter to the pipeline. If the pipeline is shared the
+        filter is added to a private copy of the pipeline instead.
 
         Arguments
         ---------
@@ -205,40 +856,54 @@ class Pipeline(param.Parameterized):
            The filter instance or filter type to add.
         field: str | None
            The field to filter on (required to instantiate Filter type).
+
+        Returns
+        -------
+        The pipeline the filter was added to.
         """
+        pipeline = self._copy_on_write()
         if isinstance(filt, str):
             filt = Filter._get_type(filt)
         if not isinstance(filt, Filter):
             tspec = f'{filt.__module__}.{filt.__name__}'
             filt = Filter.from_spec(
-                dict({'type': tspec, 'field': field, 'table': self.table}, **kwargs),
-                {self.table: self.schema}
+                dict({'type': tspec, 'field': field, 'table': pipeline.table}, **kwargs),
+                {pipeline.table: pipeline.schema}
             )
-        self.filters.append(filt)
-        filt.param.watch(self._update_data, ['value'])
-        self._update_data()
+        pipeline.filters.append(filt)
+        filt.param.watch(pipeline._schedule_update, ['value'])
+        pipeline._update_data()
+        return pipeline
 
-    def add_transform(self, transform: Transform, **kwargs):
+    def add_transform(self, transform: Transform, **kwargs) -> Pipeline:
         """
-        Add a (SQL)Transform to the pipeline.
+        Add a (SQL)Transform to the pipeline. If the pipeline is
+        shared the transform is added to a private copy of the
+        pipeline instead.
 
         Arguments
         ---------
         filt: Transform
            The Transform instance to add.
+
+        Returns
+        -------
+        The pipeline the transform was added to.
         """
+        pipeline = self._copy_on_write()
         if isinstance(transform, str):
             transform = Transform._get_type(transform)(**kwargs)
         if isinstance(transform, SQLTransform):
-            self.sql_transforms.append(transform)
+            pipeline.sql_transforms.append(transform)
         else:
-            self.transforms.append(transform)
-        fields = list(self.schema)
+            pipeline.transforms.append(transform)
+        fields = list(pipeline.schema)
         for fparam in transform._field_params:
             transform.param[fparam].objects = fields
             transform.param.update(**{fparam: kwargs.get(fparam, fields)})
-        transform.param.watch(self._update_data, transform.controls)
-        self._update_data()
+        transform.param.watch(pipeline._schedule_update, transform.controls)
+        pipeline._update_data()
+        return pipeline
 
     def chain(
         self,
@@ -283,12 +948,70 @@ class Pipeline(param.Parameterized):
             }
         return self.clone(**params)
 
+    def branch(
+        self,
+        filters: Optional[List[Filter]] = None,
+        transforms: Optional[List[Transform]] = None
+    ):
+        """
+        Chains additional filtering and transform operations on an
+        existing pipeline like `Pipeline.chain` but reuses the chained
+        pipelines registered in the session. The filters are applied
+        by a separate chained pipeline and the transforms continue
+        from the chained pipeline applying the longest registered
+        prefix of the transforms. If the remaining transforms share a
+        prefix with a registered chained pipeline the common prefix is
+        split off into a shared parent, so branches only diverge where
+        their transforms differ regardless of the order they are
+        created in. The remaining transforms are applied by a single
+        chained pipeline.
+
+        Arguments
+        ---------
+        filters: List[Filter] | None
+          Additional filters to apply on top of existing pipeline.
+        transforms: List[Transform] | None
+          Additional transforms to apply on top of existing pipeline.
+
+        Returns
+        -------
+        Pipeline
+        """
+        pipeline = self
+        if filters:
+            filters = list(filters)
+            pipeline = self._register(
+                self._chain_key(filters=filters),
+                lambda: self.chain(filters=filters)
+            )
+        transforms = list(transforms or [])
+        registry = state.shared_pipelines
+        while transforms:
+            for n in range(len(transforms), 0, -1):
+                prefix = registry.get(pipeline._chain_key(transforms=transforms[:n]))
+                if prefix is not None:
+                    pipeline, transforms = prefix, transforms[n:]
+                    break
+            else:
+                keys = pipeline._chain_key(transforms=transforms)[3]
+                prefix = pipeline._split_chain(keys)
+                if prefix is not None:
+                    pipeline, transforms = prefix, transforms[len(prefix.transforms):]
+                    continue
+                parent, remaining = pipeline, transforms
+                pipeline = self._register(
+                    parent._chain_key(transforms=remaining),
+                    lambda: parent.chain(transforms=remaining)
+                )
+                transforms = []
+        return pipeline
+
     def clone(self, **params) -> Pipeline:
         """
         Create a new instance of the pipeline with optionally overridden parameter values.
         """
         return type(self)(**dict({p: v for p, v in self.param.values().items()
-                                  if p != 'name'}, **params))
+                                  if p not in ('name', 'loading')}, **params))
 
     def traverse(self, type) -> List[Transform] | List[Filter]:
         """
@@ -300,7 +1023,7 @@ class Pipeline(param.Parameterized):
         objects = []
         pipeline = self
         while pipeline is not None:
-            objects.extend(getattr(self, type))
+            objects.extend(getattr(pipeline, type))
             pipeline = pipeline.pipeline
         return objects
 
@@ -6,6 +6,7 @@ application.
 """
 
 from urllib.parse import parse_qs
+from uuid import uuid4
 
 import pandas as pd
 import param
@@ -34,11 +35,29 @@ class TableEndpoint(param.Parameterized):
 
     columns = param.List(doc="The list of columns in the table.")
 
+    version = param.String(doc="""
+        Token identifying this publication of the table, cursors are
+        only valid for the version they were issued for.""")
+
     __abstract = True
 
-    def query(self, **kwargs):
+    def __init__(self, **params):
+        if 'version' not in params:
+            params['version'] = uuid4().hex
+        super().__init__(**params)
+
+    @property
+    def cursor(self):
         """
-        Filter the data given a set of queries.
+        A monotonically increasing cursor into the published data or
+        None if the endpoint does not support incremental queries.
+        """
+        return None
+
+    def query(self, since=None, **kwargs):
+        """
+        Filter the data given a set of queries, optionally only
+        returning the rows published after the supplied cursor.
         """
         return []
 
@@ -62,9 +81,21 @@ class DataFrameEndpoint(TableEndpoint):
             if not_found:
                 raise ValueError(f"Columns {not_found} not found in published data.")
 
-    def query(self, **kwargs):
+    @property
+    def cursor(self):
+        return 0 if self.data is None else len(self.data)
+
+    def append(self, data):
+        """
+        Appends rows to the published data, advancing the cursor.
+        """
+        self.data = pd.concat([self.data, data], ignore_index=True)
+
+    def query(self, since=None, **kwargs):
         query = None
         data = self.data
+        if since is not None and data is not None:
+            data = data.iloc[since:]
         columns = [] if self.data is None else list(self.data.columns)
         selected_cols = kwargs.pop('columns', columns)
         for k, v in kwargs.items():
@@ -82,9 +113,10 @@ class DataFrameEndpoint(TableEndpoint):
                 query = q
             else:
                 query &= q
+        if query is not None:
+            data = data[query]
         if selected_cols is not columns:
             data = data[selected_cols]
-        data = self.data if query is None else self.data[query]
         return data.to_json(orient='records')
 
     def schema(self):
@@ -103,7 +135,7 @@ class ParameterEndpoint(TableEndpoint):
         if not_found:
             raise ValueError(f"Columns {not_found} not found in published data.")
 
-    def query(self, **kwargs):
+    def query(self, since=None, **kwargs):
         objects = list(self.data)
         for k, v in kwargs.items():
             if k not in self.columns:
@@ -156,6 +188,25 @@ def publish(name, obj, columns):
     _TABLES[name] = endpoint(data=obj, columns=columns)
 
 
+def append(table, data):
+    """
+    Appends rows to a DataFrame table which was previously published.
+    Clients polling the table with a cursor will only receive the
+    appended rows.
+
+    Arguments
+    ---------
+    table: str
+        The name of the published table.
+    data: pandas.DataFrame
+        The rows to append to the table.
+    """
+    endpoint = _TABLES[table]
+    if not isinstance(endpoint, DataFrameEndpoint):
+        raise ValueError(f"Can only append to published DataFrame tables, {table!r} is not.")
+    endpoint.append(data)
+
+
 def unpublish(table):
     """
     Unpublishes a table which was previously published.
@@ -176,6 +227,24 @@ class TableHandler(web.RequestHandler):
         endpoint = _TABLES.get(table[0])
         if not endpoint:
             return
+        since = args.pop('since', None)
+        version = args.pop('version', None)
+        cursor = endpoint.cursor
+        if cursor is not None:
+            since = since[0] if since else '0'
+            if not since.isdecimal():
+                raise web.HTTPError(
+                    400, reason="The 'since' cursor must be a non-negative integer."
+                )
+            since = int(since)
+            # Cursors from another publication of the table or beyond
+            # the end of the data are invalid, so send the full table.
+            if (version and version[0] != endpoint.version) or since > cursor:
+                since = 0
+            self.set_header('X-Lumen-Version', endpoint.version)
+            self.set_header('X-Lumen-Since', str(since))
+            self.set_header('X-Lumen-Cursor', str(cursor))
+            args['since'] = since
         json = endpoint.query(**args)
         self.set_header('Content-Type', 'application/json')
         self.write(json)
@@ -1,5 +1,8 @@
+import contextvars
 import datetime as dt
 
+from concurrent import futures
+
 import numpy as np
 import pandas as pd
 import param
@@ -68,6 +71,11 @@ class AE5Source(Source):
         'resource_allocations'
     ]
 
+    # Tables derived from other tables and their inputs
+    _dependencies = {
+        'resource_allocations': ['resources', 'nodes', 'jobs', 'deployments', 'sessions']
+    }
+
     _units = {
         'm': 0.001,
         None: 1,
@@ -77,8 +85,15 @@ class AE5Source(Source):
         'Ti': 1024**4
     }
 
+    _unit_names = [u for u in _units if u is not None]
+
+    _unit_scales = np.array([s for u, s in _units.items() if u is not None] + [1])
+
+    _unit_regex = r'^\s*(?P<value>.*?)(?P<unit>{})?\s*$'.format('|'.join(_unit_names))
+
     def __init__(self, **params):
         super().__init__(**params)
+        self._derived = {}
         self._session = AEUserSession(
             self.hostname, self.username, self.password, persist=False,
             k8s_endpoint=self.k8s_endpoint
@@ -105,90 +120,90 @@ class AE5Source(Source):
         self._session.session.mount('http://', adapter)
 
     @classmethod
-    def _convert_value(cls, value):
-        if value == '0':
-            return 0
-        val_unit = [m for m in cls._units if m is not None and value.endswith(m)]
-        val_unit = val_unit[0] if val_unit else None
-        if not val_unit:
-            return float(value)
-        scale_factor = cls._units[val_unit]
-        return float(value[:-len(val_unit)]) * scale_factor
+    def _convert_values(cls, values):
+        """
+        Converts a column of Kubernetes quantities (e.g. '500m' or
+        '2Gi') to floats by extracting the numeric value and unit
+        and scaling by a lookup of the unit scale factors.
+        """
+        values = pd.Series(values)
+        parts = values.astype(str).str.extract(cls._unit_regex)
+        codes = pd.Categorical(parts['unit'], categories=cls._unit_names).codes
+        # Code -1 (no unit) indexes the trailing scale factor of 1
+        scales = cls._unit_scales[codes]
+        return pd.to_numeric(parts['value'], errors='coerce') * scales
 
     @property
     def _user(self):
         return state.headers.get('Anaconda-User') if self.private else None
 
-    def _process_deployment(self, deployment):
-        container_info = deployment.get('_k8s', {}).get('containers', {})
-        if 'app' not in container_info:
-            nan = float('NaN')
-            deployment['cpu'] = nan
-            deployment['memory'] = nan
-            deployment['restarts'] = nan
-            deployment['uptime'] = '-'
-            return deployment
-
-        container = container_info['app']
-        limits = container['limits']
-        usage = container['usage']
+    def _process_deployments(self, deployments):
+        containers = [
+            (k8s.get('containers') or {}).get('app', {}) if isinstance(k8s, dict) else {}
+            for k8s in deployments.get('_k8s', [None]*len(deployments))
+        ]
+        limits = [c.get('limits', {}) for c in containers]
+        usage = [c.get('usage', {}) for c in containers]
+        deployments = deployments.copy()
 
         # CPU Usage
-        cpu_cap = self._convert_value(limits['cpu'])
-        if 'cpu' in usage:
-            cpu = self._convert_value(usage['cpu'])
-            deployment['cpu'] = cpu
-            deployment['cpu_percent'] = round((cpu / cpu_cap)*100, 2)
-        else:
-            deployment['cpu_percent'] = float('nan')
-            deployment['cpu'] = float('nan')
+        cpu_cap = self._convert_values([lim.get('cpu') for lim in limits])
+        cpu = self._convert_values([u.get('cpu') for u in usage])
+        deployments['cpu'] = cpu.values
+        deployments['cpu_percent'] = ((cpu / cpu_cap)*100).round(2).values
 
         # Memory usage
-        mem_cap = self._convert_value(limits['memory'])
-        if 'memory' in usage:
-            mem = self._convert_value(usage['memory'])
-            deployment['memory'] = mem
-            deployment['memory_percent'] = round((mem / mem_cap)*100, 2)
-        else:
-            deployment['memory'] = float('nan')
-            deployment['memory_percent'] = float('nan')
+        mem_cap = self._convert_values([lim.get('memory') for lim in limits])
+        mem = self._convert_values([u.get('memory') for u in usage])
+        deployments['memory'] = mem.values
+        deployments['memory_percent'] = ((mem / mem_cap)*100).round(2).values
 
         # Uptime
-        started = container.get('since')
-        deployment["restarts"] = container['restarts']
-        if started:
-            started_dt = dt.datetime.fromisoformat(started.replace('Z', ''))
-            uptime = str(dt.datetime.now()-started_dt)
-            deployment["uptime"] = uptime[:uptime.index('.')]
-        else:
-            deployment["uptime"] = '-'
-
-        return deployment
+        deployments['restarts'] = pd.to_numeric(
+            pd.Series([c.get('restarts') for c in containers], dtype=object),
+            errors='coerce'
+        ).values
+        started = pd.to_datetime(
+            pd.Series([c.get('since') for c in containers], dtype=object).str.replace('Z', ''),
+            errors='coerce'
+        )
+        uptime = (dt.datetime.now() - started).dt.floor('s')
+        deployments['uptime'] = [
+            '-' if pd.isna(u) else str(u.to_pytimedelta()) for u in uptime
+        ]
+        return deployments
 
-    def _process_nodes(self, node):
+    def _process_nodes(self, nodes):
         caps = {
-            'cpu': self._convert_value(node['capacity/cpu']),
-            'gpu': self._convert_value(node['capacity/gpu']),
-            'mem': self._convert_value(node['capacity/mem']),
-            'pod': int(node['capacity/pod'])
+            'cpu': self._convert_values(nodes['capacity/cpu']).values,
+            'gpu': self._convert_values(nodes['capacity/gpu']).values,
+            'mem': self._convert_values(nodes['capacity/mem']).values,
+            'pod': nodes['capacity/pod'].astype(int).values
         }
-        for column in node.index:
+        nodes = nodes.copy()
+        percents = {}
+        for column in nodes.columns:
             if 'capacity' in column or '/' not in column:
                 continue
             vtype = column.split('/')[1]
             cap = caps[vtype]
-            value = node[column]
-            if vtype != 'pod':
-                value = self._convert_value(value)
-            node[column] = value
-            node[f'{column}_percent'] = 0 if cap == 0 else round((value/caps[vtype])*100, 2)
-        return node
+            if vtype == 'pod':
+                value = nodes[column].values
+            else:
+                value = self._convert_values(nodes[column]).values
+                nodes[column] = value
+            with np.errstate(divide='ignore', invalid='ignore'):
+                percent = np.round((value/cap)*100, 2)
+            percents[f'{column}_percent'] = np.where(cap == 0, 0, percent)
+        for column, percent in percents.items():
+            nodes[column] = percent
+        return nodes
 
     def _get_deployments(self):
         user = self._user
-        deployments = self._session.deployment_list(
+        deployments = self._process_deployments(self._session.deployment_list(
             k8s=True, format='dataframe', collaborators=bool(user)
-        ).apply(self._process_deployment, axis=1)
+        ))
         if user is None or self._is_admin:
             return deployments[self._deployment_columns]
         return deployments[
@@ -201,7 +216,7 @@ class AE5Source(Source):
         ][self._deployment_columns]
 
     def _get_nodes(self):
-        nodes = self._session.node_list(format='dataframe').apply(self._process_nodes, axis=1)
+        nodes = self._process_nodes(self._session.node_list(format='dataframe'))
         return nodes[[c for c in nodes.columns if not c.startswith('_')]]
 
     def _get_resources(self):
@@ -219,48 +234,34 @@ class AE5Source(Source):
             jobs = jobs[jobs.owner==self._user]
         return jobs[self._job_columns]
 
-    def _get_resource_allocations(self):
+    def _get_resource_allocations(self, resources, nodes, jobs, deployments, sessions):
         """
         Combines deployment resource profiles with resource information
         and node information to allow computing total and per node
         resource allocations.
         """
-        resources = self.get('resources').copy()  # Resource profiles
-        nodes = self.get('nodes').copy()  # Cluster nodes
-        jobs = self.get('jobs').copy()
-        deployments = self.get('deployments').copy()
-        sessions = self.get('sessions').copy()
-
-        # Pre-process the nodes, resources and jobs tables
-        nodes['capacity/gpu'] = nodes['capacity/gpu'].astype(float)
-        nodes['capacity/cpu'] = nodes['capacity/cpu'].astype(float)
-        nodes['capacity/mem'] = nodes['capacity/mem'].apply(self._convert_value)
-        nodes_cols = ['capacity/mem', 'capacity/cpu', 'capacity/gpu', 'name']
-        nodes = nodes[nodes_cols]
-        nodes = nodes.rename(columns={
-            'name': 'node',
-            'capacity/mem': 'node/mem',
-            'capacity/cpu': 'node/cpu',
-            'capacity/gpu': 'node/gpu',
+        # Pre-process the nodes and resources tables, selecting the
+        # required columns first so the cached inputs are not copied
+        nodes = pd.DataFrame({
+            'node/mem': self._convert_values(nodes['capacity/mem']).values,
+            'node/cpu': nodes['capacity/cpu'].astype(float).values,
+            'node/gpu': nodes['capacity/gpu'].astype(float).values,
+            'node': nodes['name'].values,
         })
-        resources['cpu'] = resources['cpu'].astype(float)
-        resources['gpu'] = resources['gpu'].astype(float)
-        resources['memory'] = resources['memory'].apply(self._convert_value)
-        resources = resources.set_index('name')
-        resources_cols = ['cpu', 'memory', 'gpu']
-        resources = resources[resources_cols]
-        resources = resources.rename(columns={'memory': 'mem'})
-        resources = resources.add_prefix('resource/')
-        # ae5tools doesn't yet return a note column for the jobs
-        jobs['node'] = np.nan
-
-        deployments['type'] = 'deployment'
-        jobs['type'] = 'job'
-        sessions['type'] = 'session'
+        resources = pd.DataFrame({
+            'resource/cpu': resources['cpu'].astype(float).values,
+            'resource/mem': self._convert_values(resources['memory']).values,
+            'resource/gpu': resources['gpu'].astype(float).values,
+        }, index=pd.Index(resources['name'].values, name='name'))
 
         # Concat the deployments, sessions and jobs in a single utilizations table
-        common_cols = ['id', 'name', 'url', 'owner', 'resource_profile', 'state', 'node', 'type']
-        utilizations = pd.concat([deployments[common_cols], sessions[common_cols], jobs[common_cols]])
+        common_cols = ['id', 'name', 'url', 'owner', 'resource_profile', 'state']
+        utilizations = pd.concat([
+            deployments[common_cols+['node']].assign(type='deployment'),
+            sessions[common_cols+['node']].assign(type='session'),
+            # ae5tools doesn't yet return a node column for the jobs
+            jobs[common_cols].assign(node=np.nan, type='job')
+        ])
         utilizations = pd.merge(utilizations, nodes, left_on='node', right_on='node', how='outer')
         # To remove the orchestring node that has no attached jobs, resources or deployments.
         utilizations = utilizations[~utilizations['id'].isna()]
@@ -273,10 +274,39 @@ class AE5Source(Source):
 
         return allocations[self._allocation_columns]
 
+    @classmethod
+    def _fingerprint(cls, df):
+        try:
+            return int(pd.util.hash_pandas_object(df).sum()), tuple(df.columns)
+        except TypeError:
+            # Unhashable values, fall back to the identity of the table
+            return id(df)
+
+    def _get_derived(self, table):
+        """
+        Fetches the input tables of a derived table concurrently and
+        only recomputes the derived table if one of the inputs changed.
+        """
+        inputs = self._dependencies[table]
+        with futures.ThreadPoolExecutor(len(inputs)) as executor:
+            tasks = {
+                name: executor.submit(contextvars.copy_context().run, self.get, name)
+                for name in inputs
+            }
+            tables = {name: task.result() for name, task in tasks.items()}
+        fingerprint = tuple(self._fingerprint(tables[name]) for name in inputs)
+        cached_fingerprint, derived = self._derived.get(table, (None, None))
+        if fingerprint != cached_fingerprint:
+            derived = getattr(self, f'_get_{table}')(**tables)
+            self._derived[table] = (fingerprint, derived)
+        return derived
+
     @cached(with_query=False)
     def get(self, table, **query):
         if table not in self._tables:
             raise ValueError(f"AE5Source has no '{table}' table, choose from {repr(self._tables)}.")
+        elif table in self._dependencies:
+            return self._get_derived(table)
         return getattr(self, f'_get_{table}')()
 
     @cached_schema
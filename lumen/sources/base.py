@@ -1,3 +1,4 @@
+import datetime as dt
 import hashlib
 import json
 import re
@@ -6,6 +7,7 @@ import sys
 import threading
 import weakref
 
+from collections import OrderedDict
 from concurrent import futures
 from functools import wraps
 from itertools import product
@@ -22,7 +24,7 @@ import requests
 from ..base import Component
 from ..filters import Filter
 from ..state import state
-from ..transforms import Filter as FilterTransform, Transform
+from ..transforms import Filter as FilterTransform, SQLFilter, Transform
 from ..util import get_dataframe_schema, is_ref, merge_schemas
 
 
@@ -56,6 +58,9 @@ def cached(with_query=True, locks=weakref.WeakKeyDictionary()):
                 else:
                     locks[self][table] = lock = threading.RLock()
             cache_query = query if with_query else {}
+            partition = self._partition_range(query) if with_query else None
+            if partition is not None:
+                return self._get_partitioned(method, lock, table, query, *partition)
             with lock:
                 df, no_query = self._get_cache(table, **cache_query)
             if df is None:
@@ -105,7 +110,9 @@ def cached_schema(method, locks=weakref.WeakKeyDictionary()):
                 else:
                     schema[missing] = method(self, missing)
             with main_lock:
-                self._set_schema_cache(schema)
+                # Merge with the latest cache in case other tables
+                # were loaded concurrently
+                self._set_schema_cache({**(self._get_schema_cache() or {}), **schema})
         return schema if table is None else schema[table]
     return wrapped
 
@@ -129,6 +136,17 @@ class Source(Component):
     root = param.ClassSelector(class_=Path, precedence=-1, doc="""
         Root folder of the cache_dir, default is config.root""")
 
+    time_partition = param.String(default=None, doc="""
+        Fixed frequency (e.g. '1D', '1H' or '15min') by which the rows
+        of queries filtering on a datetime range are partitioned and
+        cached. When the range changes only the partitions that have
+        not been fetched yet are queried, e.g. sliding a week long
+        window by a day fetches a single day of data.""")
+
+    max_partitions = param.Integer(default=1000, bounds=(1, None), doc="""
+        Maximum number of time partitions kept in the cache, the least
+        recently used partitions are evicted first.""")
+
     source_type = None
 
     # Declare whether source supports SQL transforms
@@ -209,6 +227,7 @@ class Source(Component):
         self.param.watch(self.clear_cache, self._reload_params)
         self._cache = {}
         self._schema_cache = {}
+        self._partitions = OrderedDict()
 
     def _get_key(self, table, **query):
         sha = hashlib.sha256()
@@ -309,12 +328,93 @@ class Source(Component):
                     f"Error during saving process: {e}"
                 )
 
+    def _partition_range(self, query):
+        """
+        Returns the column and (start, end) of the datetime range
+        filter in the query if its result can be assembled from
+        time partitions, otherwise returns None.
+        """
+        if not self.time_partition:
+            return None
+        if any(not isinstance(t, SQLFilter) for t in query.get('sql_transforms', [])):
+            return None
+        ranges = [
+            (col, val) for col, val in query.items() if isinstance(val, tuple)
+            and len(val) == 2 and all(isinstance(v, dt.date) for v in val)
+        ]
+        if len(ranges) != 1:
+            return None
+        col, (start, end) = ranges[0]
+        if isinstance(start, dt.date) and not isinstance(start, dt.datetime):
+            start = dt.datetime(*start.timetuple()[:3], 0, 0, 0)
+        if isinstance(end, dt.date) and not isinstance(end, dt.datetime):
+            end = dt.datetime(*end.timetuple()[:3], 23, 59, 59)
+        return col, pd.Timestamp(start), pd.Timestamp(end)
+
+    def _get_partitioned(self, method, lock, table, query, col, start, end):
+        """
+        Assembles the result of a datetime range query from the cached
+        time partitions, querying only the contiguous runs of
+        partitions which have not been fetched yet.
+        """
+        freq = self.time_partition
+        rest = {k: v for k, v in query.items() if k != col}
+        key = (col, freq, self._get_key(table, **rest))
+        buckets = pd.date_range(start.floor(freq), end.floor(freq), freq=freq)
+        with lock:
+            partitions = self._partitions
+            cached = {b: partitions[(key, b)] for b in buckets if (key, b) in partitions}
+        missing = [b for b in buckets if b not in cached]
+        runs = []
+        for bucket in missing:
+            if runs and bucket - runs[-1][-1] == pd.Timedelta(freq):
+                runs[-1].append(bucket)
+            else:
+                runs.append([bucket])
+        for run in runs:
+            run_end = run[-1] + pd.Timedelta(freq)
+            df = method(self, table, **dict(rest, **{col: (run[0], run_end)}))
+            if hasattr(df, 'compute'):
+                df = df.compute()
+            if col not in df.columns:
+                # The source ignores the range so it cannot be partitioned
+                return df.reset_index(drop=True)
+            elif df.empty:
+                cached.update({bucket: df for bucket in run})
+                continue
+            # The buckets are wall times in the timezone of the column
+            values = pd.to_datetime(df[col])
+            if values.dt.tz is not None:
+                values = values.dt.tz_localize(None)
+            # Rows at the end of the run belong to the next partition
+            codes = values.dt.floor(freq)
+            groups = dict(iter(df.groupby(codes.values, sort=False)))
+            for bucket in run:
+                cached[bucket] = groups.get(bucket, df.iloc[:0])
+        frames = [cached[b] for b in buckets]
+        with lock:
+            for bucket, frame in zip(buckets, frames):
+                partitions[(key, bucket)] = frame
+                partitions.move_to_end((key, bucket))
+            while len(partitions) > self.max_partitions:
+                partitions.popitem(last=False)
+        df = pd.concat(frames, ignore_index=True)
+        if df.empty:
+            return df
+        column = pd.to_datetime(df[col])
+        if column.dt.tz is not None:
+            start = start.tz_localize(column.dt.tz)
+            end = end.tz_localize(column.dt.tz)
+        mask = FilterTransform._range_filter(column, start, end)
+        return df[mask.values].reset_index(drop=True)
+
     def clear_cache(self, *events):
         """
         Clears any cached data.
         """
         self._cache = {}
         self._schema_cache = {}
+        self._partitions = OrderedDict()
         if self.cache_dir:
             path = self.root / self.cache_dir
             if path.is_dir():
@@ -387,10 +487,24 @@ class RESTSource(Source):
     REST API specification.
     """
 
+    incremental = param.Boolean(default=False, doc="""
+        Whether to poll append-only tables incrementally, i.e. only
+        request the rows published since the last request and append
+        them to the previously fetched data. Queries are then applied
+        to the accumulated table locally.""")
+
     url = param.String(doc="URL of the REST endpoint to monitor.")
 
     source_type = 'rest'
 
+    def __init__(self, **params):
+        super().__init__(**params)
+        self._increments = {}
+        self.param.watch(self._reset_increments, ['url', 'incremental'])
+
+    def _reset_increments(self, *events):
+        self._increments = {}
+
     @cached_schema
     def get_schema(self, table=None):
         query = {} if table is None else {'table': table}
@@ -398,8 +512,30 @@ class RESTSource(Source):
         return {table: schema['items']['properties'] for table, schema in
                 response.json().items()}
 
+    def _get_incremental(self, table):
+        df, version, cursor = self._increments.get(table, (None, None, None))
+        query = {'table': table}
+        if df is not None and cursor is not None:
+            query.update(since=cursor, version=version)
+        r = requests.get(self.url+'/data', params=query)
+        new = pd.DataFrame(r.json())
+        cursor = r.headers.get('X-Lumen-Cursor')
+        since = int(r.headers.get('X-Lumen-Since', 0))
+        if df is None or not since:
+            df = new
+        elif len(new):
+            df = pd.concat([df, new], ignore_index=True)
+        self._increments[table] = (
+            df, r.headers.get('X-Lumen-Version'),
+            None if cursor is None else int(cursor)
+        )
+        return df
+
     @cached()
     def get(self, table, **query):
+        if self.incremental:
+            df = self._get_incremental(table)
+            return FilterTransform.apply_to(df, conditions=list(query.items()))
         query = dict(table=table, **query)
         r = requests.get(self.url+'/data', params=query)
         df = pd.DataFrame(r.json())
@@ -624,9 +760,17 @@ class JSONSource(FileSource):
 
 class WebsiteSource(Source):
     """
-    Queries whether a website responds with a 400 status code.
+    Queries whether a website responds with a 200 status code. URLs
+    are probed concurrently, first with a HEAD request and falling
+    back to a GET request if the server does not support HEAD.
     """
 
+    max_workers = param.Integer(default=20, bounds=(1, None), doc="""
+        Maximum number of URLs to probe concurrently.""")
+
+    timeout = param.Number(default=5, bounds=(0, None), doc="""
+        Timeout in seconds to wait for each website to respond.""")
+
     urls = param.List(doc="URLs of the websites to monitor.")
 
     source_type = 'live'
@@ -636,7 +780,8 @@ class WebsiteSource(Source):
         schema = {
             "status": {
                 "url": {"type": "string", 'enum': self.urls},
-                "live": {"type": "boolean"}
+                "live": {"type": "boolean"},
+                "latency": {"type": "number"}
             }
         }
         return schema if table is None else schema[table]
@@ -644,30 +789,91 @@ class WebsiteSource(Source):
     def get_tables(self):
         return ['status']
 
+    def _probe(self, url):
+        r = requests.head(url, timeout=self.timeout, allow_redirects=True)
+        if r.status_code in (405, 501):
+            r = requests.get(url, timeout=self.timeout, stream=True)
+            r.close()
+        return r.status_code == 200, r.elapsed.total_seconds()
+
     @cached(with_query=False)
     def get(self, table, **query):
-        data = []
-        for url in self.urls:
-            try:
-                r = requests.get(url)
-                live = r.status_code == 200
-            except Exception:
-                live = False
-            data.append({"live": live, "url": url})
-        df = pd.DataFrame(data)
-        return df
+        results = {}
+        if self.urls:
+            workers = min(len(self.urls), self.max_workers)
+            with futures.ThreadPoolExecutor(workers) as executor:
+                tasks = {executor.submit(self._probe, url): url for url in self.urls}
+                for future in futures.as_completed(tasks):
+                    try:
+                        results[tasks[future]] = future.result()
+                    except Exception:
+                        results[tasks[future]] = (False, float('NaN'))
+        data = [
+            {"live": results[url][0], "url": url, "latency": results[url][1]}
+            for url in self.urls
+        ]
+        return pd.DataFrame(data, columns=['live', 'url', 'latency'])
 
 
 class PanelSessionSource(Source):
+    """
+    Collects session information from the session_info REST endpoint
+    of one or more Panel servers. The collector is long-lived, it
+    polls the servers concurrently using a pooled HTTP session, uses
+    conditional requests to skip unchanged payloads and only
+    processes new or changed sessions.
+    """
 
     endpoint = param.String(default="rest/session_info")
 
+    max_workers = param.Integer(default=10, bounds=(1, None), doc="""
+        Maximum number of servers to query concurrently.""")
+
     urls = param.List(doc="URL of the websites to monitor.")
 
     timeout = param.Parameter(default=5)
 
     source_type = 'session_info'
 
+    _session_columns = [
+        'url', 'id', 'started', 'ended', 'rendered', 'render_duration',
+        'session_duration', 'user_agent'
+    ]
+
+    def __init__(self, **params):
+        super().__init__(**params)
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        self._session.verify = False
+        self._shutdown = None
+        self._update_workers()
+        self._reset_collector()
+        self.param.watch(self._reset_collector, ['endpoint', 'urls'])
+        self.param.watch(self._update_workers, 'max_workers')
+
+    def _update_workers(self, *events):
+        """
+        Creates the executor and HTTP connection pool sized by the
+        max_workers, shutting down the previous executor. The executor
+        is also shut down when the source is garbage collected.
+        """
+        if self._shutdown is not None:
+            self._shutdown()
+        self._executor = futures.ThreadPoolExecutor(self.max_workers)
+        self._shutdown = weakref.finalize(self, self._executor.shutdown, wait=False)
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.max_workers)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+
+    def _reset_collector(self, *events):
+        self._stale = True
+        # Per URL state consisting of the ETag and raw session payload
+        self._payloads = {}
+        self._summary = {}
+        self._sessions = pd.DataFrame(
+            columns=self._session_columns
+        ).set_index(['url', 'id'])
+
     @cached_schema
     def get_schema(self, table=None):
         schema = {
@@ -694,61 +900,110 @@ class PanelSessionSource(Source):
     def get_tables(self):
         return ['summary', 'sessions']
 
-    def _get_session_info(self, table, url):
-        r = requests.get(
-            url + self.endpoint, verify=False, timeout=self.timeout
+    def _get_session_info(self, url, etag=None):
+        headers = {'If-None-Match': etag} if etag else {}
+        r = self._session.get(
+            url + self.endpoint, timeout=self.timeout, headers=headers
         )
-        data = []
-        if r.status_code != 200:
-            return data
-        r = r.json()
-        session_info = r['session_info']
-        sessions = session_info['sessions']
-
-        if table == "summary":
-            rendered = [s for s in sessions.values()
-                        if s['rendered'] is not None]
-            ended = [s for s in sessions.values()
-                     if s['ended'] is not None]
-            row = {
-                'url': url,
-                'total': session_info['total'],
-                'live': session_info['live'],
-                'render_duration': np.mean([s['rendered']-s['started']
-                                            for s in rendered]),
-                'session_duration': np.mean([s['ended']-s['started']
-                                             for s in ended])
-            }
-            data.append(row)
-        elif table == "sessions":
-            for sid, session in sessions.items():
-                row = dict(url=url, id=sid, **session)
-                if session["rendered"]:
-                    row["render_duration"] = session["rendered"]-session["started"]
-                else:
-                    row["render_duration"] = float('NaN')
-                if session["ended"]:
-                    row["session_duration"] = session["ended"]-session["started"]
-                else:
-                    row["session_duration"] = float('NaN')
-                data.push(row)
-        return data
+        if r.status_code == 304:
+            return None
+        elif r.status_code != 200:
+            return {}
+        return r.headers.get('ETag'), r.json()['session_info']
+
+    @classmethod
+    def _session_row(cls, url, sid, session):
+        row = dict(session, url=url, id=sid)
+        if session["rendered"]:
+            row["render_duration"] = session["rendered"]-session["started"]
+        else:
+            row["render_duration"] = float('NaN')
+        if session["ended"]:
+            row["session_duration"] = session["ended"]-session["started"]
+        else:
+            row["session_duration"] = float('NaN')
+        return row
+
+    @classmethod
+    def _summary_row(cls, url, session_info):
+        sessions = session_info['sessions'].values()
+        rendered = [s for s in sessions if s['rendered'] is not None]
+        ended = [s for s in sessions if s['ended'] is not None]
+        return {
+            'url': url,
+            'total': session_info['total'],
+            'live': session_info['live'],
+            'render_duration': np.mean([s['rendered']-s['started']
+                                        for s in rendered]),
+            'session_duration': np.mean([s['ended']-s['started']
+                                         for s in ended])
+        }
+
+    def _merge_sessions(self, url, old_sessions, new_sessions):
+        """
+        Merges only the new or changed sessions of a server into the
+        sessions table indexed by (url, id).
+        """
+        changed = [
+            self._session_row(url, sid, session)
+            for sid, session in new_sessions.items()
+            if old_sessions.get(sid) != session
+        ]
+        removed = [(url, sid) for sid in old_sessions if sid not in new_sessions]
+        if not changed and not removed:
+            return
+        drop = removed + [(url, row['id']) for row in changed]
+        sessions = self._sessions.drop(drop, errors='ignore')
+        if changed:
+            new = pd.DataFrame(changed, columns=self._session_columns)
+            sessions = pd.concat([sessions, new.set_index(['url', 'id'])])
+        self._sessions = sessions
+
+    def _collect(self):
+        executor = self._executor
+        tasks = {
+            executor.submit(
+                self._get_session_info, url, self._payloads.get(url, (None,))[0]
+            ): url for url in self.urls
+        }
+        for future in futures.as_completed(tasks):
+            url = tasks[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                exception = f"{type(e).__name__}({e})"
+                self.param.warning("Failed to fetch session_info from "
+                                   f"{url + self.endpoint}, errored with {exception}.")
+                result = {}
+            if result is None:
+                continue
+            old_sessions = self._payloads.pop(url, (None, {'sessions': {}}))[1]['sessions']
+            if result:
+                etag, session_info = result
+                self._payloads[url] = (etag, session_info)
+                self._summary[url] = self._summary_row(url, session_info)
+                new_sessions = session_info['sessions']
+            else:
+                self._summary.pop(url, None)
+                new_sessions = {}
+            self._merge_sessions(url, old_sessions, new_sessions)
+        self._stale = False
+
+    def clear_cache(self, *events):
+        super().clear_cache(*events)
+        # Tables are refreshed from a single collection pass
+        self._stale = True
 
     @cached(with_query=False)
     def get(self, table, **query):
-        data = []
-        with futures.ThreadPoolExecutor(len(self.urls)) as executor:
-            tasks = {executor.submit(self._get_session_info, table, url): url
-                     for url in self.urls}
-            for future in futures.as_completed(tasks):
-                url = tasks[future] + self.endpoint
-                try:
-                    data.extend(future.result())
-                except Exception as e:
-                    exception = f"{type(e).__name__}({e})"
-                    self.param.warning("Failed to fetch session_info from "
-                                       f"{url}, errored with {exception}.")
-        return pd.DataFrame(data, columns=list(self.get_schema(table)))
+        with self._lock:
+            if self._stale:
+                self._collect()
+            if table == 'summary':
+                data = [self._summary[url] for url in self.urls if url in self._summary]
+                return pd.DataFrame(data, columns=list(self.get_schema(table)))
+            sessions = self._sessions.reset_index()
+        return sessions[self._session_columns].reset_index(drop=True)
 
 
 class JoinedSource(Source):
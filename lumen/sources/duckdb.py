@@ -0,0 +1,153 @@
+import re
+
+import param
+
+from ..transforms.sql import (
+    SQLDistinctUnion, SQLFilter, SQLLimit, SQLMinMax, compose_sql_params,
+)
+from ..util import get_dataframe_schema
+from .base import Source, cached, cached_schema
+
+
+class DuckDBSource(Source):
+    """
+    DuckDBSource registers local CSV, Parquet and JSON files (or globs
+    matching multiple files) as views in an in-process DuckDB database.
+    Filters and SQLTransforms are evaluated by DuckDB, making it
+    possible to aggregate large local datasets without loading them
+    into memory.
+    """
+
+    tables = param.ClassSelector(class_=(list, dict), doc="""
+        List or dictionary of tables to register. If a list is supplied
+        the names are computed from the filenames, otherwise the keys
+        are the names. The values must be filepaths or globs, e.g.:
+
+            {
+              'local' : '/home/user/local_file.parquet',
+              'daily' : '/home/user/daily/*.csv'
+            }
+
+        If no tables are declared the tables in the database are used.""")
+
+    threads = param.Integer(default=None, bounds=(1, None), doc="""
+        Number of threads used to execute queries. Defaults to the
+        number of cores.""")
+
+    uri = param.String(default=':memory:', doc="""
+        Path to a DuckDB database file or ':memory:' for an in-memory
+        database.""")
+
+    source_type = 'duckdb'
+
+    # Declare this source supports SQL transforms
+    _supports_sql = True
+
+    _readers = {
+        'csv': 'read_csv_auto',
+        'json': 'read_json_auto',
+        'parq': 'read_parquet',
+        'parquet': 'read_parquet',
+    }
+
+    def __init__(self, **params):
+        import duckdb
+        super().__init__(**params)
+        config = {} if self.threads is None else {'threads': self.threads}
+        self._connection = duckdb.connect(self.uri, config=config)
+        self._register_tables()
+        self.param.watch(self._register_tables, 'tables')
+
+    @property
+    def _named_files(self):
+        if isinstance(self.tables, list):
+            return {
+                re.sub(r'\W', '_', '.'.join(f.split('/')[-1].split('.')[:-1])): f
+                for f in self.tables
+            }
+        return dict(self.tables or {})
+
+    def _register_tables(self, *events):
+        for name, path in self._named_files.items():
+            ext = re.search(r"\.(\w+)$", path)
+            ext = ext.group(1) if ext else None
+            if ext not in self._readers:
+                raise ValueError(
+                    f"File type '{ext}' of table '{name}' not recognized and "
+                    f"cannot be loaded. Supported file types include: "
+                    f"{list(self._readers)}."
+                )
+            if '://' not in path:
+                path = str(self.root / path)
+            path = path.replace("'", "''")
+            self._connection.execute(
+                f'CREATE OR REPLACE VIEW "{name}" AS '
+                f"SELECT * FROM {self._readers[ext]}('{path}')"
+            )
+
+    def _execute(self, sql_expr, sql_transforms):
+        """
+        Executes the SQL transforms on the query, binding the values
+        embedded in the query as positional parameters.
+        """
+        sql_expr, params = compose_sql_params(sql_expr, sql_transforms, dialect='duckdb')
+        values = []
+
+        def bind(match):
+            values.append(params[match.group(1)])
+            return '?'
+
+        sql_expr = re.sub(r':(lumen_param_\d+)', bind, sql_expr)
+        # Cursors are independent connections to the same database
+        # which allows querying from multiple threads
+        cursor = self._connection.cursor()
+        try:
+            return cursor.execute(sql_expr, values).df()
+        finally:
+            cursor.close()
+
+    def _table_sql(self, table):
+        table = table.replace('"', '""')
+        return f'SELECT * FROM "{table}"'
+
+    def get_tables(self):
+        if self.tables:
+            return list(self._named_files)
+        return list(self._execute('SELECT * FROM information_schema.tables', [
+            SQLFilter(conditions=[('table_schema', 'main')])
+        ])['table_name'])
+
+    @cached_schema
+    def get_schema(self, table=None):
+        data = self._execute(self._table_sql(table), [SQLLimit(limit=1)])
+        schema = get_dataframe_schema(data)['items']['properties']
+        enums, min_maxes = [], []
+        for name, col_schema in schema.items():
+            if 'enum' in col_schema:
+                enums.append(name)
+            elif 'inclusiveMinimum' in col_schema:
+                min_maxes.append(name)
+        if enums:
+            distinct = self._execute(
+                self._table_sql(table), [SQLDistinctUnion(columns=enums, limit=1000)]
+            )
+            for i, col in enumerate(enums):
+                schema[col]['enum'] = distinct[col][distinct['__column'] == i].to_list()
+        if min_maxes:
+            minmax_data = self._execute(
+                self._table_sql(table), [SQLMinMax(columns=min_maxes)]
+            )
+            for col in min_maxes:
+                schema[col]['inclusiveMinimum'] = minmax_data[f'{col}_min'].iloc[0]
+                schema[col]['inclusiveMaximum'] = minmax_data[f'{col}_max'].iloc[0]
+        return schema
+
+    get_schema.__doc__ = Source.get_schema.__doc__
+
+    @cached()
+    def get(self, table, **query):
+        query.pop('__dask', None)
+        sql_transforms = query.pop('sql_transforms', [])
+        conditions = list(query.items())
+        sql_transforms = [SQLFilter(conditions=conditions)] + sql_transforms
+        return self._execute(self._table_sql(table), sql_transforms)
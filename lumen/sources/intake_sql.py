@@ -1,28 +1,266 @@
+import pathlib
+import re
+import shutil
+import tempfile
+import threading
+import weakref
+
+from concurrent import futures
+
+import pandas as pd
 import param
 
 from ..transforms.base import Filter
 from ..transforms.sql import (
-    SQLDistinct, SQLFilter, SQLLimit, SQLMinMax,
+    SQLDistinctUnion, SQLFilter, SQLLimit, SQLMinMax, _with_dialect,
+    compose_sql, compose_sql_params,
 )
 from ..util import get_dataframe_schema
-from .base import cached, cached_schema
+from .base import Source, cached, cached_schema
 from .intake import IntakeBaseSource, IntakeSource
 
+# Pooled SQLAlchemy engines shared across sources and sessions
+_ENGINES = {}
+
+_ENGINE_LOCK = threading.Lock()
+
+
+# Matches the named bind parameters recognized by sqlalchemy.text
+_BIND_PARAM = re.compile(r'(?<![:\w\\]):(\w+)(?!:)')
+
+
+def _escape_colons(sql_expr, params):
+    """
+    Escapes colons which sqlalchemy.text would otherwise parse as bind
+    parameters (e.g. in time literals or user supplied expressions),
+    leaving only the placeholders of the supplied params.
+    """
+    return _BIND_PARAM.sub(
+        lambda m: m.group(0) if m.group(1) in params else '\\' + m.group(0),
+        sql_expr
+    )
+
+
+def _remove_dirs(dirs):
+    while dirs:
+        shutil.rmtree(dirs.pop(), ignore_errors=True)
+
 
 class IntakeBaseSQLSource(IntakeBaseSource):
 
     filter_in_sql = param.Boolean(default=True, doc="")
 
+    flatten_sql = param.Boolean(default=True, doc="""
+        Whether to merge the SQL transforms into flat SELECT statements
+        where possible instead of nesting a subquery per transform.""")
+
+    max_workers = param.Integer(default=4, bounds=(1, None), doc="""
+        Maximum number of tables to load the schema for concurrently.""")
+
+    pool_size = param.Integer(default=5, bounds=(1, None), doc="""
+        Number of connections to keep open in the connection pool
+        shared by all queries against the same database.""")
+
+    pool_timeout = param.Number(default=30, bounds=(0, None), doc="""
+        Number of seconds to wait for a connection from the pool.""")
+
+    query_timeout = param.Number(default=None, bounds=(0, None), doc="""
+        Number of seconds after which a query is cancelled. Only
+        supported by drivers which support cancelling queries,
+        e.g. sqlite3 and psycopg2.""")
+
+    max_rows = param.Integer(default=None, bounds=(0, None), doc="""
+        Maximum number of rows of a query result to load into memory.
+        When set the result is fetched in chunks.""")
+
+    max_bytes = param.Integer(default=None, bounds=(0, None), doc="""
+        Maximum number of bytes of a query result to load into memory.
+        When set the result is fetched in chunks.""")
+
+    chunksize = param.Integer(default=10000, bounds=(1, None), doc="""
+        Number of rows to fetch per chunk if max_rows or max_bytes
+        is set.""")
+
+    on_limit = param.Selector(default='truncate', objects=['truncate', 'spill'], doc="""
+        Whether to truncate a query result exceeding max_rows or
+        max_bytes or to spill it to temporary parquet files, which
+        are loaded lazily as a dask DataFrame. Spilling requires
+        dask=True, otherwise the result is truncated.""")
+
     # Declare this source supports SQL transforms
     _supports_sql = True
 
+    def __init__(self, **params):
+        super().__init__(**params)
+        self._spill_dirs = []
+        weakref.finalize(self, _remove_dirs, self._spill_dirs)
+
+    def clear_cache(self, *events):
+        super().clear_cache(*events)
+        _remove_dirs(self._spill_dirs)
+
     def _apply_transforms(self, source, sql_transforms):
         if not sql_transforms:
             return source
+        sql_expr = self._render_sql(source, sql_transforms)
+        return type(source)(**dict(source._init_args, sql_expr=sql_expr))
+
+    def _render_sql(self, source, sql_transforms):
         sql_expr = source._sql_expr
+        if self.flatten_sql:
+            return compose_sql(sql_expr, sql_transforms)
         for sql_transform in sql_transforms:
             sql_expr = sql_transform.apply(sql_expr)
-        return type(source)(**dict(source._init_args, sql_expr=sql_expr))
+        return sql_expr
+
+    def _render_sql_params(self, source, sql_transforms, dialect=None):
+        """
+        Renders the query along with the values of the bind parameters
+        it references, so the query text only depends on the structure
+        of the transforms and not on the filtered values.
+        """
+        sql_expr, params = source._sql_expr, {}
+        if self.flatten_sql:
+            return compose_sql_params(sql_expr, sql_transforms, dialect=dialect)
+        for sql_transform in _with_dialect(sql_transforms, dialect):
+            sql_expr, params = sql_transform.apply_params(sql_expr, params)
+        return sql_expr, params
+
+    def _get_engine(self, source):
+        """
+        Returns a pooled SQLAlchemy engine shared by all queries (and
+        sessions) against the URI of the source or None if the source
+        is not a plain intake-sql SQLSource.
+        """
+        try:
+            from intake_sql import SQLSource
+        except Exception:
+            return None
+        if (type(source) is not SQLSource or not isinstance(source._uri, str)
+            or source._sql_kwargs.get('schema')):
+            return None
+        key = (source._uri, self.pool_size, self.pool_timeout)
+        with _ENGINE_LOCK:
+            if key not in _ENGINES:
+                import sqlalchemy as sa
+                try:
+                    engine = sa.create_engine(
+                        source._uri, pool_size=self.pool_size,
+                        pool_timeout=self.pool_timeout, pool_pre_ping=True
+                    )
+                except TypeError:
+                    # Dialects using a NullPool (e.g. file based SQLite)
+                    engine = sa.create_engine(source._uri)
+                _ENGINES[key] = engine
+            return _ENGINES[key]
+
+    def _execute(self, engine, sql_expr, sql_kwargs, params=None, dask=True, capped=True):
+        """
+        Executes the query on a pooled connection, cancelling it if it
+        exceeds the query_timeout and the driver supports cancellation.
+        Unless the query is exempt from the max_rows and max_bytes caps
+        the result is streamed in chunks using a server side cursor.
+        """
+        capped = capped and (self.max_rows is not None or self.max_bytes is not None)
+        with engine.connect() as conn:
+            dbapi_conn = conn.connection.dbapi_connection
+            cancel = getattr(dbapi_conn, 'cancel', getattr(dbapi_conn, 'interrupt', None))
+            timer = None
+            if self.query_timeout and cancel is not None:
+                timer = threading.Timer(self.query_timeout, cancel)
+                timer.start()
+            if params:
+                import sqlalchemy as sa
+                sql_expr = sa.text(_escape_colons(sql_expr, params))
+                sql_kwargs = dict(sql_kwargs, params=params)
+            try:
+                if not capped:
+                    return pd.read_sql(sql_expr, conn, **sql_kwargs)
+                # Without a server side cursor drivers such as psycopg2
+                # buffer the whole result before the first chunk
+                chunks = pd.read_sql(
+                    sql_expr, conn.execution_options(stream_results=True),
+                    chunksize=self.chunksize, **sql_kwargs
+                )
+                return self._fetch_chunks(chunks, dask)
+            except Exception as e:
+                if timer is not None and not timer.is_alive():
+                    raise TimeoutError(
+                        f'Query exceeded the query_timeout of {self.query_timeout} seconds.'
+                    ) from e
+                raise e
+            finally:
+                if timer is not None:
+                    timer.cancel()
+
+    def _fetch_chunks(self, chunks, dask=True):
+        """
+        Concatenates the chunks of a query result until the max_rows
+        or max_bytes limit is reached and then either truncates the
+        result or spills it to parquet files read back using dask.
+        """
+        fetched, rows, nbytes = [], 0, 0
+        spill_dir = dtypes = None
+        for i, chunk in enumerate(chunks):
+            if spill_dir is not None:
+                chunk = chunk.astype(dtypes, errors='ignore')
+                chunk.to_parquet(spill_dir / f'part.{i}.parquet', index=False)
+                continue
+            chunk_bytes = int(chunk.memory_usage(index=True, deep=True).sum())
+            limit = len(chunk)
+            if self.max_rows is not None:
+                limit = min(limit, self.max_rows - rows)
+            if self.max_bytes is not None and chunk_bytes:
+                row_bytes = chunk_bytes / len(chunk)
+                limit = min(limit, int((self.max_bytes - nbytes) // row_bytes))
+            if limit >= len(chunk):
+                fetched.append(chunk)
+                rows, nbytes = rows + len(chunk), nbytes + chunk_bytes
+                continue
+            if self.on_limit == 'truncate' or not dask:
+                fetched.append(chunk.iloc[:max(limit, 0)])
+                self.param.warning(
+                    'Query result exceeded the max_rows or max_bytes limit '
+                    f'and was truncated to {rows+max(limit, 0)} rows.'
+                )
+                break
+            spill_dir = pathlib.Path(tempfile.mkdtemp(prefix='lumen_'))
+            self._spill_dirs.append(spill_dir)
+            # All parts must share the dtypes of the first part
+            dtypes = (fetched+[chunk])[0].dtypes.to_dict()
+            for j, spilled in enumerate(fetched+[chunk]):
+                spilled = spilled.astype(dtypes, errors='ignore')
+                spilled.to_parquet(spill_dir / f'part.{j}.parquet', index=False)
+            self.param.warning(
+                'Query result exceeded the max_rows or max_bytes limit '
+                f'and was spilled to {spill_dir}.'
+            )
+        if spill_dir is not None:
+            import dask.dataframe as dd
+            return dd.read_parquet(str(spill_dir))
+        if not fetched:
+            return pd.DataFrame()
+        return pd.concat(fetched, ignore_index=True)
+
+    def _read_sql(self, source, sql_transforms, dask=True, capped=True):
+        """
+        Applies the SQL transforms to the source and executes the
+        query, reusing a pooled engine where possible. Queries which
+        are not capped are exempt from the max_rows and max_bytes
+        limits.
+        """
+        engine = self._get_engine(source)
+        if engine is None:
+            df = self._read(self._apply_transforms(source, sql_transforms), dask)
+            return df if dask or not hasattr(df, 'compute') else df.compute()
+        sql_expr, params = self._render_sql_params(
+            source, sql_transforms, engine.dialect.name
+        )
+        df = self._execute(engine, sql_expr, source._sql_kwargs, params, dask, capped)
+        if dask and not hasattr(df, 'compute'):
+            import dask.dataframe as dd
+            df = dd.from_pandas(df, npartitions=1)
+        return df
 
     def _get_source(self, table):
         try:
@@ -52,53 +290,59 @@ class IntakeBaseSQLSource(IntakeBaseSource):
         conditions = list(query.items())
         if self.filter_in_sql:
             sql_transforms = [SQLFilter(conditions=conditions)] + sql_transforms
-        source = self._apply_transforms(source, sql_transforms)
-        df = self._read(source)
+        df = self._read_sql(source, sql_transforms, dask)
         if not self.filter_in_sql:
             df = Filter.apply_to(df, conditions=conditions)
-        return df if dask or not hasattr(df, 'compute') else df.compute()
+        return df
 
-    @cached_schema
     def get_schema(self, table=None):
-        if table is None:
-            tables = self.get_tables()
-        else:
-            tables = [table]
-
-        schemas = {}
-        limit = SQLLimit(limit=1)
-        for entry in tables:
-            if not self.load_schema:
-                schemas[entry] = {}
-                continue
-            source = self._get_source(entry)
-            if not hasattr(source, '_sql_expr'):
-                schemas[entry] = super().get_schema(table)
-                continue
-            data = self._read(self._apply_transforms(source, [limit]))
-            schema = get_dataframe_schema(data)['items']['properties']
-            enums, min_maxes = [], []
-            for name, col_schema in schema.items():
-                if 'enum' in col_schema:
-                    enums.append(name)
-                elif 'inclusiveMinimum' in col_schema:
-                    min_maxes.append(name)
-            for col in enums:
-                distinct_transforms = [
-                    SQLDistinct(columns=[col]), SQLLimit(limit=1000)
-                ]
-                distinct = self._read(
-                    self._apply_transforms(source, distinct_transforms)
-                )
-                schema[col]['enum'] = distinct[col].to_list()
-            minmax_data = self._read(
-                self._apply_transforms(source, [SQLMinMax(columns=min_maxes)])
+        if table is not None:
+            return self._get_table_schema(table)
+        tables = self.get_tables()
+        if not tables:
+            return {}
+        with futures.ThreadPoolExecutor(min(len(tables), self.max_workers)) as executor:
+            return dict(zip(tables, executor.map(self._get_table_schema, tables)))
+
+    get_schema.__doc__ = Source.get_schema.__doc__
+
+    @cached_schema
+    def _get_table_schema(self, table):
+        if not self.load_schema:
+            return {}
+        source = self._get_source(table)
+        if not hasattr(source, '_sql_expr'):
+            return super().get_schema(table)
+        data = self._read_sql(source, [SQLLimit(limit=1)], dask=False, capped=False)
+        schema = get_dataframe_schema(data)['items']['properties']
+        enums, min_maxes = [], []
+        for name, col_schema in schema.items():
+            if 'enum' in col_schema:
+                enums.append(name)
+            elif 'inclusiveMinimum' in col_schema:
+                min_maxes.append(name)
+
+        # The statistics are reused until the cache is cleared, there is
+        # no version of a table which is cheap to query on all databases
+        stats = {}
+        if enums:
+            distinct = self._read_sql(
+                source, [SQLDistinctUnion(columns=enums, limit=1000)], dask=False,
+                capped=False
+            )
+            for i, col in enumerate(enums):
+                stats[col] = {'enum': distinct[col][distinct['__column'] == i].to_list()}
+        if min_maxes:
+            minmax_data = self._read_sql(
+                source, [SQLMinMax(columns=min_maxes)], dask=False, capped=False
             )
             for col in min_maxes:
-                schema[col]['inclusiveMinimum'] = minmax_data[f'{col}_min'].iloc[0]
-                schema[col]['inclusiveMaximum'] = minmax_data[f'{col}_max'].iloc[0]
-            schemas[entry] = schema
-        return schemas if table is None else schemas[table]
+                stats[col] = {
+                    'inclusiveMinimum': minmax_data[f'{col}_min'].iloc[0],
+                    'inclusiveMaximum': minmax_data[f'{col}_max'].iloc[0]
+                }
+        return {col: dict(col_schema, **stats.get(col, {}))
+                for col, col_schema in schema.items()}
 
 
 class IntakeSQLSource(IntakeBaseSQLSource, IntakeSource):
@@ -1,9 +1,11 @@
 import datetime as dt
+import re
 import urllib.parse as urlparse
 
 from collections import defaultdict
 from concurrent import futures
 
+import numpy as np
 import pandas as pd
 import panel as pn
 import param
@@ -55,48 +57,67 @@ class PrometheusSource(Source):
 
     source_type = 'prometheus'
 
-    _memory_usage_query = """sum by(container_name)
+    batch_size = param.Integer(default=50, bounds=(1, None), doc="""
+        Maximum number of pods to combine into a single PromQL query.""")
+
+    max_workers = param.Integer(default=10, bounds=(1, None), doc="""
+        Maximum number of PromQL queries to execute concurrently.""")
+
+    _memory_usage_query = """sum by(pod_name)
     (container_memory_usage_bytes{job="kubelet",
-    cluster="", namespace="default", pod_name=POD_NAME,
+    cluster="", namespace="default", pod_name=~POD_NAME,
     container_name=~"app", container_name!="POD"})"""
 
     _network_receive_bytes_query = """sort_desc(sum by (pod_name)
     (rate(container_network_receive_bytes_total{job="kubelet", cluster="",
-    namespace="default", pod_name=POD_NAME}[1m])))"""
+    namespace="default", pod_name=~POD_NAME}[1m])))"""
 
     _network_transmit_bytes_query = """sort_desc(sum by (pod_name)
     (rate(container_network_transmit_bytes_total{job="kubelet", cluster="",
-    namespace="default", pod_name=POD_NAME}[1m])))"""
+    namespace="default", pod_name=~POD_NAME}[1m])))"""
 
-    _cpu_usage_query = """sum by (container_name)
+    _cpu_usage_query = """sum by (pod_name)
     (rate(container_cpu_usage_seconds_total{job="kubelet", cluster="",
-     namespace="default", image!="", pod_name=POD_NAME,
+     namespace="default", image!="", pod_name=~POD_NAME,
      container_name=~"app", container_name!="POD"}[1m]))"""
 
-    _restarts_query = """max by (container)
+    _restarts_query = """max by (pod)
      (kube_pod_container_status_restarts_total{job="kube-state-metrics",
-    cluster="", namespace="default", pod=POD_NAME,
+    cluster="", namespace="default", pod=~POD_NAME,
     container=~"app"})"""
 
+    # Each query returns one series per pod identified by the label,
+    # series of pods belonging to the same deployment are combined
+    # using the declared aggregate.
     _metrics = {
         'memory_usage': {
             'query': _memory_usage_query,
+            'label': 'pod_name',
+            'aggregate': sum,
             'schema': {"type": "number"}
         },
         'network_receive_bytes': {
             'query': _network_receive_bytes_query,
+            'label': 'pod_name',
+            'aggregate': sum,
             'schema': {"type": "number"}
         },
         'network_transmit_bytes': {
             'query': _network_transmit_bytes_query,
+            'label': 'pod_name',
+            'aggregate': sum,
             'schema': {"type": "number"}
         },
         'cpu_usage': {
             'query': _cpu_usage_query,
+            'label': 'pod_name',
+            'aggregate': sum,
             'schema': {"type": "number"}
         },
         'restarts': {
             'query': _restarts_query,
+            'label': 'pod',
+            'aggregate': max,
             'schema': {"type": "number"}
         }
     }
@@ -106,42 +127,75 @@ class PrometheusSource(Source):
         return pn.Param(self.param, parameters=['period', 'samples', 'step'],
                         sizing_mode='stretch_width', show_name=False)
 
-    def _format_timestamps(self):
-        end = dt.datetime.utcnow()
-        end_formatted = end.isoformat("T") + "Z"
+    def __init__(self, **params):
+        super().__init__(**params)
+        self._reset_window()
+
+    def _reset_window(self, key=None):
+        # Rolling window of samples indexed by pod_id, metric and timestamp
+        self._window = {}
+        self._window_end = None
+        self._window_key = key
+
+    def _period(self):
         period = parse_timedelta(self.period)
         if period is None:
             raise ValueError(f"Could not parse period '{self.period}'. "
                              "Must specify weeks ('1w'), days ('1d'), "
                              "hours ('1h'), minutes ('1m'), or "
                              "seconds ('1s').")
-        start = end - period
-        start_formatted = start.isoformat("T") + "Z"
-        return start_formatted, end_formatted
+        return period
+
+    def _time_range(self):
+        """
+        Returns the start and end of the queried period as UNIX
+        timestamps aligned to the step, ensuring that consecutive
+        refreshes (and different sessions) issue identical queries.
+        """
+        step = self._step_seconds()
+        now = dt.datetime.now(dt.timezone.utc).timestamp()
+        end = (now // step) * step
+        start = end - (self._period().total_seconds() // step) * step
+        return start, end
+
+    @classmethod
+    def _format_timestamp(cls, timestamp):
+        return dt.datetime.utcfromtimestamp(timestamp).isoformat("T") + "Z"
+
+    def _format_timestamps(self):
+        return tuple(self._format_timestamp(ts) for ts in self._time_range())
 
     def _step_value(self):
         if self.step:
             return self.step
-        return int((parse_timedelta(self.period)/self.samples).total_seconds())
+        return max(int((self._period()/self.samples).total_seconds()), 1)
+
+    def _step_seconds(self):
+        step = self._step_value()
+        if isinstance(step, int):
+            return step
+        elif step.isdigit():
+            return int(step)
+        return max(int(parse_timedelta(step).total_seconds()), 1)
 
-    def _url_query_parameters(self, pod_id, query):
+    def _url_query_parameters(self, pod_ids, query, start, end):
         """
-        Uses regular expression to map ae5-tools pod_id to full id.
+        Uses a regular expression union to map ae5-tools pod_ids to
+        full pod names.
         """
-        start_timestamp, end_timestamp = self._format_timestamps()
-        regexp = f'anaconda-app-{pod_id}-.*'
-        query = query.replace("pod_name=POD_NAME", f"pod_name=~'{regexp}'")
-        query = query.replace("pod=POD_NAME", f"pod=~'{regexp}'")
+        start_timestamp, end_timestamp = self._format_timestamp(start), self._format_timestamp(end)
+        regexp = f"anaconda-app-({'|'.join(pod_ids)})-.*"
+        query = query.replace("POD_NAME", f"'{regexp}'")
         query_params = {
             'query': query, 'start': start_timestamp,
             'end': end_timestamp, 'step': self._step_value()
         }
         return urlparse.urlencode(query_params)
 
-    def _get_query_url(self, metric, pod_id):
+    def _get_query_url(self, metric, pod_ids, start, end):
         "Return the full query URL"
         query_template = self._metrics[metric]['query']
-        query_params = self._url_query_parameters(pod_id, query_template)
+        query_params = self._url_query_parameters(pod_ids, query_template, start, end)
         if self.ae5_source:
             ae5 = self.ae5_source._session
             return f'https://{ae5._k8s_endpoint}.{ae5.hostname}/promql/query_range?{query_params}'
@@ -159,58 +213,141 @@ class PrometheusSource(Source):
             return None
         return data
 
-    def _json_to_df(self, metric, values):
-        "Convert JSON response to pandas DataFrame"
-        df = pd.DataFrame(values, columns=['timestamp', metric])
-        df[metric] = df[metric].astype(float)
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
-        return df.set_index('timestamp')
+    def _demultiplex(self, metric, data, pod_ids):
+        """
+        Splits the series in a batched query_range response into the
+        values of each pod, combining series matching the same pod_id.
+        """
+        mdef = self._metrics[metric]
+        ids = sorted(pod_ids, key=len, reverse=True)
+        regexp = re.compile(f"anaconda-app-({'|'.join(map(re.escape, ids))})-")
+        combined = defaultdict(dict)
+        for series in ((data or {}).get('data') or {}).get('result', []):
+            match = regexp.match(series['metric'].get(mdef['label'], ''))
+            if not match:
+                continue
+            values = combined[match.group(1)]
+            for timestamp, value in series['values']:
+                value = float(value)
+                if timestamp in values:
+                    value = mdef['aggregate']((values[timestamp], value))
+                values[timestamp] = value
+        return {
+            pod_id: sorted(combined[pod_id].items()) if pod_id in combined else []
+            for pod_id in pod_ids
+        }
 
-    def _fetch_data(self, pod_ids):
-        "Returns fetched JSON in dictionary indexed by pod_id then metric name"
+    def _fetch_data(self, pod_ids, start, end):
+        "Returns fetched samples in dictionary indexed by pod_id then metric name"
         if not pod_ids:
             return {}
         # ToDo: Remove need to slice
-        triples = [
-            (pod_id, metric, self._get_query_url(metric, pod_id[3:]))
-            for pod_id in pod_ids for metric in self.metrics
+        short_ids = {pod_id[3:]: pod_id for pod_id in pod_ids}
+        batches = [
+            list(short_ids)[i:i+self.batch_size]
+            for i in range(0, len(short_ids), self.batch_size)
         ]
-        fetched_json = defaultdict(dict)
-        with futures.ThreadPoolExecutor(len(triples)) as executor:
+        queries = [
+            (batch, metric, self._get_query_url(metric, batch, start, end))
+            for batch in batches for metric in self.metrics
+        ]
+        fetched_json = {pod_id: {} for pod_id in pod_ids}
+        with futures.ThreadPoolExecutor(min(len(queries), self.max_workers)) as executor:
             tasks = {
-                executor.submit(self._get_query_json, t[2]): t
-                for t in triples
+                executor.submit(self._get_query_json, q[2]): q
+                for q in queries
             }
             for future in futures.as_completed(tasks):
-                (pod_id, metric, query_url) = tasks[future]
+                (batch, metric, query_url) = tasks[future]
                 try:
-                    fetched_json[pod_id][metric] = future.result()
+                    values = self._demultiplex(metric, future.result(), batch)
                 except Exception as e:
-                    fetched_json[pod_id][metric] = []
+                    values = {short_id: [] for short_id in batch}
                     self.param.warning(
-                        f"Could not fetch {metric} for pod {pod_id}. "
+                        f"Could not fetch {metric} for pods {batch}. "
                         f"Query used: {query_url}, errored with {type(e)}({e})."
                     )
+                for short_id, pod_values in values.items():
+                    fetched_json[short_ids[short_id]][metric] = pod_values
         return fetched_json
 
+    def _fetch_window(self, pod_ids):
+        """
+        Updates the rolling window of samples, only fetching samples
+        newer than the cached tail for pods already in the window,
+        and returns the samples of each pod in the current period.
+        """
+        start, end = self._time_range()
+        key = (tuple(self.metrics), self._step_seconds(), self.period)
+        if key != self._window_key:
+            self._reset_window(key)
+        window = self._window
+        cached = [pod_id for pod_id in pod_ids if pod_id in window]
+        new = [pod_id for pod_id in pod_ids if pod_id not in window]
+        fetched = self._fetch_data(new, start, end)
+        # The tail sample may have been incomplete so it is refetched
+        if cached and self._window_end is not None and self._window_end < end:
+            fetched.update(self._fetch_data(cached, max(self._window_end, start), end))
+        for pod_id, pod_data in fetched.items():
+            pod_window = window.setdefault(pod_id, {})
+            for metric, values in pod_data.items():
+                pod_window.setdefault(metric, {}).update(values)
+        for pod_id in list(window):
+            if pod_id not in pod_ids:
+                del window[pod_id]
+                continue
+            for metric, values in window[pod_id].items():
+                if values and min(values) < start:
+                    window[pod_id][metric] = {ts: v for ts, v in values.items() if ts >= start}
+        self._window_end = end
+        return {
+            pod_id: {metric: sorted(window[pod_id].get(metric, {}).items())
+                     for metric in self.metrics}
+            for pod_id in pod_ids
+        }
+
+    def _samples_to_df(self, samples):
+        """
+        Assembles the samples indexed by pod_id and metric into a
+        wide table with one row per pod and timestamp in a single
+        vectorized pass.
+        """
+        columns = ['id', 'timestamp'] + list(self.metrics)
+        pod_ids = list(samples)
+        pod_codes, metric_codes, values = [], [], []
+        for i, pod_id in enumerate(pod_ids):
+            for j, metric in enumerate(self.metrics):
+                pod_values = samples[pod_id].get(metric)
+                if not pod_values:
+                    continue
+                values.append(np.asarray(pod_values, dtype='float64'))
+                pod_codes.append(np.full(len(pod_values), i))
+                metric_codes.append(np.full(len(pod_values), j))
+        if not values:
+            return pd.DataFrame(columns=columns)
+        values = np.concatenate(values)
+        pod_codes = np.concatenate(pod_codes)
+        metric_codes = np.concatenate(metric_codes)
+
+        # Assign each (pod, timestamp) pair a row sorted by pod and time
+        timestamps, ts_codes = np.unique(values[:, 0], return_inverse=True)
+        row_keys, row_codes = np.unique(
+            pod_codes * len(timestamps) + ts_codes, return_inverse=True
+        )
+        table = np.full((len(row_keys), len(self.metrics)), np.nan)
+        table[row_codes, metric_codes] = values[:, 1]
+
+        df = pd.DataFrame(table, columns=list(self.metrics))
+        df.insert(0, 'timestamp', pd.to_datetime(timestamps[row_keys % len(timestamps)], unit='s'))
+        df.insert(0, 'id', np.asarray(pod_ids, dtype=object)[row_keys // len(timestamps)])
+        return df
+
     def _make_query(self):
-        json_data = self._fetch_data(self.ids)
-        dfs = []
-        for pod_id, pod_data in json_data.items():
-            df = None
-            for metric in self.metrics:
-                data_df = self._json_to_df(metric, pod_data[metric])
-                if df is None:
-                    df = data_df
-                else:
-                    df = pd.merge(df, data_df, on='timestamp', how='outer')
-            df = df.reset_index()
-            df.insert(0, 'id', pod_id)
-            dfs.append(df)
-        if dfs:
-            return pd.concat(dfs)
-        else:
+        samples = self._fetch_window(self.ids)
+        df = self._samples_to_df(samples)
+        if df.empty:
             return pd.DataFrame(columns=list(self.get_schema('timeseries')))
+        return df
 
     def get_schema(self, table=None):
         dt_start, dt_end = self._format_timestamps()
@@ -1,4 +1,4 @@
-from weakref import WeakKeyDictionary
+from weakref import WeakKeyDictionary, WeakValueDictionary
 
 import panel as pn
 
@@ -26,6 +26,8 @@ class _session_state:
 
     _pipelines = WeakKeyDictionary() if pn.state.curdoc else {}
 
+    _shared_pipelines = WeakKeyDictionary() if pn.state.curdoc else {}
+
     _filters = WeakKeyDictionary() if pn.state.curdoc else {}
 
     _variables = WeakKeyDictionary() if pn.state.curdoc else {}
@@ -59,6 +61,17 @@ class _session_state:
             self._pipelines[pn.state.curdoc] = {}
         return self._pipelines[pn.state.curdoc]
 
+    @property
+    def shared_pipelines(self):
+        """
+        Registry of the pipelines shared between Targets and Views in
+        the session, indexed by their canonical key. Pipelines are
+        only held as long as they are in use.
+        """
+        if pn.state.curdoc not in self._shared_pipelines:
+            self._shared_pipelines[pn.state.curdoc] = WeakValueDictionary()
+        return self._shared_pipelines[pn.state.curdoc]
+
     @property
     def variables(self):
         if pn.state.curdoc in self._variables:
@@ -138,6 +151,7 @@ class _session_state:
             for name, source_spec in self.spec.get('pipelines', {}).items()
         }
         self._pipelines[pn.state.curdoc or None] = pipelines
+        self._shared_pipelines[pn.state.curdoc or None] = WeakValueDictionary()
 
     def load_source(self, name, source_spec):
         from .filters import Filter
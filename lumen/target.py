@@ -104,7 +104,7 @@ class Card(Viewer):
                 if 'pipeline' in view_spec:
                     del view_spec['pipeline']
             if filters:
-                pipeline = pipeline.chain(filters=list(filters))
+                pipeline = pipeline.branch(filters=list(filters))
             view = View.from_spec(view_spec, pipeline=pipeline)
             views.append(view)
         if filters:
@@ -373,10 +373,13 @@ class Target(param.Parameterized):
             # the other facets to the controls of the first
             for v1, v2 in zip(linked_views, card.views):
                 v1.param.watch(partial(self._sync_component, v2), v1.refs)
-                for t1, t2 in zip(v1.pipeline.transforms, v2.pipeline.transforms):
-                    t1.param.watch(partial(self._sync_component, t2), t1.refs)
-                for t1, t2 in zip(v1.pipeline.sql_transforms, v2.pipeline.sql_transforms):
-                    t1.param.watch(partial(self._sync_component, t2), t1.refs)
+                transforms = zip(
+                    v1.pipeline.traverse('transforms') + v1.pipeline.traverse('sql_transforms'),
+                    v2.pipeline.traverse('transforms') + v2.pipeline.traverse('sql_transforms')
+                )
+                for t1, t2 in transforms:
+                    if t1 is not t2:
+                        t1.param.watch(partial(self._sync_component, t2), t1.refs)
         self._view_controls = pn.Column(*controls, sizing_mode='stretch_width')
 
     ##################################################################
@@ -555,7 +558,7 @@ class Target(param.Parameterized):
                     raise KeyError(f'{pipeline_spec!r} not found in global pipelines.')
                 pipeline = state.pipelines[pipeline_spec]
             else:
-                pipeline = Pipeline.from_spec(pipeline_spec)
+                pipeline = Pipeline.from_spec(pipeline_spec, shared=True)
             source = pipeline.source
             pipelines[pipeline.table] = pipeline
 
@@ -586,7 +589,7 @@ class Target(param.Parameterized):
             pspec = {'table': table}
             if filter_specs:
                 pspec['filters'] = filter_specs
-            pipelines[table] = Pipeline.from_spec(pspec, source, source_filters)
+            pipelines[table] = Pipeline.from_spec(pspec, source, source_filters, shared=True)
         if facet_spec and 'sort' in spec:
             param.main.warning(
                 "Cannot declare sort spec and provide a facet spec. "
@@ -1,7 +1,7 @@
 import os
 import tempfile
 
-from unittest.mock import Mock
+from unittest.mock import Mock, PropertyMock, patch
 
 import pandas as pd
 import panel as pn
@@ -36,6 +36,7 @@ def make_filesource():
     for source in state.global_sources.values():
         source.clear_cache()
     state.global_sources.clear()
+    state._shared_pipelines.clear()
 
 @pytest.fixture
 def make_variable_filesource():
@@ -55,6 +56,7 @@ def make_variable_filesource():
     for source in state.global_sources.values():
         source.clear_cache()
     state.global_sources.clear()
+    state._shared_pipelines.clear()
     state._variables.clear()
 
 @pytest.fixture
@@ -96,6 +98,18 @@ def document():
     with pn.io.server.set_curdoc(doc):
         yield
 
+@pytest.fixture
+def server_document():
+    "Document of a mocked server session, on which callbacks are scheduled"
+    doc = Document()
+    session = patch.object(
+        Document, 'session_context', new_callable=PropertyMock, return_value=Mock()
+    )
+    pn.state.curdoc = doc
+    with session:
+        yield doc
+    pn.state.curdoc = None
+
 @pytest.fixture
 def cachedir():
     tmp_dir = tempfile.TemporaryDirectory()
@@ -0,0 +1,151 @@
+import sys
+import threading
+import types
+
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# ae5_tools is an optional dependency, the AE5 sessions are stubbed
+ae5_tools = types.ModuleType('ae5_tools')
+ae5_tools.api = types.ModuleType('ae5_tools.api')
+ae5_tools.api.AEAdminSession = ae5_tools.api.AEUserSession = (
+    lambda *args, **kwargs: Mock()
+)
+
+
+@pytest.fixture
+def ae5():
+    modules = {'ae5_tools': ae5_tools, 'ae5_tools.api': ae5_tools.api}
+    with patch.dict(sys.modules, modules):
+        sys.modules.pop('lumen.sources.ae5', None)
+        from lumen.sources import ae5
+        yield ae5
+
+
+@pytest.fixture
+def tables():
+    deployments = pd.DataFrame({
+        'id': ['d1', 'd2'], 'name': ['app1', 'app2'], 'url': ['u1', 'u2'],
+        'owner': ['alice', 'bob'], 'resource_profile': ['small', 'large'],
+        'public': [True, False], 'state': ['started', 'started'],
+        'node': ['n1', 'n2'],
+        '_k8s': [{'containers': {'app': {
+            'limits': {'cpu': '2', 'memory': '1Gi'},
+            'usage': {'cpu': '500m', 'memory': '256Mi'},
+            'restarts': 1, 'since': '2021-01-01T00:00:00Z'
+        }}}, None]
+    })
+    nodes = pd.DataFrame({
+        'name': ['n1', 'n2'], 'capacity/cpu': ['4', '8'],
+        'capacity/gpu': ['0', '1'], 'capacity/mem': ['8Gi', '16Gi'],
+        'capacity/pod': ['110', '110'],
+    })
+    resources = pd.DataFrame({
+        'name': ['small', 'large'], 'cpu': ['1', '4'],
+        'memory': ['2Gi', '8Gi'], 'gpu': ['0', '1'],
+    })
+    sessions = pd.DataFrame({
+        'id': ['s1'], 'name': ['session1'], 'url': ['u3'], 'owner': ['alice'],
+        'resource_profile': ['small'], 'state': ['started'], 'node': ['n1'],
+    })
+    jobs = pd.DataFrame(columns=[
+        'id', 'name', 'owner', 'command', 'revision', 'resource_profile',
+        'created', 'updated', 'state', 'project_id', 'project_name',
+        'goal_state', 'status_text', 'url', 'schedule', 'source',
+    ])
+    return {
+        'deployments': deployments, 'nodes': nodes, 'resources': resources,
+        'sessions': sessions, 'jobs': jobs
+    }
+
+
+@pytest.fixture
+def source(ae5, tables):
+    source = ae5.AE5Source(hostname='ae5', private=False)
+    session = source._session
+    session.deployment_list.side_effect = lambda **kwargs: tables['deployments']
+    session.node_list.side_effect = lambda **kwargs: tables['nodes']
+    session.resource_profile_list.side_effect = lambda **kwargs: tables['resources']
+    session.session_list.side_effect = lambda **kwargs: tables['sessions']
+    session.job_list.side_effect = lambda **kwargs: tables['jobs']
+    return source
+
+
+def test_ae5_convert_values(ae5):
+    values = ae5.AE5Source._convert_values(['500m', '2Gi', '1024Ki', ' 3 ', '1.5Mi', None, ''])
+    expected = [0.5, 2*1024**3, 1024**2, 3, 1.5*1024**2, np.nan, np.nan]
+    np.testing.assert_array_equal(values.values, expected)
+
+
+def test_ae5_process_deployments_missing_containers(source, tables):
+    deployments = tables['deployments']
+    deployments = pd.concat([deployments, deployments.iloc[:1].assign(
+        id='d3', _k8s=[{'containers': None}]
+    )], ignore_index=True)
+    processed = source._process_deployments(deployments)
+    np.testing.assert_array_equal(processed.cpu.values, [0.5, np.nan, np.nan])
+    np.testing.assert_array_equal(processed.cpu_percent.values, [25, np.nan, np.nan])
+    np.testing.assert_array_equal(processed.memory.values, [256*1024**2, np.nan, np.nan])
+    np.testing.assert_array_equal(processed.memory_percent.values, [25, np.nan, np.nan])
+    np.testing.assert_array_equal(processed.restarts.values, [1, np.nan, np.nan])
+    assert processed.uptime.iloc[0] != '-'
+    assert list(processed.uptime.iloc[1:]) == ['-', '-']
+
+
+def test_ae5_process_deployments_without_k8s(source, tables):
+    processed = source._process_deployments(tables['deployments'].drop(columns='_k8s'))
+    assert processed.cpu.isna().all()
+    assert list(processed.uptime) == ['-', '-']
+
+
+def test_ae5_process_nodes_zero_capacity(source, tables):
+    nodes = tables['nodes'].assign(**{
+        'limits/cpu': ['2', '500m'], 'limits/gpu': ['0', '1'],
+        'limits/mem': ['4Gi', '2Gi'], 'limits/pod': [11, 55],
+    })
+    processed = source._process_nodes(nodes)
+    np.testing.assert_array_equal(processed['limits/cpu'].values, [2, 0.5])
+    np.testing.assert_array_equal(processed['limits/cpu_percent'].values, [50, 6.25])
+    np.testing.assert_array_equal(processed['limits/gpu_percent'].values, [0, 100])
+    np.testing.assert_array_equal(processed['limits/mem_percent'].values, [50, 12.5])
+    np.testing.assert_array_equal(processed['limits/pod_percent'].values, [10, 50])
+    assert list(processed['capacity/mem']) == ['8Gi', '16Gi']
+
+
+def test_ae5_derived_fetches_inputs_concurrently(source):
+    inputs = source._dependencies['resource_allocations']
+    barrier = threading.Barrier(len(inputs), timeout=5)
+    get = source.get
+
+    def fetch(table, **query):
+        # Only passes the barrier if all inputs are fetched at once
+        if table in inputs:
+            barrier.wait()
+        return get(table, **query)
+
+    with patch.object(source, 'get', side_effect=fetch):
+        allocations = source._get_derived('resource_allocations')
+    assert list(allocations.id) == ['d1', 's1', 'd2']
+    np.testing.assert_array_equal(allocations['allocation/cpu_pct'].values, [25, 25, 50])
+
+
+def test_ae5_derived_reused_if_inputs_unchanged(source, tables, ae5):
+    # The uptime changes every second if the start time is known
+    tables['deployments'] = tables['deployments'].assign(_k8s=None)
+    compute = ae5.AE5Source._get_resource_allocations
+    with patch.object(
+        ae5.AE5Source, '_get_resource_allocations', autospec=True, side_effect=compute
+    ) as get_allocations:
+        allocations = source.get('resource_allocations')
+        source.clear_cache()
+        assert source.get('resource_allocations') is allocations
+        assert get_allocations.call_count == 1
+
+        tables['sessions'] = tables['sessions'].assign(resource_profile='large')
+        source.clear_cache()
+        allocations = source.get('resource_allocations')
+        assert get_allocations.call_count == 2
+    np.testing.assert_array_equal(allocations['allocation/cpu_pct'].values, [25, 100, 50])
@@ -1,13 +1,18 @@
 import datetime as dt
+import gc
 import os
 
 from pathlib import Path
+from unittest.mock import Mock, patch
 
 import pandas as pd
 import pytest
+import requests
 
-from lumen.sources import Source
+from lumen.sources import PanelSessionSource, Source, WebsiteSource
+from lumen.sources.base import cached
 from lumen.state import state
+from lumen.transforms import Filter
 from lumen.transforms.sql import SQLLimit
 
 
@@ -160,6 +165,83 @@ def test_file_source_get_query_cache_to_file(make_filesource, cachedir):
     )
 
 
+def test_file_source_time_partition(make_filesource, mixed_df):
+    root = os.path.dirname(__file__)
+    source = make_filesource(root, time_partition='1D')
+    with patch.object(Filter, 'apply_to', wraps=Filter.apply_to) as apply_to:
+        df = source.get('test', D=(dt.date(2009, 1, 1), dt.date(2009, 1, 5)), C=['foo1', 'foo3', 'foo5'])
+        pd.testing.assert_frame_equal(df, mixed_df.iloc[[0, 2]].reset_index(drop=True))
+        df = source.get('test', D=(dt.date(2009, 1, 2), dt.date(2009, 1, 6)), C=['foo1', 'foo3', 'foo5'])
+        pd.testing.assert_frame_equal(df, mixed_df.iloc[[2]].reset_index(drop=True))
+        df = source.get('test', D=(dt.datetime(2009, 1, 2, 12), dt.datetime(2009, 1, 7)), C=['foo1', 'foo3', 'foo5'])
+        pd.testing.assert_frame_equal(df, mixed_df.iloc[[2, 4]].reset_index(drop=True))
+    ranges = [dict(call.kwargs['conditions'])['D'] for call in apply_to.call_args_list]
+    assert ranges == [
+        (pd.Timestamp('2009-01-01'), pd.Timestamp('2009-01-06')),
+        (pd.Timestamp('2009-01-06'), pd.Timestamp('2009-01-07')),
+        (pd.Timestamp('2009-01-07'), pd.Timestamp('2009-01-08')),
+    ]
+
+
+def test_file_source_time_partition_eviction(make_filesource, mixed_df):
+    root = os.path.dirname(__file__)
+    source = make_filesource(root, time_partition='1D', max_partitions=3)
+    df = source.get('test', D=(dt.date(2009, 1, 1), dt.date(2009, 1, 5)))
+    pd.testing.assert_frame_equal(df, mixed_df.iloc[:3])
+    assert len(source._partitions) == 3
+    assert [bucket for _, bucket in source._partitions] == list(
+        pd.date_range('2009-01-03', '2009-01-05')
+    )
+    df = source.get('test', D=(dt.date(2009, 1, 2), dt.date(2009, 1, 8)))
+    pd.testing.assert_frame_equal(df, mixed_df.iloc[1:].reset_index(drop=True))
+    assert len(source._partitions) == 3
+
+
+def test_file_source_time_partition_empty(make_filesource, mixed_df):
+    root = os.path.dirname(__file__)
+    source = make_filesource(root, time_partition='1D')
+    df = source.get('test', D=(dt.date(2010, 1, 1), dt.date(2010, 1, 3)))
+    pd.testing.assert_frame_equal(df, mixed_df.iloc[:0].reset_index(drop=True))
+    assert len(source._partitions) == 3
+
+
+def test_file_source_time_partition_missing_column(make_filesource, mixed_df):
+    root = os.path.dirname(__file__)
+    source = make_filesource(root, time_partition='1D')
+    for _ in range(2):
+        df = source.get('test', E=(dt.date(2009, 1, 1), dt.date(2009, 1, 3)))
+        pd.testing.assert_frame_equal(df, mixed_df)
+    assert len(source._partitions) == 0
+
+
+class HourlySource(Source):
+    """
+    Source with hourly timestamps in a non-UTC timezone, which
+    interprets naive datetimes in a query in that timezone.
+    """
+
+    tz = 'Europe/Berlin'
+
+    @cached()
+    def get(self, table, **query):
+        df = pd.DataFrame({
+            'time': pd.date_range('2009-01-01', periods=72, freq='H', tz=self.tz),
+            'value': range(72)
+        })
+        start, end = (pd.Timestamp(v).tz_localize(self.tz) for v in query['time'])
+        return df[(df.time >= start) & (df.time <= end)]
+
+
+def test_source_time_partition_timezone():
+    source = HourlySource(time_partition='1D')
+    df = source.get('hourly', time=(dt.datetime(2009, 1, 1, 12), dt.datetime(2009, 1, 2, 12)))
+    assert list(df.value) == list(range(12, 37))
+    assert len(source._partitions) == 2
+    df = source.get('hourly', time=(dt.date(2009, 1, 2), dt.date(2009, 1, 2)))
+    assert list(df.value) == list(range(24, 48))
+    assert len(source._partitions) == 2
+
+
 def test_file_source_get_tables(source):
     tables = source.get_tables()
     assert tables == ['test']
@@ -178,3 +260,79 @@ def test_extension_of_comlicated_url(source):
     url = "https://api.tfl.gov.uk/Occupancy/BikePoints/@{stations.stations.id}?app_key=random_numbers"
     source.tables["test"] = url
     assert source._named_files["test"][1] is None
+
+
+def test_website_source_probes_concurrently():
+    def head(url, timeout, allow_redirects):
+        if 'down' in url:
+            raise requests.ConnectTimeout()
+        response = Mock(status_code=405 if 'nohead' in url else 200)
+        response.elapsed = dt.timedelta(seconds=0.5)
+        return response
+
+    def get(url, timeout, stream):
+        return Mock(status_code=200, elapsed=dt.timedelta(seconds=1))
+
+    urls = ['https://up.org', 'https://down.org', 'https://nohead.org']
+    source = WebsiteSource(urls=urls, timeout=1)
+    with patch('requests.head', side_effect=head), patch('requests.get', side_effect=get) as mock_get:
+        df = source.get('status')
+    assert mock_get.call_count == 1
+    assert list(df.url) == urls
+    assert list(df.live) == [True, False, True]
+    assert df.latency.iloc[0] == 0.5
+    assert df.latency.isna().iloc[1]
+    assert df.latency.iloc[2] == 1
+
+
+def test_panel_session_source_merges_changed_sessions():
+    session_info = {
+        'total': 2, 'live': 1, 'sessions': {
+            'a': {'started': 0, 'rendered': 1, 'ended': 3, 'user_agent': 'x'},
+            'b': {'started': 2, 'rendered': None, 'ended': None, 'user_agent': 'y'},
+        }
+    }
+    responses = []
+
+    def get(url, timeout, headers):
+        return responses.pop(0)
+
+    source = PanelSessionSource(urls=['http://server/'])
+    with patch.object(source._session, 'get', side_effect=get) as mock_get:
+        responses.append(Mock(status_code=200, headers={'ETag': '1'}, json=lambda: {'session_info': session_info}))
+        sessions = source.get('sessions')
+        assert list(sessions.id) == ['a', 'b']
+        assert list(sessions.render_duration.isna()) == [False, True]
+        summary = source.get('summary')
+        assert summary.total.iloc[0] == 2
+
+        # Unchanged payloads are skipped using the ETag
+        responses.append(Mock(status_code=304))
+        source.clear_cache()
+        pd.testing.assert_frame_equal(source.get('sessions'), sessions)
+        assert mock_get.call_args[1]['headers'] == {'If-None-Match': '1'}
+
+        # Only changed sessions are merged
+        updated = dict(session_info['sessions'], b=dict(session_info['sessions']['b'], rendered=4))
+        del updated['a']
+        updated['c'] = {'started': 5, 'rendered': None, 'ended': None, 'user_agent': 'z'}
+        new_info = dict(session_info, sessions=updated)
+        responses.append(Mock(status_code=200, headers={'ETag': '2'}, json=lambda: {'session_info': new_info}))
+        source.clear_cache()
+        sessions = source.get('sessions')
+    assert sorted(sessions.id) == ['b', 'c']
+    assert sessions.set_index('id').render_duration['b'] == 2
+
+
+def test_panel_session_source_executor_lifecycle():
+    source = PanelSessionSource(urls=['http://server/'], max_workers=2)
+    executor = source._executor
+    assert executor._max_workers == 2
+    source.max_workers = 4
+    assert executor._shutdown
+    assert source._executor._max_workers == 4
+    assert source._session.get_adapter('http://server/')._pool_maxsize == 4
+    executor = source._executor
+    del source
+    gc.collect()
+    assert executor._shutdown
@@ -0,0 +1,147 @@
+import datetime as dt
+import os
+
+import pandas as pd
+import pytest
+
+from lumen.pipeline import Pipeline
+from lumen.sources import Source
+from lumen.transforms import Filter, Sort
+from lumen.transforms.sql import (
+    SQLGroupBy, SQLLimit, SQLSample, SQLTimeBucket,
+)
+
+pytest.importorskip('duckdb')
+
+from lumen.sources.duckdb import DuckDBSource  # noqa
+
+
+@pytest.fixture
+def source():
+    root = os.path.dirname(__file__)
+    return DuckDBSource(tables={'test': 'test.csv', 'tests': 'test*.csv'}, root=root)
+
+
+def test_duckdb_resolve_module_type():
+    assert Source._get_type('duckdb') is DuckDBSource
+    assert DuckDBSource.source_type == 'duckdb'
+
+
+def test_duckdb_get_tables(source):
+    assert source.get_tables() == ['test', 'tests']
+
+
+def test_duckdb_get(source, mixed_df):
+    df = source.get('test')
+    pd.testing.assert_frame_equal(df, mixed_df, check_dtype=False)
+
+
+def test_duckdb_get_glob(source):
+    assert len(source.get('tests')) == 10
+
+
+def test_duckdb_get_schema(source):
+    schema = source.get_schema('test')
+    assert schema['A'] == {'inclusiveMaximum': 4.0, 'inclusiveMinimum': 0.0, 'type': 'number'}
+    assert schema['C'] == {'enum': ['foo1', 'foo2', 'foo3', 'foo4', 'foo5'], 'type': 'string'}
+    assert schema['D']['inclusiveMinimum'] == pd.Timestamp('2009-01-01')
+
+
+def test_duckdb_filter(source, mixed_df):
+    df = source.get('test', A=(1, 3), C=['foo2', 'foo4', "fo'o"])
+    expected = mixed_df.iloc[[1, 3]].reset_index(drop=True)
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize('value,rows', [
+    (dt.date(2009, 1, 2), [1]),
+    (dt.datetime(2009, 1, 2), [1]),
+    ((dt.date(2009, 1, 2), dt.date(2009, 1, 5)), [1, 2]),
+    ((dt.datetime(2009, 1, 2), dt.datetime(2009, 1, 6)), [1, 2, 3]),
+    ([(dt.date(2009, 1, 2), dt.date(2009, 1, 5))], [1, 2]),
+    ([(dt.date(2009, 1, 1), dt.date(2009, 1, 1)), (dt.datetime(2009, 1, 6), dt.datetime(2009, 1, 7))], [0, 3, 4]),
+])
+def test_duckdb_filter_dates(source, mixed_df, value, rows):
+    df = source.get('test', D=value)
+    expected = mixed_df.iloc[rows].reset_index(drop=True)
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+
+
+def test_duckdb_sql_transforms(source):
+    df = source.get('test', sql_transforms=[
+        SQLGroupBy(by=['B'], aggregates={'SUM': 'A'}), SQLLimit(limit=5)
+    ])
+    assert dict(zip(df.B, df.A)) == {0.0: 6.0, 1.0: 4.0}
+
+
+def test_duckdb_database_tables(tmp_path, mixed_df):
+    import duckdb
+    path = str(tmp_path / 'test.duckdb')
+    conn = duckdb.connect(path)
+    conn.register('mixed_df', mixed_df)
+    conn.execute('CREATE TABLE mixed AS SELECT * FROM mixed_df')
+    conn.close()
+    source = DuckDBSource(uri=path)
+    assert source.get_tables() == ['mixed']
+    pd.testing.assert_frame_equal(source.get('mixed', C='foo1'), mixed_df.iloc[:1], check_dtype=False)
+
+
+@pytest.fixture
+def hourly_source(tmp_path):
+    import duckdb
+    df = pd.DataFrame({
+        'time': pd.date_range('2009-01-01', periods=96, freq='1H'),
+        'value': [None if i % 2 else f'v{i%4}' for i in range(96)],
+    })
+    path = str(tmp_path / 'hourly.duckdb')
+    conn = duckdb.connect(path)
+    conn.register('hourly_df', df)
+    conn.execute('CREATE TABLE hourly AS SELECT * FROM hourly_df')
+    conn.close()
+    return DuckDBSource(uri=path)
+
+
+@pytest.mark.parametrize('column,value,pushed', [
+    ('time', (dt.date(2009, 1, 2), dt.date(2009, 1, 3)), False),
+    ('time', [(dt.date(2009, 1, 2), dt.date(2009, 1, 2))], False),
+    ('time', dt.date(2009, 1, 2), False),
+    ('time', (dt.datetime(2009, 1, 2, 6), dt.datetime(2009, 1, 2, 18)), False),
+    ('value', ['v0', None], False),
+    ('value', ['v0', 'v2'], True),
+    ('value', 'v1', True),
+])
+def test_duckdb_filter_pushdown_matches_pandas(hourly_source, column, value, pushed):
+    transforms = [Filter(conditions=[(column, value)]), Sort(by=['time'])]
+    pipeline = Pipeline(source=hourly_source, table='hourly', transforms=transforms)
+    sql_transforms, _, _ = pipeline._pushdown_transforms()
+    assert len(sql_transforms) == (2 if pushed else 0)
+    expected = hourly_source.get('hourly')
+    for transform in transforms:
+        expected = transform.apply(expected)
+    pd.testing.assert_frame_equal(
+        pipeline.data.reset_index(drop=True), expected.reset_index(drop=True)
+    )
+
+
+def test_duckdb_filter_pushdown_requires_sort(hourly_source):
+    transforms = [Filter(conditions=[('value', ['v0', 'v2'])])]
+    pipeline = Pipeline(source=hourly_source, table='hourly', transforms=transforms)
+    assert pipeline._pushdown_transforms() == ([], None, transforms)
+    expected = transforms[0].apply(hourly_source.get('hourly'))
+    pd.testing.assert_frame_equal(pipeline.data, expected)
+
+
+def test_duckdb_sql_sample(source):
+    df = source.get('test', sql_transforms=[SQLSample(size=3, seed=1)])
+    assert len(df) == 3
+    assert df.equals(source.get('test', sql_transforms=[SQLSample(size=3, seed=1)]))
+
+
+def test_duckdb_sql_time_bucket(source):
+    df = source.get('test', sql_transforms=[SQLTimeBucket(
+        date_column='D', interval='day', width=2, aggregates={'SUM': 'A'}
+    )])
+    assert dict(zip(df.D, df.A)) == {
+        pd.Timestamp('2008-12-31'): 0, pd.Timestamp('2009-01-02'): 1,
+        pd.Timestamp('2009-01-04'): 2, pd.Timestamp('2009-01-06'): 7
+    }
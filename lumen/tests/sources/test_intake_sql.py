@@ -1,11 +1,13 @@
 import datetime as dt
 import os
 
+from unittest.mock import patch
+
 import pandas as pd
 import pytest
 
 from lumen.sources.intake_sql import IntakeSQLSource
-from lumen.transforms.sql import SQLGroupBy
+from lumen.transforms.sql import SQLDistinctUnion, SQLFilter, SQLGroupBy
 
 
 @pytest.fixture
@@ -142,3 +144,140 @@ def test_intake_sql_clear_cache(source):
     source.clear_cache()
     assert len(source._cache) == 0
     assert len(source._schema_cache) == 0
+
+
+def test_intake_sql_get_schema_all_tables(source):
+    schema = source.get_schema()
+    assert list(schema) == ['test', 'test_sql', 'test_sql_with_none']
+    assert schema['test_sql_with_none']['C']['enum'] == ['foo1', None, 'foo3', 'foo5']
+    assert set(source._schema_cache) == set(schema)
+
+
+def test_intake_sql_get_schema_cached(source):
+    schema = source.get_schema('test_sql')
+    with patch.object(SQLDistinctUnion, 'apply') as apply:
+        assert source.get_schema('test_sql') == schema
+    apply.assert_not_called()
+
+
+def test_intake_sql_reuses_pooled_engine(source, source_tables):
+    source.get('test_sql')
+    engine = source._get_engine(source._get_source('test_sql'))
+    assert engine is not None
+    source.clear_cache()
+    with patch('sqlalchemy.create_engine') as create_engine:
+        df = source.get('test_sql')
+    create_engine.assert_not_called()
+    assert source._get_engine(source._get_source('test_sql')) is engine
+    pd.testing.assert_frame_equal(df, source_tables['test_sql'])
+
+
+def test_intake_sql_query_timeout(source):
+    source.query_timeout = 0.001
+    sql_expr = (
+        "WITH RECURSIVE r(i) AS (SELECT 1 UNION ALL SELECT i+1 FROM r) "
+        "SELECT COUNT(*) FROM r"
+    )
+    engine = source._get_engine(source._get_source('test_sql'))
+    with pytest.raises(TimeoutError):
+        source._execute(engine, sql_expr, {})
+
+
+def test_intake_sql_filter_bind_params(source, source_tables):
+    df = source_tables['test_sql']
+    queries = []
+    execute = source._execute
+    def record(engine, sql_expr, sql_kwargs, params=None, *args):
+        queries.append((sql_expr, params))
+        return execute(engine, sql_expr, sql_kwargs, params, *args)
+    with patch.object(source, '_execute', side_effect=record):
+        for value in ('foo1', 'foo3'):
+            filtered = source.get('test_sql', C=value)
+            pd.testing.assert_frame_equal(filtered, df[df.C == value].reset_index(drop=True))
+        assert source.get('test_sql', C="fo'o").empty
+    (sql1, params1), (sql2, params2), (sql3, params3) = queries
+    assert sql1 == sql2 == sql3
+    assert list(params1.values()) == ['foo1']
+    assert list(params2.values()) == ['foo3']
+    assert list(params3.values()) == ["fo'o"]
+
+
+def test_intake_sql_bind_params_literal_colons(source, source_tables):
+    df = source_tables['test_sql']
+    sql_transforms = [SQLFilter(
+        conditions=[('C', 'foo1')], expression="C != 'x :foo 12:30'"
+    )]
+    filtered = source.get('test_sql', sql_transforms=sql_transforms)
+    pd.testing.assert_frame_equal(filtered, df[df.C == 'foo1'].reset_index(drop=True))
+
+
+def test_intake_sql_max_rows_truncate(source, source_tables):
+    source.param.update(max_rows=3, chunksize=2)
+    df = source.get('test_sql')
+    pd.testing.assert_frame_equal(df, source_tables['test_sql'].iloc[:3])
+
+
+def test_intake_sql_max_bytes_truncate(source, source_tables):
+    source.param.update(max_bytes=1, chunksize=2)
+    df = source.get('test_sql')
+    pd.testing.assert_frame_equal(df, source_tables['test_sql'].iloc[:0])
+
+
+def test_intake_sql_max_rows_spill(source, source_tables):
+    source.param.update(max_rows=3, chunksize=2, on_limit='spill', dask=True)
+    df = source.get('test_sql')
+    assert hasattr(df, 'compute')
+    spill_dir = source._spill_dirs[0]
+    assert spill_dir.is_dir()
+    pd.testing.assert_frame_equal(
+        df.compute().reset_index(drop=True), source_tables['test_sql'],
+        check_dtype=False
+    )
+    source.clear_cache()
+    assert not spill_dir.exists()
+
+
+def test_intake_sql_max_rows_spill_first_chunk(source, source_tables):
+    source.param.update(max_rows=1, chunksize=2, on_limit='spill', dask=True)
+    df = source.get('test_sql')
+    assert hasattr(df, 'compute')
+    pd.testing.assert_frame_equal(
+        df.compute().reset_index(drop=True), source_tables['test_sql'],
+        check_dtype=False
+    )
+
+    source.param.update(max_rows=1, chunksize=2, on_limit='spill', dask=True)
+    chunks = [pd.DataFrame({'A': [0.0, 1.0]}), pd.DataFrame({'A': [2, 3]})]
+    df = source._fetch_chunks(iter(chunks))
+    assert df.compute()['A'].to_list() == [0.0, 1.0, 2.0, 3.0]
+    part = pd.read_parquet(source._spill_dirs[-1] / 'part.1.parquet')
+    assert part['A'].dtype == 'float64'
+
+
+def test_intake_sql_max_rows_no_dask_truncates(source, source_tables):
+    source.param.update(max_rows=3, chunksize=2, on_limit='spill', dask=True)
+    df = source.get('test_sql', __dask=False)
+    pd.testing.assert_frame_equal(df, source_tables['test_sql'].iloc[:3])
+    assert not source._spill_dirs
+
+
+def test_intake_sql_max_rows_streams_results(source):
+    source.param.update(max_rows=3, chunksize=2)
+    read_sql = pd.read_sql
+    options = []
+
+    def record(sql, con, **kwargs):
+        options.append(con.get_execution_options().get('stream_results'))
+        return read_sql(sql, con, **kwargs)
+
+    with patch('lumen.sources.intake_sql.pd.read_sql', side_effect=record):
+        source.get('test_sql')
+    assert options == [True]
+
+
+def test_intake_sql_max_rows_exempts_schema(source, source_tables):
+    source.param.update(max_rows=1, chunksize=1, on_limit='spill', dask=True)
+    schema = source.get_schema('test_sql')
+    assert schema['C']['enum'] == ['foo1', 'foo2', 'foo3', 'foo4', 'foo5']
+    assert schema['A']['inclusiveMaximum'] == 4.0
+    assert not source._spill_dirs
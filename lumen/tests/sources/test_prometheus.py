@@ -0,0 +1,103 @@
+import re
+
+from unittest.mock import Mock, patch
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+from lumen.sources.prometheus import PrometheusSource
+
+
+def promql_response(url):
+    """
+    Mocks a Prometheus query_range response returning a series for
+    each pod (and a second replica for pod 'a1-aaa') matching the query.
+    """
+    params = {k: v[0] for k, v in parse_qs(urlparse(url).query).items()}
+    start, end = (int(pd.Timestamp(params[p][:-1]).timestamp()) for p in ('start', 'end'))
+    step = int(params['step'])
+    ids = re.search(r"anaconda-app-\((.*)\)-\.\*", params['query']).group(1).split('|')
+    label = 'pod' if 'restarts' in params['query'] else 'pod_name'
+    result = []
+    for i, pod_id in enumerate(ids):
+        pods = ['x1', 'x2'] if pod_id == 'aaa' else ['x1']
+        for pod in pods:
+            result.append({
+                'metric': {label: f'anaconda-app-{pod_id}-5f6d-{pod}'},
+                'values': [[t, str(i+t//60)] for t in range(start, end+1, step)]
+            })
+    return Mock(json=Mock(return_value={'status': 'success', 'data': {'result': result}}))
+
+
+@pytest.fixture
+def source():
+    source = PrometheusSource(
+        ids=['a1-aaa', 'a1-bbb', 'a1-ccc'], metrics=['memory_usage', 'restarts'],
+        promql_api='http://prometheus', batch_size=2, period='2m', step='60'
+    )
+    with patch.object(PrometheusSource, '_time_range', return_value=(0, 120)):
+        yield source
+
+
+def test_prometheus_batches_queries(source):
+    with patch('requests.get', side_effect=lambda url, verify: promql_response(url)) as mock_get:
+        data = source._fetch_data(source.ids, 0, 60)
+    assert mock_get.call_count == 4
+    assert list(data) == ['a1-aaa', 'a1-bbb', 'a1-ccc']
+    assert data['a1-aaa']['memory_usage'] == [(0, 0.), (60, 2.)]
+    assert data['a1-aaa']['restarts'] == [(0, 0.), (60, 1.)]
+    assert data['a1-bbb']['memory_usage'] == [(0, 1.), (60, 2.)]
+    assert data['a1-ccc']['memory_usage'] == [(0, 0.), (60, 1.)]
+
+
+def test_prometheus_batch_query_failure(source):
+    def get(url, verify):
+        if 'ccc' in url:
+            raise ValueError('Timeout')
+        return promql_response(url)
+
+    with patch('requests.get', side_effect=get):
+        data = source._fetch_data(source.ids, 0, 60)
+    assert data['a1-ccc'] == {'memory_usage': [], 'restarts': []}
+    assert data['a1-bbb']['restarts'] == [(0, 1.), (60, 2.)]
+
+
+def test_prometheus_time_range_step_aligned():
+    source = PrometheusSource(period='1h', step='60')
+    with patch('lumen.sources.prometheus.dt') as mock_dt:
+        mock_dt.datetime.now.return_value.timestamp.return_value = 7261.5
+        assert source._time_range() == (3660, 7260)
+
+
+def test_prometheus_incremental_window(source):
+    with patch('requests.get', side_effect=lambda url, verify: promql_response(url)) as mock_get:
+        df = source.get('timeseries')
+        assert list(df.timestamp.unique().astype('int64')//10**9) == [0, 60, 120]
+
+        source.ids = ['a1-aaa', 'a1-bbb', 'a1-ccc', 'a1-ddd']
+        with patch.object(PrometheusSource, '_time_range', return_value=(60, 180)):
+            mock_get.reset_mock()
+            df = source.get('timeseries')
+    starts = sorted(parse_qs(urlparse(c[0][0]).query)['start'][0] for c in mock_get.call_args_list)
+    # New pod fetched over the whole period, cached pods only from the tail
+    assert starts == ['1970-01-01T00:01:00Z']*2 + ['1970-01-01T00:02:00Z']*4
+    assert list(df.timestamp.unique().astype('int64')//10**9) == [60, 120, 180]
+    assert list(df[df.id == 'a1-bbb']['memory_usage']) == [2., 3., 4.]
+    assert list(df[df.id == 'a1-ddd']['memory_usage']) == [1., 2., 3.]
+
+
+def test_prometheus_samples_to_df():
+    source = PrometheusSource(metrics=['memory_usage', 'restarts'])
+    samples = {
+        'a1-bbb': {'memory_usage': [(0, 1.), (60, 2.)], 'restarts': [(60, 0.)]},
+        'a1-aaa': {'memory_usage': [(120, 3.)], 'restarts': []},
+        'a1-ccc': {'memory_usage': [], 'restarts': []},
+    }
+    expected = pd.DataFrame({
+        'id': ['a1-bbb', 'a1-bbb', 'a1-aaa'],
+        'timestamp': pd.to_datetime([0, 60, 120], unit='s'),
+        'memory_usage': [1., 2., 3.],
+        'restarts': [float('nan'), 0., float('nan')],
+    })
+    pd.testing.assert_frame_equal(source._samples_to_df(samples), expected)
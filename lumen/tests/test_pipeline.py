@@ -1,12 +1,23 @@
+import gc
 import pathlib
+import threading
+
+from unittest.mock import patch
 
 import pandas as pd
+import param
+import pytest
 
 from lumen.filters import ConstantFilter
-from lumen.pipeline import Pipeline
+from lumen.pipeline import Pipeline, _Superseded
+from lumen.sources import FileSource
 from lumen.sources.intake_sql import IntakeSQLSource
-from lumen.transforms import Columns
-from lumen.transforms.sql import SQLColumns
+from lumen.state import state
+from lumen.transforms import (
+    Aggregate, Astype, Columns, Filter, Iloc, Query, Sort, Transform,
+)
+from lumen.transforms.sql import SQLColumns, SQLOrderBy
+from lumen.variables import Variables
 
 
 def test_pipeline_source_only(make_filesource, mixed_df):
@@ -125,6 +136,156 @@ def test_pipeline_chained_with_transform(make_filesource, mixed_df):
     expected = mixed_df.iloc[2:4][['B', 'C']]
     pd.testing.assert_frame_equal(pipeline2.data, expected)
 
+def test_pipeline_get_page_breaks_ties(mixed_df):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = IntakeSQLSource(uri=str(root / 'catalog.yml'), root=str(root))
+    pipeline = Pipeline(source=source, table='test_sql')
+    pages = [pipeline.get_page(page, 2, [('B', True)]) for page in (1, 2, 3)]
+    assert [count for _, count in pages] == [5, 5, 5]
+    data = pd.concat([page for page, _ in pages], ignore_index=True)
+    pd.testing.assert_frame_equal(
+        data, mixed_df.iloc[[0, 2, 4, 1, 3]].reset_index(drop=True)
+    )
+
+    # Pages are ordered even if no sort is requested
+    get = source.get
+    with patch.object(source, 'get', side_effect=get) as mock_get:
+        pipeline.get_page(1, 2)
+    order = mock_get.call_args.kwargs['sql_transforms'][-2]
+    assert isinstance(order, SQLOrderBy)
+    assert order.by == ['A', 'B', 'C', 'D']
+
+def test_pipeline_shared(make_filesource):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = make_filesource(str(root))
+    cfilter = ConstantFilter(field='A', value=(1, 3))
+
+    pipeline1 = Pipeline.shared(
+        source=source, table='test', filters=[cfilter], transforms=[Columns(columns=['A', 'B'])]
+    )
+    pipeline2 = Pipeline.shared(
+        source=source, table='test', filters=[cfilter], transforms=[Columns(columns=['A', 'B'])],
+        optimize=True
+    )
+    assert pipeline1 is pipeline2
+
+    # Filters are stateful so only identical filters are shared
+    pipeline3 = Pipeline.shared(
+        source=source, table='test', filters=[ConstantFilter(field='A', value=(1, 3))],
+        transforms=[Columns(columns=['A', 'B'])]
+    )
+    assert pipeline3 is not pipeline1
+
+def test_pipeline_shared_copy_on_write(make_filesource, mixed_df):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = make_filesource(str(root))
+    pipeline = Pipeline.shared(source=source, table='test')
+
+    filtered = pipeline.add_filter(ConstantFilter(field='A', value=(1, 3)))
+    assert filtered is not pipeline
+    assert pipeline.filters == []
+    pd.testing.assert_frame_equal(pipeline.data, mixed_df)
+    pd.testing.assert_frame_equal(filtered.data, mixed_df.iloc[1:4])
+
+    # The private copy is modified in place
+    assert filtered.add_transform(Iloc(end=2)) is filtered
+    assert pipeline.transforms == []
+    pd.testing.assert_frame_equal(filtered.data, mixed_df.iloc[1:3])
+
+def test_pipeline_shared_released(set_root):
+    set_root(str(pathlib.Path(__file__).parent / 'sources'))
+    source = FileSource(tables={'test': 'test.csv'})
+    pipeline = Pipeline(source=source, table='test')
+    branch = pipeline.branch(transforms=[Columns(columns=['A', 'B'])])
+    key = pipeline._chain_key(transforms=branch.transforms)
+    assert state.shared_pipelines[key] is branch
+
+    # The registry does not keep pipelines alive
+    del source, pipeline, branch
+    gc.collect()
+    assert key not in state.shared_pipelines
+
+@pytest.mark.parametrize('order', [[0, 1], [1, 0]])
+def test_pipeline_branch_splits_diverging_chains(make_filesource, mixed_df, order):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = make_filesource(str(root))
+    pipeline = Pipeline(source=source, table='test')
+    specs = [
+        [Columns(columns=['A', 'B']), Sort(by=['A'], ascending=False)],
+        [Columns(columns=['A', 'B']), Iloc(end=2)],
+    ]
+    branches = {}
+    for i in order:
+        branches[i] = pipeline.branch(transforms=specs[i])
+    first = branches[order[0]]
+    assert first.data is not None
+    with patch.object(Columns, 'apply', autospec=True, side_effect=Columns.apply) as apply:
+        branch1, branch2 = branches[0], branches[1]
+        assert branch1.pipeline is branch2.pipeline
+        columns = branch1.pipeline
+        assert columns.pipeline is pipeline
+        assert [type(t) for t in columns.transforms] == [Columns]
+        assert [type(t) for t in branch1.transforms] == [Sort]
+        assert [type(t) for t in branch2.transforms] == [Iloc]
+        pd.testing.assert_frame_equal(branch1.data, mixed_df.iloc[::-1][['A', 'B']])
+        pd.testing.assert_frame_equal(branch2.data, mixed_df.iloc[:2][['A', 'B']])
+
+        # The common prefix is computed once
+        pipeline._update_data()
+        pd.testing.assert_frame_equal(branch1.data, mixed_df.iloc[::-1][['A', 'B']])
+        pd.testing.assert_frame_equal(branch2.data, mixed_df.iloc[:2][['A', 'B']])
+    assert apply.call_count == 1
+
+    # Both chains are found again and a shorter prefix is shared too
+    assert pipeline.branch(transforms=specs[0]) is branch1
+    assert pipeline.branch(transforms=specs[1]) is branch2
+    assert pipeline.branch(transforms=[Columns(columns=['A', 'B'])]) is columns
+
+
+def test_pipeline_branch_splits_chain_on_shorter_prefix(make_filesource, mixed_df):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = make_filesource(str(root))
+    pipeline = Pipeline(source=source, table='test')
+    branch = pipeline.branch(transforms=[Columns(columns=['A', 'B']), Iloc(end=2)])
+    columns = pipeline.branch(transforms=[Columns(columns=['A', 'B'])])
+    assert branch.pipeline is columns
+    assert columns.pipeline is pipeline
+    pd.testing.assert_frame_equal(columns.data, mixed_df[['A', 'B']])
+    pd.testing.assert_frame_equal(branch.data, mixed_df.iloc[:2][['A', 'B']])
+
+
+def test_pipeline_branch_shares_common_prefix(make_filesource, mixed_df):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = make_filesource(str(root))
+    cfilter = ConstantFilter(field='A', value=(1, 3))
+    pipeline = Pipeline(source=source, table='test')
+
+    columns = pipeline.branch(filters=[cfilter], transforms=[Columns(columns=['A', 'B'])])
+    branch1 = pipeline.branch(
+        filters=[cfilter], transforms=[Columns(columns=['A', 'B']), Sort(by=['A'], ascending=False)]
+    )
+    branch2 = pipeline.branch(
+        filters=[cfilter], transforms=[Columns(columns=['A', 'B']), Iloc(end=2)]
+    )
+    assert branch1 is not branch2
+    assert branch1.pipeline is branch2.pipeline is columns
+    assert columns.pipeline.filters == [cfilter]
+    assert pipeline.branch(
+        filters=[cfilter], transforms=[Columns(columns=['A', 'B']), Iloc(end=2)]
+    ) is branch2
+
+    # Transforms without a registered prefix are applied by one pipeline
+    branch3 = pipeline.branch(transforms=[Columns(columns=['A', 'B']), Iloc(end=2)])
+    assert branch3.pipeline is pipeline
+    assert len(branch3.transforms) == 2
+
+    pd.testing.assert_frame_equal(branch1.data, mixed_df.iloc[[3, 2, 1]][['A', 'B']])
+    pd.testing.assert_frame_equal(branch2.data, mixed_df.iloc[1:3][['A', 'B']])
+
+    cfilter.value = (2, 3)
+    pd.testing.assert_frame_equal(branch1.data, mixed_df.iloc[[3, 2]][['A', 'B']])
+    pd.testing.assert_frame_equal(branch2.data, mixed_df.iloc[2:4][['A', 'B']])
+
 def test_pipeline_chained_with_sql_transform(mixed_df):
     root = pathlib.Path(__file__).parent / 'sources'
     source = IntakeSQLSource(
@@ -148,3 +309,374 @@ def test_pipeline_chained_with_sql_transform(mixed_df):
     transform.columns = ['B', 'C']
     expected = mixed_df.iloc[2:4][['B', 'C']].reset_index(drop=True)
     pd.testing.assert_frame_equal(pipeline2.data, expected)
+
+def test_pipeline_pushdown_transforms(mixed_df):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = IntakeSQLSource(
+        uri=str(root / 'catalog.yml'), root=str(root)
+    )
+
+    transforms = [
+        Query(query="A >= 1 and C != 'foo3'"),
+        Sort(by=['A'], ascending=False),
+        Iloc(end=2),
+        Columns(columns=['A', 'C']),
+    ]
+    pipeline = Pipeline(source=source, table='test_sql', transforms=transforms)
+    sql_transforms, finalize, remaining = pipeline._pushdown_transforms()
+    assert len(sql_transforms) == 4
+    assert finalize is None and remaining == []
+
+    expected = mixed_df.iloc[[4, 3]][['A', 'C']].reset_index(drop=True)
+    pd.testing.assert_frame_equal(pipeline.data, expected)
+
+    # Update
+    transforms[2].end = 1
+    pd.testing.assert_frame_equal(pipeline.data, expected.iloc[:1])
+
+def test_pipeline_pushdown_aggregate(mixed_df):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = IntakeSQLSource(
+        uri=str(root / 'catalog.yml'), root=str(root)
+    )
+
+    aggregate = Aggregate(by=['B'], columns=['A'], method='sum')
+    transforms = [aggregate, Columns(columns=['A'])]
+    pipeline = Pipeline(source=source, table='test_sql', transforms=transforms)
+    sql_transforms, finalize, remaining = pipeline._pushdown_transforms()
+    assert len(sql_transforms) == 2
+    assert remaining == transforms[1:]
+
+    expected = mixed_df.groupby('B')[['A']].sum()
+    pd.testing.assert_frame_equal(pipeline.data, expected, check_dtype=False)
+
+    # Update
+    aggregate.with_index = False
+    pd.testing.assert_frame_equal(
+        pipeline.data, expected.reset_index()[['A']], check_dtype=False
+    )
+
+def test_pipeline_pushdown_unsupported_transform(mixed_df):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = IntakeSQLSource(
+        uri=str(root / 'catalog.yml'), root=str(root)
+    )
+
+    transforms = [Iloc(start=1, end=3), Columns(columns=['A', 'B'])]
+    pipeline = Pipeline(source=source, table='test_sql', transforms=transforms)
+    assert pipeline._pushdown_transforms() == ([], None, transforms)
+
+    pd.testing.assert_frame_equal(pipeline.data, mixed_df.iloc[1:3][['A', 'B']])
+
+
+@pytest.mark.parametrize('transforms,pushed', [
+    ([Query(query="C != 'foo3'"), Sort(by=['A'])], 2),
+    ([Query(query="C != 'foo3' and A < 1_000"), Sort(by=['A'])], 2),
+    ([Query(query="not C == 'foo3'"), Sort(by=['A'])], 0),
+    ([Sort(by=['C'], ascending=False)], 1),
+    ([Sort(by=['C'])], 1),
+])
+def test_pipeline_pushdown_missing_values(transforms, pushed):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = IntakeSQLSource(
+        uri=str(root / 'catalog.yml'), root=str(root)
+    )
+    pipeline = Pipeline(source=source, table='test_sql_with_none', transforms=transforms)
+    sql_transforms, _, _ = pipeline._pushdown_transforms()
+    assert len(sql_transforms) == pushed
+
+    expected = source.get('test_sql_with_none')
+    for transform in transforms:
+        expected = transform.apply(expected)
+    pd.testing.assert_frame_equal(
+        pipeline.data.reset_index(drop=True), expected.reset_index(drop=True)
+    )
+
+
+def test_pipeline_pushdown_query_requires_sort(mixed_df):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = IntakeSQLSource(
+        uri=str(root / 'catalog.yml'), root=str(root)
+    )
+    transforms = [Query(query="C != 'foo3'"), Columns(columns=['A', 'C'])]
+    pipeline = Pipeline(source=source, table='test_sql', transforms=transforms)
+    assert pipeline._pushdown_transforms() == ([], None, transforms)
+    pd.testing.assert_frame_equal(pipeline.data, mixed_df.query("C != 'foo3'")[['A', 'C']])
+
+
+def test_pipeline_plan_fuses_filters_and_prunes_columns(make_filesource, mixed_df):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = make_filesource(str(root))
+    transforms = [
+        Filter(conditions=[('A', (1, 3))]), Filter(conditions=[('C', ['foo2', 'foo4'])]),
+        Astype(dtypes={'B': 'int64'}), Columns(columns=['B', 'C'])
+    ]
+    pipeline = Pipeline(source=source, table='test', transforms=transforms)
+
+    plan = pipeline._plan(transforms, list(mixed_df.columns))
+    assert [type(t) for t in plan] == [Columns, Filter, Astype, Columns]
+    assert plan[0].columns == ['B', 'C', 'A']
+    assert plan[1].conditions == [('A', (1, 3)), ('C', ['foo2', 'foo4'])]
+
+    expected = mixed_df.iloc[[1, 3]][['B', 'C']].astype({'B': 'int64'})
+    pd.testing.assert_frame_equal(pipeline.data, expected)
+
+
+def test_pipeline_inplace_transforms_do_not_modify_source(make_filesource, mixed_df):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = make_filesource(str(root))
+    pipeline = Pipeline(source=source, table='test', transforms=[
+        Astype(dtypes={'A': 'int64'}), Filter(conditions=[('A', (1, 3))]),
+        Astype(dtypes={'B': 'int64'})
+    ])
+
+    expected = mixed_df.iloc[1:4].astype({'A': 'int64', 'B': 'int64'})
+    pd.testing.assert_frame_equal(pipeline.data, expected)
+    pd.testing.assert_frame_equal(source.get('test'), mixed_df)
+
+
+def test_pipeline_debug_prints_plan(make_filesource, mixed_df, capsys):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = make_filesource(str(root))
+    pipeline = Pipeline(source=source, table='test', debug=True, transforms=[
+        Sort(by=['A'], ascending=False), Iloc(end=2)
+    ])
+
+    pd.testing.assert_frame_equal(pipeline.data, mixed_df.iloc[[4, 3]])
+    out = capsys.readouterr().out
+    assert "on 'test' table:\n1. SortHead(ascending=False, by=['A'], n=2)" in out
+
+    pipeline.optimize = False
+    pipeline._update_data()
+    pd.testing.assert_frame_equal(pipeline.data, mixed_df.iloc[[4, 3]])
+    assert "1. Sort(" in capsys.readouterr().out
+
+
+class CountingTransform(Transform):
+
+    offset = param.Number(default=0)
+
+    _deterministic = True
+
+    def __init__(self, **params):
+        super().__init__(**params)
+        self.calls = 0
+
+    def apply(self, table):
+        self.calls += 1
+        return table.assign(A=table.A+self.offset)
+
+
+def test_pipeline_memoizes_stages(make_filesource, mixed_df):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = make_filesource(str(root))
+    cfilter = ConstantFilter(field='A', value=(1, 3))
+    first, last = CountingTransform(), CountingTransform()
+    pipeline = Pipeline(
+        source=source, table='test', filters=[cfilter], transforms=[first, last], memoize=2
+    )
+    pd.testing.assert_frame_equal(pipeline.data, mixed_df.iloc[1:4])
+    assert (first.calls, last.calls) == (1, 1)
+
+    # Only the last stage is recomputed
+    last.offset = 1
+    pd.testing.assert_frame_equal(pipeline.data, mixed_df.iloc[1:4].assign(A=[2., 3., 4.]))
+    assert (first.calls, last.calls) == (1, 2)
+
+    # Stages are recomputed for the new data and reused when reverted
+    cfilter.value = (0, 1)
+    assert (first.calls, last.calls) == (2, 3)
+    cfilter.value = (1, 3)
+    pd.testing.assert_frame_equal(pipeline.data, mixed_df.iloc[1:4].assign(A=[2., 3., 4.]))
+    assert (first.calls, last.calls) == (2, 3)
+
+    # Memoization is disabled
+    pipeline.memoize = 0
+    pipeline._update_data()
+    assert (first.calls, last.calls) == (3, 4)
+
+
+def test_pipeline_memoize_skips_undeclared_transforms(make_filesource):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = make_filesource(str(root))
+
+    class ImpureTransform(CountingTransform):
+
+        _deterministic = False
+
+    transform = ImpureTransform()
+    pipeline = Pipeline(source=source, table='test', transforms=[transform], memoize=2)
+    pipeline._update_data()
+    pipeline._update_data()
+    assert transform.calls == 2
+    assert Pipeline.memoize == 0
+    assert not Transform._deterministic
+
+
+def test_pipeline_hold_collapses_updates(make_filesource, mixed_df):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = make_filesource(str(root))
+    afilter = ConstantFilter(field='A', value=(1, 3))
+    cfilter = ConstantFilter(field='C', value=['foo2', 'foo3'])
+    pipeline = Pipeline(source=source, table='test', filters=[afilter, cfilter])
+    pipeline._update_data()
+
+    with patch.object(pipeline, '_update_data', wraps=pipeline._update_data) as update:
+        with pipeline.hold():
+            afilter.value = (0, 4)
+            cfilter.value = ['foo1', 'foo5']
+        assert update.call_count == 1
+        assert len(update.call_args.args) == 2
+    pd.testing.assert_frame_equal(pipeline.data, mixed_df.iloc[[0, 4]])
+
+
+def test_pipeline_batches_updates_on_next_tick(make_filesource, mixed_df, server_document):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = make_filesource(str(root))
+    afilter = ConstantFilter(field='A', value=(1, 3))
+    cfilter = ConstantFilter(field='C', value=['foo2', 'foo3'])
+    pipeline = Pipeline(source=source, table='test', filters=[afilter, cfilter])
+    pipeline._update_data()
+
+    doc = server_document
+    with patch.object(pipeline, '_update_data', wraps=pipeline._update_data) as update:
+        afilter.value = (0, 4)
+        cfilter.value = ['foo1', 'foo5']
+        assert update.call_count == 0
+        assert len(doc.session_callbacks) == 1
+
+        pipeline.flush()
+        assert update.call_count == 1
+        assert len(doc.session_callbacks) == 0
+        pd.testing.assert_frame_equal(pipeline.data, mixed_df.iloc[[0, 4]])
+
+        # Accessing the data applies pending updates
+        cfilter.value = ['foo1']
+        pd.testing.assert_frame_equal(pipeline.data, mixed_df.iloc[[0]])
+        assert update.call_count == 2
+
+
+def test_pipeline_debounce_reschedules_update(make_filesource, server_document):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = make_filesource(str(root))
+    afilter = ConstantFilter(field='A', value=(1, 3))
+    pipeline = Pipeline(source=source, table='test', filters=[afilter], debounce=200)
+    pipeline._update_data()
+
+    doc = server_document
+    afilter.value = (0, 4)
+    first = doc.session_callbacks[0]
+    afilter.value = (0, 2)
+    assert doc.session_callbacks == [pipeline._scheduled[1]] != [first]
+    assert pipeline._scheduled[1].timeout == 200
+    pipeline.flush()
+    assert len(pipeline.data) == 3
+
+
+class BlockingTransform(Transform):
+
+    def __init__(self, **params):
+        super().__init__(**params)
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def apply(self, table):
+        self.started.set()
+        self.release.wait(5)
+        return table
+
+
+def test_pipeline_asynchronous_supersedes_runs(make_filesource, mixed_df, server_document):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = make_filesource(str(root))
+    afilter = ConstantFilter(field='A', value=(1, 3))
+    blocking = BlockingTransform()
+    blocking.release.set()
+    pipeline = Pipeline(
+        source=source, table='test', filters=[afilter], transforms=[blocking],
+        asynchronous=True, memoize=0
+    )
+    pipeline._update_data()
+    blocking.release.clear()
+
+    doc = server_document
+    # Run the scheduled update which submits the run to the pool
+    afilter.value = (0, 1)
+    doc.session_callbacks[0].callback()
+    assert pipeline.loading
+    assert blocking.started.wait(5)
+    first = pipeline._future
+
+    # A new run supersedes the blocked run
+    afilter.value = (2, 4)
+    doc.session_callbacks[-1].callback()
+    second = pipeline._future
+    blocking.release.set()
+    first.exception(5), second.result(5)
+    for callback in doc.session_callbacks[-2:]:
+        callback.callback()
+
+    assert isinstance(first.exception(), _Superseded)
+    assert not pipeline.loading
+    pd.testing.assert_frame_equal(pipeline.data, mixed_df.iloc[2:5])
+
+
+class VariableColumns(BlockingTransform):
+
+    def apply(self, table):
+        table = super().apply(table)
+        return table[state.resolve_reference('$variables.columns')]
+
+
+def test_pipeline_asynchronous_resolves_session_variables(make_filesource, mixed_df, server_document):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = make_filesource(str(root))
+    afilter = ConstantFilter(field='A', value=(1, 3))
+    pipeline = Pipeline(
+        source=source, table='test', filters=[afilter], asynchronous=True
+    )
+    pipeline._update_data()
+
+    doc = server_document
+    state._variables[doc] = variables = Variables.from_spec({
+        'columns': {'type': 'constant', 'default': ['A', 'B']}
+    })
+    # The value in the session differs from the default
+    variables._vars['columns'].value = ['B', 'C']
+    transform = VariableColumns()
+    pipeline.transforms = [transform]
+    doc.session_callbacks[0].callback()
+    # Resolve the variables once the callback has returned
+    transform.release.set()
+    pipeline._future.result(5)
+    doc.session_callbacks[-1].callback()
+    pd.testing.assert_frame_equal(pipeline.data, mixed_df.iloc[1:4][['B', 'C']])
+
+
+def test_pipeline_asynchronous_chained_assigns_parent_on_document(make_filesource, mixed_df, server_document):
+    root = pathlib.Path(__file__).parent / 'sources'
+    source = make_filesource(str(root))
+    parent = Pipeline(source=source, table='test')
+    afilter = ConstantFilter(field='A', value=(1, 3))
+    pipeline = Pipeline(
+        source=source, table='test', pipeline=parent, filters=[afilter],
+        asynchronous=True
+    )
+    pipeline._update_data()
+    with param.discard_events(parent):
+        parent.data = None
+
+    threads = []
+    parent.param.watch(lambda event: threads.append(threading.current_thread()), 'data')
+
+    doc = server_document
+    afilter.value = (0, 1)
+    doc.session_callbacks[0].callback()
+    pipeline._future.result(5)
+    assert threads == []
+    doc.session_callbacks[-1].callback()
+
+    assert threads == [threading.current_thread()]
+    assert doc.session_callbacks == []
+    pd.testing.assert_frame_equal(parent.data, mixed_df)
+    pd.testing.assert_frame_equal(pipeline.data, mixed_df.iloc[:2])
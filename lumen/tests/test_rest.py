@@ -0,0 +1,92 @@
+import json
+
+from unittest.mock import Mock, patch
+from urllib.parse import urlencode
+
+import pandas as pd
+import pytest
+
+from tornado import web
+from tornado.testing import AsyncHTTPTestCase
+
+from lumen.rest import (
+    _TABLES, DataFrameEndpoint, TableHandler, append, publish, unpublish,
+)
+from lumen.sources import RESTSource
+
+
+@pytest.fixture
+def published(mixed_df):
+    publish('test', mixed_df.iloc[:3], list(mixed_df.columns))
+    yield _TABLES['test']
+    unpublish('test')
+
+
+def test_dataframe_endpoint_cursor(mixed_df):
+    endpoint = DataFrameEndpoint(data=mixed_df.iloc[:3], columns=list(mixed_df.columns))
+    assert endpoint.cursor == 3
+    endpoint.append(mixed_df.iloc[3:])
+    assert endpoint.cursor == 5
+
+
+def test_dataframe_endpoint_query_since(mixed_df):
+    endpoint = DataFrameEndpoint(data=mixed_df, columns=list(mixed_df.columns))
+    result = pd.read_json(endpoint.query(since=3), orient='records')
+    assert list(result.A) == [3., 4.]
+
+
+def test_append_published_table(published, mixed_df):
+    version = published.version
+    append('test', mixed_df.iloc[3:])
+    assert published.cursor == 5
+    assert published.version == version
+
+
+class TestTableHandler(AsyncHTTPTestCase):
+
+    def get_app(self):
+        return web.Application([(r'/data', TableHandler)])
+
+    @pytest.fixture(autouse=True)
+    def _published(self, published, mixed_df):
+        self.published = published
+        self.mixed_df = mixed_df
+
+    def _get(self, url, params):
+        """
+        Serves a requests.get call by the RESTSource with the TableHandler.
+        """
+        response = self.fetch(f'/data?{urlencode(params)}')
+        return Mock(
+            headers=response.headers,
+            json=Mock(return_value=json.loads(response.body))
+        )
+
+    def test_rest_source_incremental(self):
+        mixed_df = self.mixed_df
+        source = RESTSource(url='http://localhost', incremental=True)
+        with patch('requests.get', side_effect=self._get) as mock_get:
+            df = source.get('test')
+            assert list(df.A) == [0., 1., 2.]
+
+            append('test', mixed_df.iloc[3:])
+            source.clear_cache()
+            df = source.get('test')
+            assert list(df.A) == [0., 1., 2., 3., 4.]
+            assert mock_get.call_args[1]['params']['since'] == 3
+
+            # Republishing invalidates the cursor
+            publish('test', mixed_df.iloc[:2], list(mixed_df.columns))
+            source.clear_cache()
+            df = source.get('test', A=1.0)
+            assert list(df.A) == [1.]
+
+    def test_since_beyond_cursor(self):
+        response = self._get('/data', {'table': 'test', 'since': 10})
+        assert response.headers['X-Lumen-Since'] == '0'
+        assert len(response.json()) == 3
+
+    def test_invalid_since(self):
+        for since in ('foo', '1.5', '-1'):
+            response = self.fetch(f'/data?table=test&since={since}')
+            assert response.code == 400
@@ -185,6 +185,31 @@ def test_transform_controls_facetted(set_root):
         assert np.array_equal(hv_pane2.object['A'], np.array([3, 1]))
 
 
+def test_targets_share_pipelines(set_root):
+    set_root(str(Path(__file__).parent))
+    source = FileSource(tables={'test': 'sources/test.csv'})
+    views = {
+        'scatter': {'type': 'hvplot', 'table': 'test', 'x': 'A', 'y': 'B', 'kind': 'scatter'},
+        'line': {'type': 'hvplot', 'table': 'test', 'x': 'A', 'y': 'B', 'kind': 'line'},
+        'table': {
+            'type': 'table', 'table': 'test', 'transforms': [{'type': 'columns', 'columns': ['A', 'B']}]
+        },
+    }
+    spec = {'source': source, 'facet': {'by': 'C'}, 'views': views}
+
+    doc = Document()
+    with set_curdoc(doc):
+        target1 = Target.from_spec(spec)
+        target2 = Target.from_spec(spec)
+
+        assert target1._pipelines['test'] is target2._pipelines['test']
+        for card in target1._cards:
+            scatter, line, table = card.views
+            assert scatter.pipeline is line.pipeline
+            assert table.pipeline.pipeline is scatter.pipeline
+            assert scatter.pipeline.pipeline is target1._pipelines['test']
+
+
 @pytest.mark.parametrize(
     "layout,error",
     [
@@ -1,9 +1,11 @@
 import os
 import pathlib
 
+import pandas as pd
 import param
+import pytest
 
-from lumen.transforms import Transform
+from lumen.transforms import Filter, Transform
 
 
 class CustomTransform(Transform):
@@ -43,3 +45,18 @@ def test_transform_control_options_by_reference(make_filesource):
         }]
     })
     assert transform.param.value.objects == ['foo1', 'foo2', 'foo3', 'foo4', 'foo5']
+
+
+@pytest.mark.parametrize('conditions,rows', [
+    ([('A', 1)], [0, 3]),
+    ([('A', (1, 3))], [0, 2, 3]),
+    ([('B', 'b')], [1, 3]),
+    ([('A', [1, 3]), ('B', ['a', 'b'])], [0, 3]),
+])
+def test_filter_nullable_dtypes(conditions, rows):
+    df = pd.DataFrame({
+        'A': pd.array([1, None, 3, 1], dtype='Int64'),
+        'B': pd.array(['a', 'b', None, 'b'], dtype='string'),
+    })
+    filtered = Filter.apply_to(df, conditions=conditions)
+    pd.testing.assert_frame_equal(filtered, df.iloc[rows])
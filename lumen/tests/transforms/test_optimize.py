@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from lumen.transforms import (
+    Astype, Columns, Filter, HistoryTransform, Iloc, Sort,
+)
+from lumen.transforms.optimize import SortHead, format_plan, optimize
+
+COLUMNS = ['A', 'B', 'C', 'D']
+
+
+def apply(transforms, df):
+    for transform in transforms:
+        df = transform.apply(df)
+    return df
+
+
+@pytest.mark.parametrize('by,ascending', [
+    (['A'], True), (['A'], False), (['B', 'A'], False), (['B', 'A'], [True, False]),
+    (['C'], True),
+])
+def test_sort_head(mixed_df, by, ascending):
+    transforms = [Sort(by=by, ascending=ascending), Iloc(end=3)]
+    optimized = optimize(transforms, COLUMNS)
+    assert [type(t) for t in optimized] == [SortHead]
+    pd.testing.assert_frame_equal(apply(optimized, mixed_df), apply(transforms, mixed_df))
+
+
+def test_sort_head_missing_values():
+    df = pd.DataFrame({'A': [1, np.nan, 3, np.nan], 'B': list('abcd')})
+    expected = df.iloc[[2, 0, 1]]
+    pd.testing.assert_frame_equal(SortHead(by=['A'], ascending=False, n=3).apply(df), expected)
+
+
+def test_filter_before_sort_and_astype(mixed_df):
+    transforms = [
+        Sort(by=['B']), Astype(dtypes={'A': 'int64'}),
+        Filter(conditions=[('C', ['foo1', 'foo3', 'foo4'])]),
+    ]
+    optimized = optimize(transforms, COLUMNS)
+    assert [type(t) for t in optimized] == [Filter, Sort, Astype]
+    pd.testing.assert_frame_equal(apply(optimized, mixed_df), apply(transforms, mixed_df))
+
+
+def test_filter_not_moved_before_modified_columns(mixed_df):
+    transforms = [Astype(dtypes={'A': 'int64'}), Filter(conditions=[('A', (1, 3))])]
+    assert optimize(transforms, COLUMNS) == transforms
+
+
+def test_drop_redundant_sort(mixed_df):
+    transforms = [
+        Sort(by=['A']), Filter(conditions=[('A', (1, 3))]), Sort(by=['B', 'A'], ascending=False)
+    ]
+    optimized = optimize(transforms, COLUMNS)
+    assert [type(t) for t in optimized] == [Filter, Sort]
+    pd.testing.assert_frame_equal(apply(optimized, mixed_df), apply(transforms, mixed_df))
+
+
+def test_sort_not_dropped_before_iloc():
+    transforms = [Sort(by=['A']), Iloc(start=1), Sort(by=['A'])]
+    assert optimize(transforms, COLUMNS) == transforms
+
+
+def test_prune_columns(mixed_df):
+    transforms = [
+        HistoryTransform(length=1), Columns(columns=['A', 'B', 'C']), Sort(by=['B']),
+        Astype(dtypes={'A': 'int64'}), Columns(columns=['A'])
+    ]
+    optimized = optimize(transforms, COLUMNS)
+    assert [type(t) for t in optimized] == [HistoryTransform, Columns, Sort, Astype, Columns]
+    assert optimized[1].columns == ['A', 'B']
+    pd.testing.assert_frame_equal(apply(optimized, mixed_df), apply(transforms, mixed_df))
+
+
+def test_prune_columns_unknown_columns():
+    transforms = [
+        HistoryTransform(date_column='E', length=1), Astype(dtypes={'A': 'int64'}),
+        Columns(columns=['A', 'E'])
+    ]
+    assert optimize(transforms, COLUMNS) == transforms
+
+
+def test_format_plan():
+    plan = format_plan([Filter(conditions=[('A', 1)]), Iloc(end=2)])
+    assert plan == "1. Filter(conditions=[('A', 1)])\n2. Iloc(end=2)"
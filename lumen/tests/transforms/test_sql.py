@@ -0,0 +1,171 @@
+import datetime as dt
+import itertools
+import sqlite3
+
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from lumen.transforms.sql import (
+    SQLColumns, SQLCount, SQLDistinct, SQLFilter, SQLGroupBy, SQLLimit,
+    SQLOrderBy, SQLSample, SQLTimeBucket, SQLTransform, compose_sql,
+    compose_sql_params,
+)
+
+SQL = 'SELECT * FROM test'
+
+
+@pytest.fixture
+def conn():
+    df = pd._testing.makeMixedDataFrame()
+    df['D'] = df['D'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    conn = sqlite3.connect(':memory:')
+    df.to_sql('test', conn, index=False)
+    yield conn
+    conn.close()
+
+
+def nested_sql(sql_in, transforms):
+    for transform in transforms:
+        sql_in = transform.apply(sql_in)
+    return sql_in
+
+
+@pytest.mark.parametrize('transforms,flat', [
+    ([SQLFilter(conditions=[('A', (1, 3))]), SQLLimit(limit=2)], True),
+    ([SQLFilter(conditions=[('C', ['foo1', 'foo3', None])]), SQLColumns(columns=['A', 'C'])], True),
+    ([SQLFilter(conditions=[('A', [(0, 1), (3, 4)]), ('B', 1.0)])], True),
+    ([SQLFilter(conditions=[('D', dt.date(2009, 1, 2))]), SQLColumns(columns=['A'])], True),
+    ([SQLFilter(conditions=[('A', (0, 4))]), SQLFilter(conditions=[('B', 0.0)])], True),
+    ([SQLColumns(columns=['A', 'B']), SQLGroupBy(by=['B'], aggregates={'SUM': 'A'})], True),
+    ([SQLFilter(conditions=[('C', ['foo1', 'foo2'])]), SQLGroupBy(by=['B'], aggregates={'MAX': 'A'}), SQLLimit(limit=1)], True),
+    ([SQLFilter(conditions=[('A', (1, 4))]), SQLDistinct(columns=['B']), SQLLimit(limit=5)], True),
+    ([SQLLimit(limit=3), SQLColumns(columns=['A'])], True),
+    ([SQLLimit(limit=3), SQLLimit(limit=2)], True),
+    ([SQLFilter(conditions=[('B', 1.0)]), SQLOrderBy(by=['A'], ascending=False), SQLLimit(limit=1)], True),
+    ([SQLGroupBy(by=['B'], aggregates={'SUM': ['A']}), SQLOrderBy(by=['A', 'B'], ascending=[False, True])], True),
+    ([SQLLimit(limit=3), SQLOrderBy(by=['A'], ascending=False)], False),
+    ([SQLLimit(limit=3), SQLFilter(conditions=[('A', (1, 4))])], False),
+    ([SQLGroupBy(by=['B'], aggregates={'SUM': 'A'}), SQLFilter(conditions=[('A', 1)])], False),
+    ([SQLDistinct(columns=['B', 'C']), SQLColumns(columns=['B'])], False),
+    ([SQLFilter(conditions=[('A', (1, 4))]), SQLCount()], False),
+])
+def test_compose_sql_matches_nested(conn, transforms, flat):
+    sql = compose_sql(SQL, transforms)
+    assert (sql.count('FROM') == 2) is flat
+    expected = pd.read_sql(nested_sql(SQL, transforms), conn)
+    pd.testing.assert_frame_equal(pd.read_sql(sql, conn), expected)
+
+    sql, params = compose_sql_params(SQL, transforms)
+    pd.testing.assert_frame_equal(pd.read_sql(sql, conn, params=params), expected)
+
+
+def test_compose_sql_no_transforms():
+    assert compose_sql(SQL, []) == SQL
+    assert compose_sql(SQL, [SQLFilter(conditions=[])]) == SQL
+
+
+def test_sql_transform_render_memoized():
+    transform = SQLLimit(limit=5)
+    sql = transform.apply(SQL)
+    composed = compose_sql(SQL, [transform])
+    with patch('lumen.transforms.sql._get_template') as get_template:
+        assert SQLLimit(limit=5).apply(SQL) == sql
+        assert compose_sql(SQL, [SQLLimit(limit=5)]) == composed
+    get_template.assert_not_called()
+    assert SQLLimit(limit=6).apply(SQL) != sql
+
+
+def test_sql_transform_render_not_memoized_by_default():
+    counter = itertools.count()
+
+    class CountingTransform(SQLTransform):
+
+        def apply(self, sql_in):
+            return f'{sql_in} -- {next(counter)}'
+
+    transform = CountingTransform()
+    assert transform.apply(SQL) != transform.apply(SQL)
+    assert compose_sql(SQL, [transform]) != compose_sql(SQL, [transform])
+
+
+def test_sql_transform_render_key_distinguishes_values():
+    values = np.arange(2000)
+    other = values.copy()
+    other[1000] = -1
+    filters = [
+        SQLFilter(conditions=[('A', list(values))]),
+        SQLFilter(conditions=[('A', list(other))]),
+    ]
+    assert filters[0]._render_key() != filters[1]._render_key()
+    assert filters[0].apply(SQL) != filters[1].apply(SQL)
+    assert SQLLimit(limit=1)._render_key() != SQLLimit(limit=True)._render_key()
+    assert SQLFilter(conditions=[('A', {1, 2})])._render_key() is None
+
+
+def test_sql_order_by_nulls_last_dialects():
+    order = SQLOrderBy(by=['A', 'B'], ascending=[True, False], nulls_last=True)
+    assert 'ORDER BY A NULLS LAST, B DESC NULLS LAST' in order.apply(SQL)
+    order = SQLOrderBy(by=['A'], ascending=False, nulls_last=True, dialect='mysql')
+    assert 'ORDER BY A IS NULL, A DESC' in order.apply(SQL)
+
+
+def test_sql_sample_size(conn):
+    sql = SQLSample(size=3, dialect='sqlite').apply(SQL)
+    df = pd.read_sql(sql, conn)
+    assert len(df) == 3
+    assert df.A.is_unique
+
+
+def test_sql_sample_percent(conn):
+    assert len(pd.read_sql(SQLSample(percent=100, dialect='sqlite').apply(SQL), conn)) == 5
+    assert len(pd.read_sql(SQLSample(percent=0, dialect='sqlite').apply(SQL), conn)) == 0
+
+
+def test_sql_sample_dialects():
+    assert 'ORDER BY RAND()' in SQLSample(size=3, dialect='mysql').apply(SQL)
+    assert 'WHERE RANDOM() < 0.1' in SQLSample(percent=10).apply(SQL)
+    assert 'USING SAMPLE 3 ROWS (reservoir, 1)' in SQLSample(
+        size=3, seed=1, dialect='duckdb'
+    ).apply(SQL)
+
+
+@pytest.mark.parametrize('interval,width,expected', [
+    ('day', 1, {'2009-01-01 00:00:00': 0, '2009-01-02 00:00:00': 1,
+                '2009-01-05 00:00:00': 2, '2009-01-06 00:00:00': 3,
+                '2009-01-07 00:00:00': 4}),
+    ('week', 1, {'2008-12-29 00:00:00': 1, '2009-01-05 00:00:00': 9}),
+    ('day', 2, {'2008-12-31 00:00:00': 0, '2009-01-02 00:00:00': 1,
+                '2009-01-04 00:00:00': 2, '2009-01-06 00:00:00': 7}),
+])
+def test_sql_time_bucket_sqlite(conn, interval, width, expected):
+    transform = SQLTimeBucket(
+        date_column='D', interval=interval, width=width,
+        aggregates={'SUM': 'A'}, dialect='sqlite'
+    )
+    df = pd.read_sql(transform.apply(SQL), conn)
+    assert dict(zip(df.D, df.A)) == expected
+
+
+def test_sql_time_bucket_dialects():
+    kwargs = dict(date_column='D', aggregates={'COUNT': 'A'}, by=['C'])
+    assert "date_trunc('hour', D) AS D, C, COUNT(A) AS A" in SQLTimeBucket(
+        interval='hour', **kwargs
+    ).apply(SQL)
+    assert "time_bucket(INTERVAL '900 seconds', D, TIMESTAMP '1970-01-01')" in SQLTimeBucket(
+        interval='minute', width=15, dialect='duckdb', **kwargs
+    ).apply(SQL)
+    assert "DATE_FORMAT(D, '%Y-%m-01 00:00:00')" in SQLTimeBucket(
+        interval='month', dialect='mysql', **kwargs
+    ).apply(SQL)
+    with pytest.raises(ValueError):
+        SQLTimeBucket(interval='month', width=2, **kwargs).apply(SQL)
+
+
+def test_compose_sql_dialect():
+    sample = SQLSample(size=2)
+    assert 'USING SAMPLE' in compose_sql(SQL, [sample], dialect='duckdb')
+    assert 'RANDOM()' in compose_sql(SQL, [sample])
+    assert sample.dialect is None
@@ -2,11 +2,15 @@ from pathlib import Path
 
 import pandas as pd
 
+from lumen.filters import ConstantFilter
 from lumen.panel import DownloadButton
+from lumen.pipeline import Pipeline
 from lumen.sources import FileSource
+from lumen.sources.intake_sql import IntakeSQLSource
 from lumen.state import state
 from lumen.variables import Variables
-from lumen.views import View, hvPlotView
+from lumen.transforms import Columns, Iloc
+from lumen.views import Table, View, hvPlotView
 
 
 def test_resolve_module_type():
@@ -92,3 +96,72 @@ def test_view_hvplot_download(set_root):
 
     button._on_click()
     assert button.data.startswith('data:text/plain;charset=UTF-8;base64')
+
+
+def test_view_table_paginate_sql(mixed_df):
+    root = Path(__file__).parent.parent / 'sources'
+    source = IntakeSQLSource(uri=str(root / 'catalog.yml'), root=str(root))
+    cfilter = ConstantFilter(field='A', value=(1, 4))
+    pipeline = Pipeline(source=source, table='test_sql', filters=[cfilter])
+    table = Table(pipeline=pipeline, paginate=True, page_size=3)
+
+    # The pipeline of the caller is not modified
+    assert not pipeline.lazy
+    assert table.pipeline is not pipeline
+    assert table.pipeline.lazy
+
+    # The row count is queried before the first page is rendered
+    assert table
+    assert table.pipeline.__dict__.get('_data_param_value') is None
+    tabulator, pager = table.panel
+    pd.testing.assert_frame_equal(
+        tabulator.value, mixed_df.iloc[1:4].reset_index(drop=True)
+    )
+    assert pager[1].object == 'of 2 (4 rows)'
+
+    table.page = 2
+    pd.testing.assert_frame_equal(
+        tabulator.value, mixed_df.iloc[4:5].reset_index(drop=True)
+    )
+
+    table._update_sorters(type('Event', (), {'new': [{'field': 'A', 'dir': 'desc'}]}))
+    pd.testing.assert_frame_equal(
+        tabulator.value, mixed_df.iloc[[1]].reset_index(drop=True)
+    )
+
+    # Filter change clamps page and does not query the full table
+    cfilter.value = (0, 1)
+    assert table.pipeline.__dict__.get('_data_param_value') is None
+    assert table.page == 1
+    assert pager[1].object == 'of 1 (2 rows)'
+
+
+def test_view_table_paginate_sql_chained(mixed_df):
+    root = Path(__file__).parent.parent / 'sources'
+    source = IntakeSQLSource(uri=str(root / 'catalog.yml'), root=str(root))
+    pipeline = Pipeline(source=source, table='test_sql')
+    chained = pipeline.branch(
+        filters=[ConstantFilter(field='A', value=(1, 4))],
+        transforms=[Columns(columns=['A', 'C'])]
+    )
+    table = Table(pipeline=chained, paginate=True, page_size=3)
+    table.page = 2
+    tabulator, pager = table.panel
+    pd.testing.assert_frame_equal(
+        tabulator.value, mixed_df.iloc[4:5][['A', 'C']].reset_index(drop=True)
+    )
+    assert pager[1].object == 'of 2 (4 rows)'
+
+    # The pages are queried without loading the full chained table
+    assert table.pipeline.__dict__.get('_data_param_value') is None
+
+
+def test_view_table_paginate_chained_fallback_warns(mixed_df, caplog):
+    root = Path(__file__).parent.parent / 'sources'
+    source = IntakeSQLSource(uri=str(root / 'catalog.yml'), root=str(root))
+    pipeline = Pipeline(source=source, table='test_sql')
+    chained = pipeline.branch(transforms=[Iloc(start=1)])
+    table = Table(pipeline=chained, paginate=True, page_size=3)
+    tabulator, pager = table.panel
+    pd.testing.assert_frame_equal(tabulator.value, mixed_df.iloc[1:4])
+    assert 'pagination falls back' in caplog.text
@@ -2,7 +2,10 @@
 The Transform components allow transforming tables in arbitrary ways.
 """
 
+import ast
 import datetime as dt
+import io
+import tokenize
 
 import numpy as np
 import pandas as pd
@@ -25,8 +28,22 @@ class Transform(Component):
 
     transform_type = None
 
+    # Whether apply returns a new table which shares no data with its
+    # input or any other table, allowing it to be modified in place
+    _copies = False
+
+    # Whether the output of apply only depends on the input table and
+    # the parameter values, allowing the output to be memoized. Only
+    # declared by transforms known to be pure.
+    _deterministic = False
+
     _field_params = []
 
+    # Whether the SQL the transform compiles to may return the rows in
+    # a different order, in which case it is only pushed down if a Sort
+    # is pushed down after it
+    _sql_unordered = False
+
     __abstract = True
 
     @classmethod
@@ -124,6 +141,78 @@ class Transform(Component):
         """
         return table
 
+    def _apply_inplace(self, table):
+        """
+        Applies the transform to a table owned by the caller, which
+        may be modified in place instead of being copied.
+
+        Parameters
+        ----------
+        table : DataFrame
+            The table to transform, which no one else holds a
+            reference to.
+
+        Returns
+        -------
+        DataFrame
+            A DataFrame containing the transformed data.
+        """
+        return self.apply(table)
+
+    def _stage_key(self):
+        """
+        Returns a key which identifies the output of the transform for
+        a given input table, allowing a Pipeline to reuse the output
+        while the input and parameters are unchanged.
+
+        Returns
+        -------
+        None or tuple
+            None if the output cannot be memoized, otherwise a key
+            derived from the type and parameter values.
+        """
+        if not self._deterministic:
+            return None
+        return (type(self), str(tuple(sorted([
+            (k, v) for k, v in self.param.values().items()
+            if k not in Transform.param
+        ]))))
+
+    def _referenced_columns(self):
+        """
+        Returns the columns the transform reads if it preserves all
+        other columns as they are, which allows columns not used by
+        subsequent transforms to be pruned before it is applied.
+
+        Returns
+        -------
+        None or list(str)
+            None if the transform may add, remove or depend on
+            arbitrary columns, otherwise the referenced columns.
+        """
+        return None
+
+    def _to_sql(self, columns):
+        """
+        Compiles the transform to equivalent SQLTransforms, allowing
+        a Pipeline to push it down into an SQL capable Source.
+
+        Parameters
+        ----------
+        columns : list(str)
+            The columns of the table the transform is applied to.
+
+        Returns
+        -------
+        None or tuple(list(SQLTransform), list(str), callable)
+            None if the transform cannot be expressed in SQL, otherwise
+            the SQLTransforms, the columns of the transformed table
+            and optionally a function applied to the queried data to
+            complete the transform (no further transforms are then
+            pushed down).
+        """
+        return None
+
     @property
     def control_panel(self):
         return pn.Param(
@@ -156,6 +245,12 @@ class Filter(Transform):
       List of filter conditions expressed as tuples of the column
       name and the filter value.""")
 
+    _copies = True
+
+    _deterministic = True
+
+    _sql_unordered = True
+
     @classmethod
     def _range_filter(cls, column, start, end):
         if column.dtype.kind == 'M':
@@ -212,9 +307,37 @@ class Filter(Transform):
             mask = filters[0]
             for f in filters[1:]:
                 mask &= f
-            df = df[mask]
+            if isinstance(df, pd.DataFrame):
+                # Unlike boolean indexing taking the rows does not
+                # mark the result as a view of the input
+                df = df.take(np.flatnonzero(mask.to_numpy(dtype=bool, na_value=False)))
+            else:
+                df = df[mask]
         return df
 
+    def _referenced_columns(self):
+        return [k for k, _ in self.conditions]
+
+    @classmethod
+    def _sql_compatible(cls, val):
+        """
+        Whether an SQLFilter matches the same rows as the filter value.
+        Unlike the Filter an SQLFilter matches missing values and whole
+        days for a date, so values containing None or dates are not.
+        """
+        values = val if isinstance(val, (list, tuple)) else [val]
+        values = [v for item in values for v in (item if isinstance(item, tuple) else (item,))]
+        return not any(
+            v is None or isinstance(v, (dt.date, np.datetime64)) for v in values
+        )
+
+    def _to_sql(self, columns):
+        from .sql import SQLFilter
+        conditions = [(k, v) for k, v in self.conditions if k in columns]
+        if not all(self._sql_compatible(v) for _, v in conditions):
+            return None
+        return [SQLFilter(conditions=conditions)], columns, None
+
 
 class HistoryTransform(Transform):
     """
@@ -231,6 +354,8 @@ class HistoryTransform(Transform):
 
     transform_type = 'history'
 
+    _copies = True
+
     _field_params = ['date_column']
 
     def __init__(self, **params):
@@ -255,7 +380,12 @@ class HistoryTransform(Transform):
         """
         if self.date_column:
             table = table.copy()
-            table[self.date_column] = dt.datetime.now()
+        return self._apply_inplace(table)
+
+    def _apply_inplace(self, table):
+        if self.date_column:
+            with pd.option_context('mode.chained_assignment', None):
+                table[self.date_column] = dt.datetime.now()
         self._buffer.append(table)
         self._buffer[:] = self._buffer[-self.length:]
         return pd.concat(self._buffer)
@@ -285,6 +415,10 @@ class Aggregate(Transform):
 
     transform_type = 'aggregate'
 
+    _copies = True
+
+    _deterministic = True
+
     _field_params = ['by', 'columns']
 
     def apply(self, table):
@@ -294,6 +428,27 @@ class Aggregate(Transform):
         agg = getattr(grouped, self.method)(**self.kwargs)
         return agg if self.with_index else agg.reset_index()
 
+    _sql_methods = {
+        'count': 'COUNT', 'max': 'MAX', 'mean': 'AVG', 'min': 'MIN', 'sum': 'SUM'
+    }
+
+    def _to_sql(self, columns):
+        from .sql import SQLGroupBy, SQLOrderBy
+        if self.method not in self._sql_methods or self.kwargs or not self.columns:
+            return None
+        by = self.by if isinstance(self.by, list) else [self.by]
+        aggregates = {self._sql_methods[self.method]: list(self.columns)}
+        sql_transforms = [
+            SQLGroupBy(by=by, aggregates=aggregates), SQLOrderBy(by=by)
+        ]
+
+        # pandas drops groups with missing keys and indexes by the keys
+        def finalize(df):
+            df = df.dropna(subset=by).reset_index(drop=True)
+            return df.set_index(by) if self.with_index else df
+
+        return sql_transforms, by+list(self.columns), finalize
+
 
 class Sort(Transform):
     """
@@ -312,11 +467,26 @@ class Sort(Transform):
 
     transform_type = 'sort'
 
+    _copies = True
+
+    _deterministic = True
+
     _field_params = ['by']
 
     def apply(self, table):
         return table.sort_values(self.by, ascending=self.ascending)
 
+    def _referenced_columns(self):
+        return list(self.by)
+
+    def _to_sql(self, columns):
+        from .sql import SQLOrderBy
+        if not all(col in columns for col in self.by):
+            return None
+        # pandas sorts missing values last
+        order = SQLOrderBy(by=self.by, ascending=self.ascending, nulls_last=True)
+        return [order], columns, None
+
 
 class Query(Transform):
     """
@@ -330,9 +500,84 @@ class Query(Transform):
 
     transform_type = 'query'
 
+    _deterministic = True
+
+    _sql_unordered = True
+
     def apply(self, table):
         return table.query(self.query)
 
+    _sql_operators = {
+        '==': '=', '!=': '!=', '<': '<', '<=': '<=', '>': '>', '>=': '>=',
+        '(': '(', ')': ')', 'and': 'AND', 'or': 'OR', '&': 'AND', '|': 'OR'
+    }
+
+    def _to_sql(self, columns):
+        """
+        Translates simple boolean expressions of column comparisons
+        to SQL, e.g. "A > 1 and C == 'foo'". Negations are not
+        translated since comparisons against missing values are False
+        in pandas but NULL in SQL.
+        """
+        from .sql import SQLFilter
+        try:
+            tokens = list(tokenize.generate_tokens(io.StringIO(self.query).readline))
+        except (tokenize.TokenError, IndentationError):
+            return None
+        sql, operands, comparisons = [], [], 0
+        for token in tokens:
+            if token.type in (tokenize.NEWLINE, tokenize.ENDMARKER):
+                continue
+            elif token.string in self._sql_operators:
+                op = self._sql_operators[token.string]
+                if op in '()' or op.isalpha():
+                    comparisons = 0
+                else:
+                    # Chained comparisons have no SQL equivalent
+                    comparisons += 1
+                    if comparisons > 1:
+                        return None
+                sql.append(op)
+                continue
+            elif token.type == tokenize.NAME and token.string in columns:
+                sql.append(token.string)
+            elif token.type == tokenize.NUMBER:
+                # Python number literals (e.g. 1_000 or 0x10) are not
+                # valid SQL so they are normalized
+                try:
+                    value = ast.literal_eval(token.string)
+                except Exception:
+                    return None
+                if not isinstance(value, (int, float)):
+                    return None
+                sql.append(repr(value))
+            elif token.type == tokenize.STRING:
+                try:
+                    value = ast.literal_eval(token.string)
+                except Exception:
+                    return None
+                if not isinstance(value, str):
+                    return None
+                sql.append("'{}'".format(value.replace("'", "''")))
+            else:
+                return None
+            operands.append(len(sql)-1)
+
+        # pandas evaluates != against missing values as True
+        for i, op in enumerate(list(sql)):
+            if op != '!=':
+                continue
+            elif i-1 not in operands or i+1 not in operands:
+                return None
+            nulls = [
+                f'{sql[j]} IS NULL' for j in (i-1, i+1)
+                if sql[j] in columns
+            ]
+            if nulls:
+                sql[i-1] = f'({sql[i-1]}'
+                sql[i+1] = f"{sql[i+1]} OR {' OR '.join(nulls)})"
+        return [SQLFilter(expression=' '.join(sql))], columns, None
+
 
 class Columns(Transform):
     """
@@ -346,11 +591,21 @@ class Columns(Transform):
 
     transform_type = 'columns'
 
+    _copies = True
+
+    _deterministic = True
+
     _field_params = ['columns']
 
     def apply(self, table):
         return table[self.columns]
 
+    def _to_sql(self, columns):
+        from .sql import SQLColumns
+        if not all(col in columns for col in self.columns):
+            return None
+        return [SQLColumns(columns=self.columns)], list(self.columns), None
+
 
 class Astype(Transform):
     """
@@ -361,12 +616,22 @@ class Astype(Transform):
 
     transform_type = 'as_type'
 
+    _copies = True
+
+    _deterministic = True
+
     def apply(self, table):
-        table = table.copy()
-        for col, dtype in self.dtypes.items():
-            table[col] = table[col].astype(dtype)
+        return self._apply_inplace(table.copy())
+
+    def _apply_inplace(self, table):
+        with pd.option_context('mode.chained_assignment', None):
+            for col, dtype in self.dtypes.items():
+                table[col] = table[col].astype(dtype)
         return table
 
+    def _referenced_columns(self):
+        return list(self.dtypes)
+
 
 class Stack(Transform):
     """
@@ -386,6 +651,8 @@ class Stack(Transform):
 
     transform_type = 'stack'
 
+    _deterministic = True
+
     def apply(self, table):
         return table.stack(level=self.level, dropna=self.dropna)
 
@@ -405,6 +672,8 @@ class Unstack(Transform):
 
     transform_type = 'unstack'
 
+    _deterministic = True
+
     def apply(self, table):
         return table.unstack(level=self.level, fill_value=self.fill_value)
 
@@ -422,9 +691,20 @@ class Iloc(Transform):
 
     transform_type = 'iloc'
 
+    _deterministic = True
+
     def apply(self, table):
         return table.iloc[self.start:self.end]
 
+    def _referenced_columns(self):
+        return []
+
+    def _to_sql(self, columns):
+        from .sql import SQLLimit
+        if self.start or self.end is None or self.end < 0:
+            return None
+        return [SQLLimit(limit=self.end)], columns, None
+
 
 class Sample(Transform):
     """
@@ -455,6 +735,8 @@ class Compute(Transform):
 
     transform_type = 'compute'
 
+    _deterministic = True
+
     def apply(self, table):
         return table.compute()
 
@@ -477,6 +759,8 @@ class Pivot(Transform):
 
     transform_type = 'pivot'
 
+    _deterministic = True
+
     def apply(self, table):
         return table.pivot(index=self.index, columns=self.columns, values=self.values)
 
@@ -507,6 +791,8 @@ class Melt(Transform):
 
     transform_type = 'melt'
 
+    _deterministic = True
+
     _field_params = ['id_vars', 'value_vars']
 
     def apply(self, table):
@@ -539,6 +825,8 @@ class SetIndex(Transform):
 
     transform_type = 'set_index'
 
+    _deterministic = True
+
     _field_params = ['keys']
 
     def apply(self, table):
@@ -574,6 +862,8 @@ class ResetIndex(Transform):
 
     transform_type = 'reset_index'
 
+    _deterministic = True
+
     def apply(self, table):
         return table.reset_index(
             drop=self.drop, col_fill=self.col_fill, col_level=self.col_level,
@@ -612,6 +902,8 @@ class Rename(Transform):
 
     transform_type = 'rename'
 
+    _deterministic = True
+
     def apply(self, table):
         return table.rename(
             axis=self.axis, columns=self.columns, copy=self.copy,
@@ -653,6 +945,8 @@ class RenameAxis(Transform):
 
     transform_type = 'rename_axis'
 
+    _deterministic = True
+
     def apply(self, table):
         return table.rename_axis(
             axis=self.axis, columns=self.columns, copy=self.copy,
@@ -671,12 +965,22 @@ class project_lnglat(Transform):
 
     transform_type = 'project_lnglat'
 
+    _copies = True
+
+    _deterministic = True
+
     def apply(self, table):
-        table = table.copy()
+        return self._apply_inplace(table.copy())
+
+    def _apply_inplace(self, table):
         longitude = table[self.longitude]
         latitude = table[self.latitude]
 
         origin_shift = np.pi * 6378137
-        table[self.longitude] = longitude * origin_shift / 180.0
-        table[self.latitude] = np.log(np.tan((90 + latitude) * np.pi / 360.0)) * origin_shift / np.pi
+        with pd.option_context('mode.chained_assignment', None):
+            table[self.longitude] = longitude * origin_shift / 180.0
+            table[self.latitude] = np.log(np.tan((90 + latitude) * np.pi / 360.0)) * origin_shift / np.pi
         return table
+
+    def _referenced_columns(self):
+        return [self.longitude, self.latitude]
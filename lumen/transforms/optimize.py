@@ -0,0 +1,231 @@
+"""
+Rule based optimizer rewriting chains of Transforms into cheaper
+equivalents before they are applied by a Pipeline.
+"""
+
+import pandas as pd
+import param
+
+from .base import (
+    Astype, Columns, Filter, Iloc, Sort, Transform, project_lnglat,
+)
+
+
+class SortHead(Transform):
+    """
+    Selects the first n rows of the table sorted by one or more
+    columns, equivalent to a Sort followed by an Iloc selecting the
+    head of the table. Uses `pandas.DataFrame.nlargest` or
+    `pandas.DataFrame.nsmallest`, which avoid sorting the whole
+    table, if the columns are numeric and sorted in one direction.
+
+    df.sort_values(<by>, ascending=<ascending>).iloc[:<n>]
+    """
+
+    ascending = param.ClassSelector(default=True, class_=(bool, list), doc="""
+       Sort ascending vs. descending. Specify list for multiple sort
+       orders.""")
+
+    by = param.List(default=[], doc="""
+       Columns to sort by.""")
+
+    n = param.Integer(default=0, bounds=(0, None), doc="""
+       Number of rows to select.""")
+
+    _copies = True
+
+    _deterministic = True
+
+    def apply(self, table):
+        ascending = self.ascending
+        if isinstance(ascending, list):
+            ascending = ascending[0] if len(set(ascending)) == 1 else None
+        if (isinstance(table, pd.DataFrame) and ascending is not None and
+            all(table[col].dtype.kind in 'iufM' for col in self.by)):
+            select = table.nsmallest if ascending else table.nlargest
+            selected = select(self.n, self.by)
+            # Rows with missing values are dropped by nlargest and
+            # nsmallest whereas they are sorted last by sort_values
+            if len(selected) == min(self.n, len(table)):
+                return selected
+        return table.sort_values(self.by, ascending=self.ascending).iloc[:self.n]
+
+    def _referenced_columns(self):
+        return list(self.by)
+
+
+def _modified_columns(transform):
+    """
+    Returns the columns modified by a transform which maps each row
+    independently of all other rows, otherwise None.
+    """
+    if type(transform) is Astype:
+        return list(transform.dtypes)
+    elif type(transform) is project_lnglat:
+        return [transform.longitude, transform.latitude]
+    return None
+
+
+def _fuse_filters(transforms, columns):
+    """
+    Combines consecutive Filters so the rows are selected once.
+    """
+    for i, (t1, t2) in enumerate(zip(transforms[:-1], transforms[1:])):
+        if type(t1) is Filter and type(t2) is Filter:
+            fused = Filter(conditions=t1.conditions+t2.conditions)
+            return transforms[:i] + [fused] + transforms[i+2:]
+
+
+def _fuse_columns(transforms, columns):
+    """
+    Drops Columns which are followed by a selection of a subset of
+    their columns.
+    """
+    for i, (t1, t2) in enumerate(zip(transforms[:-1], transforms[1:])):
+        if (type(t1) is Columns and type(t2) is Columns and
+            all(col in t1.columns for col in t2.columns)):
+            return transforms[:i] + transforms[i+1:]
+
+
+def _filter_early(transforms, columns):
+    """
+    Applies Filters before preceding Sorts and row-wise transforms
+    which do not modify the filtered columns, so those transforms
+    process fewer rows.
+    """
+    for i, (t1, t2) in enumerate(zip(transforms[:-1], transforms[1:])):
+        if type(t2) is not Filter:
+            continue
+        modified = [] if type(t1) is Sort else _modified_columns(t1)
+        if modified is None or any(col in modified for col in t2._referenced_columns()):
+            continue
+        return transforms[:i] + [t2, t1] + transforms[i+2:]
+
+
+def _drop_redundant_sorts(transforms, columns):
+    """
+    Drops Sorts whose order is overridden by a subsequent Sort on a
+    superset of the columns, when only Filters, Columns or row-wise
+    transforms are applied in between.
+    """
+    for i, transform in enumerate(transforms):
+        if type(transform) is not Sort:
+            continue
+        for subsequent in transforms[i+1:]:
+            if type(subsequent) is Sort:
+                if set(transform.by) <= set(subsequent.by):
+                    return transforms[:i] + transforms[i+1:]
+                break
+            elif (type(subsequent) not in (Filter, Columns) and
+                  _modified_columns(subsequent) is None):
+                break
+
+
+def _sort_head(transforms, columns):
+    """
+    Replaces a Sort followed by an Iloc selecting the head of the
+    table with a SortHead.
+    """
+    for i, (t1, t2) in enumerate(zip(transforms[:-1], transforms[1:])):
+        if (type(t1) is Sort and type(t2) is Iloc and not t2.start and
+            t2.end is not None and t2.end >= 0):
+            head = SortHead(by=list(t1.by), ascending=t1.ascending, n=t2.end)
+            return transforms[:i] + [head] + transforms[i+2:]
+
+
+def _prune_columns(transforms, columns):
+    """
+    Selects Columns before the preceding transforms which preserve
+    all other columns, so those transforms copy and process fewer
+    columns. The columns read by the skipped transforms are retained
+    and dropped again after they have been applied.
+    """
+    known = [list(columns)]
+    for transform in transforms:
+        if isinstance(transform, Columns):
+            known.append(list(transform.columns))
+        elif known[-1] is not None and transform._referenced_columns() is not None:
+            known.append(known[-1])
+        else:
+            known.append(None)
+    for i, transform in enumerate(transforms):
+        if type(transform) is not Columns:
+            continue
+        start = i
+        while (start and known[start-1] is not None and
+               transforms[start-1]._referenced_columns() is not None):
+            start -= 1
+        if start == i:
+            continue
+        referenced = [
+            col for t in transforms[start:i] for col in t._referenced_columns()
+        ]
+        selected = list(transform.columns) + [
+            col for col in dict.fromkeys(referenced)
+            if col in known[start] and col not in transform.columns
+        ]
+        if len(selected) >= len(known[start]):
+            continue
+        pruned = transforms[:start] + [Columns(columns=selected)] + transforms[start:i]
+        if len(selected) > len(transform.columns):
+            pruned.append(transform)
+        return pruned + transforms[i+1:]
+
+
+_RULES = [
+    _fuse_filters, _fuse_columns, _filter_early, _drop_redundant_sorts, _sort_head,
+    _prune_columns
+]
+
+
+def optimize(transforms, columns, max_iterations=100):
+    """
+    Rewrites a chain of transforms into a cheaper equivalent by
+    repeatedly applying the first matching rewrite rule until none
+    of the rules match.
+
+    Arguments
+    ---------
+    transforms: list(Transform)
+        The transforms to optimize.
+    columns: list(str)
+        The columns of the table the transforms are applied to.
+    max_iterations: int
+        The maximum number of rewrites to apply.
+
+    Returns
+    -------
+    The list of rewritten transforms.
+    """
+    transforms = list(transforms)
+    for _ in range(max_iterations):
+        for rule in _RULES:
+            rewritten = rule(transforms, columns)
+            if rewritten is not None:
+                transforms = rewritten
+                break
+        else:
+            break
+    return transforms
+
+
+def _is_default(parameter, value):
+    try:
+        return bool(value is parameter.default or value == parameter.default)
+    except Exception:
+        return False
+
+
+def format_plan(transforms):
+    """
+    Formats a chain of transforms as a numbered list of the
+    transforms and their non-default parameter values.
+    """
+    lines = []
+    for i, transform in enumerate(transforms):
+        args = ', '.join(
+            f'{k}={v!r}' for k, v in transform.param.values().items()
+            if k != 'name' and not _is_default(transform.param[k], v)
+        )
+        lines.append(f'{i+1}. {type(transform).__name__}({args})')
+    return '\n'.join(lines)
@@ -1,4 +1,8 @@
 import datetime as dt
+import hashlib
+import threading
+
+from functools import lru_cache, wraps
 
 import numpy as np
 import param
@@ -7,6 +11,82 @@ from jinja2 import Template
 
 from .base import Transform
 
+# Rendered SQL indexed by the transform(s) and the input SQL
+_RENDER_CACHE = {}
+
+_RENDER_CACHE_SIZE = 1024
+
+_RENDER_LOCK = threading.Lock()
+
+
+def _aggregate_columns(aggregates):
+    """
+    Returns the SELECT expressions for a mapping of aggregate functions
+    to a column or list of columns.
+    """
+    return [
+        f'{agg}({col}) AS {col}' for agg, cols in aggregates.items()
+        for col in ([cols] if isinstance(cols, str) else cols)
+    ]
+
+
+@lru_cache(maxsize=None)
+def _get_template(template):
+    """
+    Returns the compiled jinja2 Template for a template string.
+    """
+    return Template(template, trim_blocks=True, lstrip_blocks=True)
+
+
+def _hash_key(value):
+    """
+    Converts a parameter value to a hashable key which distinguishes
+    values of different types and contents, raising a TypeError if
+    the value cannot be hashed.
+    """
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_hash_key(v) for v in value))
+    elif isinstance(value, dict):
+        # The order of the items may affect the rendered SQL
+        return ('dict', tuple((_hash_key(k), _hash_key(v)) for k, v in value.items()))
+    elif isinstance(value, np.ndarray):
+        if value.dtype.kind == 'O':
+            return ('ndarray', value.shape, _hash_key(value.ravel().tolist()))
+        digest = hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()
+        return ('ndarray', value.dtype.str, value.shape, digest)
+    hash(value)
+    return (type(value).__name__, value)
+
+
+def _memoized(key, render):
+    """
+    Returns the memoized result for the key, rendering and caching
+    it if it is not yet cached. A key of None disables memoization.
+    """
+    if key is None:
+        return render()
+    with _RENDER_LOCK:
+        if key in _RENDER_CACHE:
+            return _RENDER_CACHE[key]
+    result = render()
+    with _RENDER_LOCK:
+        if len(_RENDER_CACHE) >= _RENDER_CACHE_SIZE:
+            del _RENDER_CACHE[next(iter(_RENDER_CACHE))]
+        _RENDER_CACHE[key] = result
+    return result
+
+
+def _binder(params):
+    """
+    Returns a function which adds a value to the params dict and
+    returns a named bind parameter referencing it.
+    """
+    def bind(value):
+        name = f'lumen_param_{len(params)}'
+        params[name] = value.item() if isinstance(value, np.generic) else value
+        return f':{name}'
+    return bind
+
 
 class SQLTransform(Transform):
     """
@@ -14,8 +94,35 @@ class SQLTransform(Transform):
     Mainly for informational purposes.
     """
 
+    dialect = param.String(default=None, doc="""
+        The SQL dialect to render, e.g. 'duckdb', 'mysql', 'postgresql'
+        or 'sqlite'. If None the dialect of the source is used, if
+        known, otherwise generic SQL is rendered.""")
+
     __abstract = True
 
+    # Whether the rendered SQL depends on the dialect
+    _dialect_specific = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Memoize the SQL rendered by the apply implementation of
+        # deterministic transforms
+        apply = cls.__dict__.get('apply')
+        if apply is None:
+            return
+
+        @wraps(apply)
+        def memoized_apply(self, sql_in):
+            key = self._render_key()
+            return _memoized(
+                None if key is None else (key, sql_in), lambda: apply(self, sql_in)
+            )
+
+        # Bypass the Parameterized metaclass which warns about
+        # setting non-Parameter class attributes
+        type.__setattr__(cls, 'apply', memoized_apply)
+
     @classmethod
     def apply_to(cls, sql_in, **kwargs):
         """
@@ -35,12 +142,32 @@ class SQLTransform(Transform):
         """
         Implements hashing to allow a Source to compute a hash key.
         """
-        hash_vals = (type(self).__name__,)
-        hash_vals += tuple(sorted([
-            (k, v) for k, v in self.param.values().items()
+        try:
+            return hash((type(self).__name__, self._param_key()))
+        except TypeError:
+            return super().__hash__()
+
+    def _param_key(self):
+        """
+        Returns a hashable key of the parameter values, raising a
+        TypeError if a value cannot be hashed.
+        """
+        return tuple(
+            (k, _hash_key(v)) for k, v in sorted(self.param.values().items())
             if k not in Transform.param
-        ]))
-        return hash(str(hash_vals))
+        )
+
+    def _render_key(self):
+        """
+        Returns a key which uniquely identifies the SQL rendered by
+        this transform or None if the rendered SQL may not be memoized.
+        """
+        if not self._deterministic:
+            return None
+        try:
+            return (type(self), self._param_key())
+        except TypeError:
+            return None
 
     def apply(self, sql_in):
         """
@@ -58,6 +185,30 @@ class SQLTransform(Transform):
         """
         return sql_in
 
+    def apply_params(self, sql_in, params=None):
+        """
+        Given an SQL statement and the values of the bind parameters
+        it references, manipulate it, and return a new SQL statement
+        along with the values of the bind parameters. Transforms which
+        embed values in the query should reference them as named bind
+        parameters (e.g. :name) so that the database can reuse the
+        query plan when only the values change.
+
+        Parameters
+        ----------
+        sql_in: string
+            The initial SQL query to be manipulated.
+        params: dict
+            The values of the bind parameters referenced by sql_in.
+
+        Returns
+        -------
+        tuple(string, dict)
+            New SQL query derived from the above query and the values
+            of the bind parameters it references.
+        """
+        return self.apply(sql_in), dict(params or {})
+
 
 class SQLGroupBy(SQLTransform):
     """
@@ -68,10 +219,13 @@ class SQLGroupBy(SQLTransform):
         Columns to Group by""")
 
     aggregates = param.Dict(doc="""
-        mapping of Aggregate Functions to use to which column to use them on""")
+        mapping of Aggregate Functions to use to which column (or list
+        of columns) to use them on""")
 
     transform_type = 'sql_group_by'
 
+    _deterministic = True
+
     def apply(self, sql_in):
         template = """
             SELECT
@@ -81,13 +235,14 @@ class SQLGroupBy(SQLTransform):
             GROUP BY {{by_cols}}
         """
         by_cols = ', '.join(self.by)
-        aggs = ', '.join([
-            f'{agg}({col}) AS {col}' for agg, col in self.aggregates.items()
-        ])
-        return Template(template, trim_blocks=True, lstrip_blocks=True).render(
+        aggs = ', '.join(self._aggregates())
+        return _get_template(template).render(
             by_cols=by_cols, aggs=aggs, sql_in=sql_in
         )
 
+    def _aggregates(self):
+        return _aggregate_columns(self.aggregates)
+
 
 class SQLLimit(SQLTransform):
     """
@@ -96,17 +251,251 @@ class SQLLimit(SQLTransform):
 
     limit = param.Integer(default=1000, doc="Limit on the number of rows to return")
 
+    offset = param.Integer(default=None, bounds=(0, None), doc="""
+        Number of rows to skip before returning rows.""")
+
     transform_type = 'sql_limit'
 
+    _deterministic = True
+
     def apply(self, sql_in):
         template = """
             SELECT
                 *
             FROM ( {{sql_in}} )
             LIMIT {{limit}}
+            {% if offset %}
+            OFFSET {{offset}}
+            {% endif %}
+        """
+        return _get_template(template).render(
+            limit=self.limit, offset=self.offset, sql_in=sql_in
+        )
+
+
+class SQLOrderBy(SQLTransform):
+    """
+    Sorts the query by one or more columns.
+    """
+
+    by = param.List(default=[], doc="Columns to sort by.")
+
+    ascending = param.ClassSelector(default=True, class_=(bool, list), doc="""
+       Sort ascending vs. descending. Specify list for multiple sort
+       orders. If this is a list of bools, must match the length of
+       the by.""")
+
+    nulls_last = param.Boolean(default=False, doc="""
+       Whether to sort missing values last regardless of the sort
+       order, like pandas does. Otherwise the database default is
+       used.""")
+
+    transform_type = 'sql_order_by'
+
+    _deterministic = True
+
+    _dialect_specific = True
+
+    def apply(self, sql_in):
+        template = """
+            SELECT
+                *
+            FROM ( {{sql_in}} )
+            ORDER BY {{order}}
+        """
+        return _get_template(template).render(
+            order=', '.join(self._order()), sql_in=sql_in
+        )
+
+    def _order(self):
+        ascending = self.ascending
+        if not isinstance(ascending, list):
+            ascending = [ascending]*len(self.by)
+        order = [
+            col if asc else f'{col} DESC' for col, asc in zip(self.by, ascending)
+        ]
+        if not self.nulls_last:
+            return order
+        elif self.dialect == 'mysql':
+            # MySQL does not support NULLS LAST
+            return [
+                expr for col, o in zip(self.by, order) for expr in (f'{col} IS NULL', o)
+            ]
+        return [f'{o} NULLS LAST' for o in order]
+
+
+class SQLSample(SQLTransform):
+    """
+    Samples a fixed number of rows or a percentage of the rows. Uses
+    the native sampling support of the database where it is available
+    on subqueries (i.e. DuckDB's USING SAMPLE, the equivalent of
+    TABLESAMPLE) and otherwise orders the rows randomly.
+    """
+
+    percent = param.Number(default=None, bounds=(0, 100), doc="""
+        Percentage of rows to sample.""")
+
+    size = param.Integer(default=None, bounds=(0, None), doc="""
+        Number of rows to sample, takes precedence over the percent.""")
+
+    seed = param.Integer(default=None, doc="""
+        Seed for reproducible samples (only supported by DuckDB).""")
+
+    transform_type = 'sql_sample'
+
+    _deterministic = True
+
+    _dialect_specific = True
+
+    # Expressions returning a random number between 0 and 1
+    _random = {
+        'mssql': 'RAND(CHECKSUM(NEWID()))',
+        'mysql': 'RAND()',
+        'sqlite': '(ABS(RANDOM()) / 9223372036854775808.0)',
+    }
+
+    def apply(self, sql_in):
+        if self.size is None and self.percent is None:
+            return sql_in
+        if self.dialect == 'duckdb':
+            template = """
+                SELECT
+                    *
+                FROM ( {{sql_in}} )
+                USING SAMPLE {{sample}} ({{method}}{% if seed is not none %}, {{seed}}{% endif %})
+            """
+            if self.size is not None:
+                sample, method = f'{self.size} ROWS', 'reservoir'
+            else:
+                sample, method = f'{self.percent} PERCENT', 'bernoulli'
+            return _get_template(template).render(
+                sample=sample, method=method, seed=self.seed, sql_in=sql_in
+            )
+        template = """
+            SELECT
+                *
+            FROM ( {{sql_in}} )
+            {% if size is not none %}
+            ORDER BY {{random}}
+            LIMIT {{size}}
+            {% else %}
+            WHERE {{random}} < {{fraction}}
+            {% endif %}
         """
-        return Template(template, trim_blocks=True, lstrip_blocks=True).render(
-            limit=self.limit, sql_in=sql_in
+        fraction = None if self.percent is None else self.percent / 100
+        return _get_template(template).render(
+            size=self.size, fraction=fraction, sql_in=sql_in,
+            random=self._random.get(self.dialect, 'RANDOM()')
+        )
+
+
+class SQLTimeBucket(SQLTransform):
+    """
+    Aggregates the rows in time buckets of a fixed width, e.g. to fetch
+    an hourly time series from a table of raw events. The truncated
+    timestamps are returned in the date_column.
+    """
+
+    aggregates = param.Dict(default={}, doc="""
+        mapping of Aggregate Functions to use to which column (or list
+        of columns) to use them on""")
+
+    by = param.List(default=[], doc="""
+        Additional columns to group by.""")
+
+    date_column = param.String(doc="""
+        The timestamp column to bucket.""")
+
+    interval = param.Selector(default='day', objects=[
+        'second', 'minute', 'hour', 'day', 'week', 'month', 'year'], doc="""
+        The unit of the bucket width.""")
+
+    width = param.Integer(default=1, bounds=(1, None), doc="""
+        The width of the buckets in units of the interval. Widths
+        other than 1 are only supported for intervals up to a day.""")
+
+    transform_type = 'sql_time_bucket'
+
+    _deterministic = True
+
+    _dialect_specific = True
+
+    _seconds = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+    # strftime style formats which truncate timestamps to the interval
+    _formats = {
+        'second': '%Y-%m-%d %H:%M:%S',
+        'minute': '%Y-%m-%d %H:%M:00',
+        'hour': '%Y-%m-%d %H:00:00',
+        'day': '%Y-%m-%d 00:00:00',
+        'week': '%Y-%m-%d 00:00:00',
+        'month': '%Y-%m-01 00:00:00',
+        'year': '%Y-01-01 00:00:00',
+    }
+
+    def _bucket(self):
+        col, interval, width = self.date_column, self.interval, self.width
+        if width > 1 and interval not in self._seconds:
+            raise ValueError(
+                f'{type(self).__name__} only supports widths greater than 1 '
+                f'for intervals up to a day, not {interval!r}.'
+            )
+        seconds = self._seconds.get(interval, 1) * width
+        if self.dialect == 'sqlite':
+            if width > 1:
+                return (
+                    f"datetime((CAST(strftime('%s', {col}) AS INTEGER) / {seconds}) "
+                    f"* {seconds}, 'unixepoch')"
+                )
+            elif interval == 'week':
+                return f"strftime('{self._formats[interval]}', {col}, 'weekday 0', '-6 days')"
+            return f"strftime('{self._formats[interval]}', {col})"
+        elif self.dialect == 'mysql':
+            if width > 1:
+                return f'FROM_UNIXTIME(FLOOR(UNIX_TIMESTAMP({col}) / {seconds}) * {seconds})'
+            elif interval == 'week':
+                col = f'{col} - INTERVAL WEEKDAY({col}) DAY'
+            return f"DATE_FORMAT({col}, '{self._formats[interval]}')"
+        elif width > 1:
+            # Align buckets to the unix epoch like the other dialects
+            func = 'time_bucket' if self.dialect == 'duckdb' else 'date_bin'
+            return f"{func}(INTERVAL '{seconds} seconds', {col}, TIMESTAMP '1970-01-01')"
+        return f"date_trunc('{interval}', {col})"
+
+    def apply(self, sql_in):
+        template = """
+            SELECT
+                {{columns}}
+            FROM ( {{sql_in}} )
+            GROUP BY {{group_by}}
+            ORDER BY {{group_by}}
+        """
+        bucket = self._bucket()
+        columns = [f'{bucket} AS {self.date_column}'] + self.by
+        columns += _aggregate_columns(self.aggregates)
+        return _get_template(template).render(
+            columns=', '.join(columns), group_by=', '.join([bucket]+self.by),
+            sql_in=sql_in
+        )
+
+
+class SQLCount(SQLTransform):
+    """
+    Counts the number of rows returned by the query.
+    """
+
+    transform_type = 'sql_count'
+
+    _deterministic = True
+
+    def apply(self, sql_in):
+        template = """
+            SELECT
+                COUNT(*) as count
+            FROM ( {{sql_in}} )
+        """
+        return _get_template(template).render(
+            sql_in=sql_in
         )
 
 
@@ -116,23 +505,60 @@ class SQLDistinct(SQLTransform):
 
     transform_type = 'sql_distinct'
 
+    _deterministic = True
+
     def apply(self, sql_in):
         template = """
             SELECT DISTINCT
                 {{columns}}
             FROM ( {{sql_in}} )
         """
-        return Template(template, trim_blocks=True, lstrip_blocks=True).render(
+        return _get_template(template).render(
             columns=', '.join(self.columns), sql_in=sql_in
         )
 
 
+class SQLDistinctUnion(SQLTransform):
+    """
+    Computes the distinct values of multiple columns in a single query
+    by combining the distinct values of each column using UNION ALL.
+    The __column column holds the index of the column each row holds
+    the distinct values of.
+    """
+
+    columns = param.List(default=[], doc="Columns to return distinct values for.")
+
+    limit = param.Integer(default=1000, doc="Limit on the number of distinct values per column.")
+
+    transform_type = 'sql_distinct_union'
+
+    _deterministic = True
+
+    def apply(self, sql_in):
+        template = """
+            SELECT
+                {{index}} AS __column, {{columns}}
+            FROM ( SELECT DISTINCT {{column}} FROM ( {{sql_in}} ) LIMIT {{limit}} )
+        """
+        selects = []
+        for i, col in enumerate(self.columns):
+            columns = ', '.join([
+                c if c == col else f'NULL AS {c}' for c in self.columns
+            ])
+            selects.append(_get_template(template).render(
+                index=i, column=col, columns=columns, limit=self.limit, sql_in=sql_in
+            ))
+        return '\nUNION ALL\n'.join(selects)
+
+
 class SQLMinMax(SQLTransform):
 
     columns = param.List(default=[], doc="Columns to return min/max values for.")
 
     transform_type = 'sql_minmax'
 
+    _deterministic = True
+
     def apply(self, sql_in):
         aggs = []
         for col in self.columns:
@@ -143,7 +569,7 @@ class SQLMinMax(SQLTransform):
                 {{columns}}
             FROM ( {{sql_in}} )
         """
-        return Template(template, trim_blocks=True, lstrip_blocks=True).render(
+        return _get_template(template).render(
             columns=', '.join(aggs), sql_in=sql_in
         )
 
@@ -154,13 +580,15 @@ class SQLColumns(SQLTransform):
 
     transform_type = 'sql_columns'
 
+    _deterministic = True
+
     def apply(self, sql_in):
         template = """
             SELECT
                 {{columns}}
             FROM ( {{sql_in}} )
         """
-        return Template(template, trim_blocks=True, lstrip_blocks=True).render(
+        return _get_template(template).render(
             columns=', '.join(self.columns), sql_in=sql_in
         )
 
@@ -174,27 +602,73 @@ class SQLFilter(SQLTransform):
       List of filter conditions expressed as tuples of the column
       name and the filter value.""")
 
+    expression = param.String(default=None, doc="""
+      Optional SQL boolean expression combined with the conditions.""")
+
+    _deterministic = True
+
+    # DuckDB compares DATE columns against strings as dates
+    _dialect_specific = True
+
     @classmethod
-    def _range_filter(cls, col, v1, v2):
-        start = str(v1) if isinstance(v1, dt.date) else v1
-        end = str(v2) if isinstance(v2, dt.date) else v2
-        if isinstance(v1, dt.date) and not isinstance(v1, dt.datetime):
-            start += ' 00:00:00'
-        if isinstance(v2, dt.date) and not isinstance(v2, dt.datetime):
-            end += ' 00:00:00'
-        return f'{col} BETWEEN {start!r} AND {end!r}'
+    def _range_filter(cls, col, v1, v2, bind=repr, timestamp=None):
+        timestamp = timestamp or bind
+
+        def render(v):
+            if isinstance(v, dt.datetime):
+                return timestamp(str(v))
+            elif isinstance(v, dt.date):
+                return timestamp(f'{v} 00:00:00')
+            return bind(v)
+
+        return f'{col} BETWEEN {render(v1)} AND {render(v2)}'
 
     def apply(self, sql_in):
+        return self._render(sql_in, repr)
+
+    def apply_params(self, sql_in, params=None):
+        params = dict(params or {})
+        return self._render(sql_in, _binder(params)), params
+
+    def _render(self, sql_in, bind):
+        """
+        Renders the query, formatting each value with the supplied
+        bind function, which either inlines the value or returns a
+        bind parameter referencing it.
+        """
+        conditions = self._conditions(bind)
+        if not conditions:
+            return sql_in
+
+        template = """
+            SELECT
+                *
+            FROM ( {{sql_in}} )
+            WHERE ( {{conditions}} )
+        """
+        return _get_template(template).render(
+            conditions=' ) AND ( '.join(conditions), sql_in=sql_in
+        )
+
+    def _conditions(self, bind):
+        if self.dialect == 'duckdb':
+            def timestamp(value):
+                return f'CAST({bind(value)} AS TIMESTAMP)'
+        else:
+            timestamp = bind
         conditions = []
         for col, val in self.conditions:
             if val is None:
                 condition = f'{col} IS NULL'
             elif np.isscalar(val):
-                condition = f'{col} = {val!r}'
+                condition = f'{col} = {bind(val)}'
             elif isinstance(val, dt.datetime):
-                condition = f'{col} = {str(val)!r}'
+                condition = f'{col} = {timestamp(str(val))}'
             elif isinstance(val, dt.date):
-                condition = f"{col} BETWEEN '{str(val)} 00:00:00' AND '{str(val)} 23:59:59'"
+                condition = (
+                    f"{col} BETWEEN {timestamp(f'{val} 00:00:00')} "
+                    f"AND {timestamp(f'{val} 23:59:59')}"
+                )
             elif (isinstance(val, list) and all(
                     isinstance(v, tuple) and len(v) == 2 for v in val
             )):
@@ -202,19 +676,19 @@ class SQLFilter(SQLTransform):
                 if not val:
                     continue
                 condition = ' OR '.join([
-                    self._range_filter(col, v1, v2) for v1, v2 in val
+                    self._range_filter(col, v1, v2, bind, timestamp) for v1, v2 in val
                 ])
             elif isinstance(val, list):
                 if not val:
                     continue
                 non_null = [v for v in val if v is not None]
-                condition = f"{col} IN ({', '.join(map(repr, non_null))})"
+                condition = f"{col} IN ({', '.join(map(bind, non_null))})"
                 if not non_null:
                     condition = f'{col} IS NULL'
                 elif len(val) != len(non_null):
                     condition = f'({condition}) OR ({col} IS NULL)'
             elif isinstance(val, tuple):
-                condition = self._range_filter(col, *val)
+                condition = self._range_filter(col, *val, bind=bind, timestamp=timestamp)
             else:
                 self.param.warning(
                     'Condition {val!r} on {col!r} column not understood. '
@@ -222,15 +696,209 @@ class SQLFilter(SQLTransform):
                 )
                 continue
             conditions.append(condition)
-        if not conditions:
-            return sql_in
+        if self.expression:
+            conditions.append(self.expression)
+        return conditions
+
+
+class _SQLSelect:
+    """
+    Accumulates SQLTransforms which can be expressed as the clauses of
+    a single SELECT statement over an input query.
+    """
 
+    def __init__(self, sql_in):
+        self.sql_in = sql_in
+        self.columns = None
+        self.distinct = False
+        self.conditions = []
+        self.by = None
+        self.aggregates = []
+        self.order = None
+        self.limit = None
+        self.offset = None
+
+    @property
+    def empty(self):
+        return (
+            self.columns is None and self.by is None and self.order is None
+            and not self.conditions and self.limit is None
+        )
+
+    def merge(self, transform, bind):
+        """
+        Merges the transform into the SELECT statement returning
+        whether it could be merged without changing the result.
+        """
+        # Clauses are evaluated in the order WHERE, GROUP BY, SELECT
+        # (DISTINCT), ORDER BY and LIMIT so a transform may only be
+        # merged if it is evaluated after all the clauses that precede it
+        grouped = self.by is not None
+        ordered = self.order is not None
+        if isinstance(transform, SQLLimit):
+            if self.limit is None:
+                self.limit, self.offset = transform.limit, transform.offset
+            elif transform.offset:
+                return False
+            elif transform.limit < self.limit:
+                self.limit = transform.limit
+        elif isinstance(transform, SQLColumns):
+            if grouped or self.distinct:
+                return False
+            self.columns = list(transform.columns)
+        elif isinstance(transform, SQLFilter):
+            if grouped or self.distinct or self.limit is not None:
+                return False
+            self.conditions += transform._conditions(bind)
+        elif isinstance(transform, SQLOrderBy):
+            if self.limit is not None:
+                return False
+            self.order = transform._order()
+        elif isinstance(transform, SQLDistinct):
+            if grouped or self.distinct or ordered or self.limit is not None:
+                return False
+            self.distinct = True
+            self.columns = list(transform.columns)
+        elif isinstance(transform, SQLGroupBy):
+            if grouped or self.distinct or ordered or self.limit is not None:
+                return False
+            self.by = list(transform.by)
+            self.aggregates = transform._aggregates()
+            self.columns = None
+        else:
+            return False
+        return True
+
+    def render(self):
+        if self.empty:
+            return self.sql_in
         template = """
-            SELECT
-                *
+            SELECT {% if distinct %}DISTINCT {% endif %}
+                {{columns}}
             FROM ( {{sql_in}} )
-            WHERE ( {{conditions}} )
+            {% if conditions %}
+            WHERE {{conditions}}
+            {% endif %}
+            {% if by %}
+            GROUP BY {{by}}
+            {% endif %}
+            {% if order %}
+            ORDER BY {{order}}
+            {% endif %}
+            {% if limit is not none %}
+            LIMIT {{limit}}
+            {% endif %}
+            {% if offset %}
+            OFFSET {{offset}}
+            {% endif %}
         """
-        return Template(template, trim_blocks=True, lstrip_blocks=True).render(
-            conditions=' AND '.join(conditions), sql_in=sql_in
+        if self.by is not None:
+            columns = self.by + self.aggregates
+        else:
+            columns = self.columns or ['*']
+        return _get_template(template).render(
+            distinct=self.distinct, columns=', '.join(columns),
+            sql_in=self.sql_in, by=', '.join(self.by or []), limit=self.limit,
+            order=', '.join(self.order or []), offset=self.offset,
+            conditions=' AND '.join(f'( {c} )' for c in self.conditions)
         )
+
+
+def _compose(sql_in, sql_transforms, bind, apply):
+    select = _SQLSelect(sql_in)
+    for transform in sql_transforms:
+        if select.merge(transform, bind):
+            continue
+        sql_in = select.render()
+        select = _SQLSelect(sql_in)
+        if not select.merge(transform, bind):
+            select = _SQLSelect(apply(transform, sql_in))
+    return select.render()
+
+
+def _with_dialect(sql_transforms, dialect):
+    """
+    Returns the transforms, replacing dialect specific transforms
+    which do not declare a dialect with copies declaring the supplied
+    dialect.
+    """
+    if dialect is None:
+        return sql_transforms
+    return [
+        type(t)(**dict(t.param.values(), dialect=dialect))
+        if t._dialect_specific and t.dialect is None else t
+        for t in sql_transforms
+    ]
+
+
+def compose_sql(sql_in, sql_transforms, dialect=None):
+    """
+    Applies a list of SQLTransforms to an SQL statement, merging
+    consecutive SQLFilter, SQLColumns, SQLGroupBy, SQLDistinct,
+    SQLOrderBy and SQLLimit transforms into a single flat SELECT
+    statement where this does not change the result instead of
+    nesting a subquery per transform.
+
+    Parameters
+    ----------
+    sql_in: string
+        The initial SQL query to be manipulated.
+    sql_transforms: list(SQLTransform)
+        The transforms to apply in order.
+    dialect: str | None
+        The SQL dialect of the database, used to render transforms
+        which do not explicitly declare a dialect.
+
+    Returns
+    -------
+    string
+        New SQL query equivalent to applying each transform in turn.
+    """
+    sql_transforms = _with_dialect(sql_transforms, dialect)
+    keys = tuple(t._render_key() for t in sql_transforms)
+    key = None if None in keys else ('compose_sql', keys, sql_in)
+    return _memoized(key, lambda: _compose(
+        sql_in, sql_transforms, repr, lambda transform, sql: transform.apply(sql)
+    ))
+
+
+def compose_sql_params(sql_in, sql_transforms, params=None, dialect=None):
+    """
+    Same as compose_sql but references the values embedded in the query
+    as bind parameters (see SQLTransform.apply_params).
+
+    Parameters
+    ----------
+    sql_in: string
+        The initial SQL query to be manipulated.
+    sql_transforms: list(SQLTransform)
+        The transforms to apply in order.
+    params: dict
+        The values of the bind parameters referenced by sql_in.
+    dialect: str | None
+        The SQL dialect of the database, used to render transforms
+        which do not explicitly declare a dialect.
+
+    Returns
+    -------
+    tuple(string, dict)
+        New SQL query and the values of the bind parameters it references.
+    """
+    sql_transforms = _with_dialect(sql_transforms, dialect)
+    if params:
+        return _compose_params(sql_in, sql_transforms, dict(params))
+    keys = tuple(t._render_key() for t in sql_transforms)
+    key = None if None in keys else ('compose_sql_params', keys, sql_in)
+    sql, params = _memoized(key, lambda: _compose_params(sql_in, sql_transforms, {}))
+    return sql, dict(params)
+
+
+def _compose_params(sql_in, sql_transforms, params):
+    bind = _binder(params)
+
+    def apply(transform, sql):
+        sql, new_params = transform.apply_params(sql, params)
+        params.update(new_params)
+        return sql
+
+    return _compose(sql_in, sql_transforms, bind, apply), params
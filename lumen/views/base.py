@@ -146,7 +146,8 @@ class View(Component, Viewer):
         for fp in self._field_params:
             if isinstance(self.param[fp], param.Selector):
                 self.param[fp].objects = fields
-        pipeline.param.watch(self.update, 'data')
+        pipeline.param.watch(self.update, ['data', 'stale'])
+        pipeline.param.watch(self._update_loading, 'loading')
         super().__init__(pipeline=pipeline, refs=refs, **params)
         self.param.watch(self.update, [p for p in self.param if p not in ('rerender', 'selection_expr', 'name')])
         self.download.view = self
@@ -175,6 +176,10 @@ class View(Component, Viewer):
     def _update_selection_expr(self, event):
         self.selection_expr = event.new
 
+    def _update_loading(self, event):
+        if self._panel is not None and 'loading' in self._panel.param:
+            self._panel.loading = event.new
+
     @classmethod
     def from_spec(cls, spec, source=None, filters=None, pipeline=None):
         """
@@ -220,12 +225,17 @@ class View(Component, Viewer):
                     overrides[ts] = [Transform.from_spec(t) for t in overrides[ts]]
             if pipeline is None:
                 pipeline = Pipeline(source=source, **overrides)
-            elif overrides:
+            elif overrides.get('sql_transforms'):
                 pipeline = pipeline.chain(
                     filters=overrides.get('filters', []),
                     transforms=overrides.get('transforms', []),
                     sql_transforms=overrides.get('sql_transforms', [])
                 )
+            elif overrides:
+                pipeline = pipeline.branch(
+                    filters=overrides.get('filters', []),
+                    transforms=overrides.get('transforms', [])
+                )
             resolved_spec['pipeline'] = pipeline
 
         # Resolve View parameters
@@ -674,17 +684,84 @@ class Table(View):
     page_size = param.Integer(default=20, bounds=(1, None), doc="""
         Number of rows to render per page, if pagination is enabled.""")
 
+    paginate = param.Boolean(default=False, doc="""
+        Whether to query the pipeline for one page at a time, allowing
+        SQL sources to sort and paginate the data in the database. When
+        enabled the view queries a lazy copy of the pipeline, so the
+        full table is only queried if the copy's data is requested.""")
+
+    page = param.Integer(default=1, bounds=(1, None), doc="""
+        The page to render, if paginate is enabled.""")
+
     view_type = 'table'
 
     _extension = 'tabulator'
 
+    def __init__(self, **params):
+        self._count = None
+        self._sorters = []
+        pipeline = params.get('pipeline')
+        if params.get('paginate') and pipeline is not None and not pipeline.lazy:
+            params['pipeline'] = pipeline.clone(lazy=True, data=None)
+        super().__init__(**params)
+
     def get_panel(self):
-        return pn.widgets.tables.Tabulator(**self._get_params())
+        table = pn.widgets.tables.Tabulator(**self._get_params())
+        if not self.paginate:
+            return table
+        table.param.watch(self._update_sorters, 'sorters')
+        page = pn.widgets.IntInput.from_param(
+            self.param.page, name='', start=1, width=100
+        )
+        return pn.Column(table, pn.Row(page, pn.pane.Str(self._page_info())))
 
     def _get_params(self):
+        if self.paginate:
+            return dict(value=self._get_page(), disabled=True, **self.kwargs)
         return dict(value=self.get_data(), disabled=True, page_size=self.page_size,
                     **self.kwargs)
 
+    def __bool__(self):
+        if not self.paginate:
+            return super().__bool__()
+        elif self._count is None:
+            # No page has been queried yet so only query the row count
+            self._count = self.pipeline.get_page(1, 1)[1]
+        return self._count > 0
+
+    def _get_page(self):
+        sort = [
+            (sorter['field'], sorter.get('dir', 'asc') == 'asc')
+            for sorter in self._sorters
+        ]
+        data, self._count = self.pipeline.get_page(self.page, self.page_size, sort)
+        if self.page > self._pages:
+            with param.discard_events(self):
+                self.page = self._pages
+            data, self._count = self.pipeline.get_page(self.page, self.page_size, sort)
+        return data
+
+    @property
+    def _pages(self):
+        return max(-(-self._count // self.page_size), 1)
+
+    def _page_info(self):
+        return f'of {self._pages} ({self._count} rows)'
+
+    def _update_sorters(self, event):
+        self._sorters = event.new
+        self.update()
+
+    def _update_panel(self, *events):
+        if self.paginate != isinstance(self._panel, pn.Column):
+            self._panel = None
+        if self._panel is None or not self.paginate:
+            return super()._update_panel(*events)
+        table, pager = self._panel
+        table.param.set_param(**self._get_params())
+        pager[1].object = self._page_info()
+        return False
+
 
 class DownloadView(View):
     """
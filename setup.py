@@ -31,6 +31,7 @@ extras_require = {
         'flake8',
         'intake',
         'intake-sql',
+        'duckdb',
         'fastparquet',
         'msgpack-python',
         'toolz',